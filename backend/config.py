@@ -5,6 +5,7 @@ BASE_DIR = Path(__file__).resolve().parent
 DATA_DIR = BASE_DIR / 'data'
 RAW_DATA_DIR = DATA_DIR / 'raw'
 SIMULATED_DATA_DIR = DATA_DIR / 'simulated'
+CACHE_DIR = DATA_DIR / 'cache'  # Derived, rebuildable artifacts (not committed)
 
 DURHAM_BOUNDS = {
     'north': 36.1399,
@@ -13,6 +14,43 @@ DURHAM_BOUNDS = {
     'west': -79.0199
 }
 
+# Projected CRS for tract areas. Web Mercator matches the area_km2 values already
+# published in osm_infrastructure.json; only used for relative densities.
+PROJECTED_CRS = 'EPSG:3857'
+
+# Decimal places kept in exported GeoJSON coordinates (6 places ~ 0.1 m)
+GEOJSON_COORDINATE_PRECISION = 6
+
+# Shared tract topology (frontend/public/data/tracts-topo*.json). Map layers ship
+# attribute tables joined onto it instead of their own copy of the polygons.
+TOPOJSON_QUANTIZATION = 100000
+
+# Geometry pyramid: coarsest first. Tolerances (degrees, applied once per shared
+# arc) are roughly one screen pixel at each level's max zoom; the last level keeps
+# full TIGER detail.
+TRACT_GEOMETRY_LEVELS = [
+    {'max_zoom': 10, 'tolerance': 0.002},
+    {'max_zoom': 12, 'tolerance': 0.0005},
+    {'max_zoom': 14, 'tolerance': 0.0001},
+    {'max_zoom': None, 'tolerance': None},
+]
+
+# JSON published to frontend/public/data is minified with floats cut to this
+# many significant digits (7 keeps tract coordinates to ~1 m without zeroing
+# small p-values), next to precompressed .gz and, with brotli installed, .br copies
+FRONTEND_JSON_SIGNIFICANT_DIGITS = 7
+
+# Static MVT pyramid (frontend/public/tiles) of individual crash points, only
+# from street zoom where they are legible. Tract polygons come from the shared
+# tracts-topo.json instead. The map reads the zoom range from the tileset's
+# metadata.json.
+VECTOR_TILE_CONFIG = {
+    'max_zoom': 14,
+    'crash_min_zoom': 12,
+    'extent': 4096,  # MVT default grid
+    'buffer': 64,    # tile units of overlap so outlines do not seam at tile edges
+}
+
 CENSUS_API_KEY = os.getenv('CENSUS_API_KEY', '')
 CENSUS_VINTAGE = 2024  # ACS 5-year estimates vintage year
 TIGER_VINTAGE = 2023   # TIGER/Line geometry service (lags ACS; boundaries only change at decennial census)
@@ -55,6 +93,20 @@ DANGER_SCORE_CONFIG = {
 # Model reproducibility
 DEFAULT_RANDOM_SEED = 42
 
+# Bootstrap confidence intervals for equity gaps
+EQUITY_BOOTSTRAP_CONFIG = {
+    'n_bootstrap': 2000,
+    'confidence': 0.95,
+    'method': 'bca',        # 'bca' or 'percentile'
+    'n_jobs': None,         # Worker processes; worth it only for very large n_bootstrap
+}
+
+# Significance test for equity gaps: 'ttest' or 'permutation'
+EQUITY_SIGNIFICANCE_CONFIG = {
+    'test': 'permutation',
+    'n_permutations': 10000,
+}
+
 # NCDOT Non-Motorist Crash Feature Service (public ArcGIS)
 NCDOT_NONMOTORIST_SERVICE = (
     "https://services.arcgis.com/NuWFvHYDMVmmxMeM/arcgis/rest/services"
@@ -68,6 +120,14 @@ NCDOT_TDI_SERVICE = (
     "/Transportation_Disadvantage_Index_Data_2/FeatureServer/0"
 )
 
+# Paged ArcGIS REST queries (utils/arcgis_client.py)
+ARCGIS_CLIENT_CONFIG = {
+    'max_workers': 8,       # Concurrent page requests (and pooled connections)
+    'retries': 4,           # Extra attempts per page on connection errors, 429 and 5xx
+    'backoff': 0.5,         # Seconds before the first retry, doubling each time
+    'timeout': 60,
+}
+
 # GoDurham (Durham Area Transit Authority) GTFS static feed
 # Includes stops.txt with lat/lon. Boardings not in public GTFS.
 GTFS_GODURHAM_URL = "https://godurham.rideralerts.com/InfoPoint/GTFS-Zip.ashx"
@@ -117,6 +177,8 @@ HIGH_SUPPRESSION_THRESHOLD = 70  # Suppression % that defines "high suppression"
 # OpenStreetMap / Overpass API
 OVERPASS_API = "https://overpass-api.de/api/interpreter"
 OVERPASS_TIMEOUT = 60
+# Local OSM extract (.osm, .osm.gz/.bz2 or .pbf) to score instead of querying Overpass
+OSM_EXTRACT_PATH = os.getenv('OSM_EXTRACT_PATH') or None
 
 # OSM infrastructure features: Overpass QL tag filters and composite score weights
 OSM_INFRASTRUCTURE_FEATURES = {
@@ -148,6 +210,7 @@ QUINTILE_LABELS = ['Q1 (Poorest)', 'Q2', 'Q3', 'Q4', 'Q5 (Richest)']
 DATA_FRESHNESS = {
     'census': 365,       # Census releases annually
     'ncdot_crashes': 30, # NCDOT updates ~quarterly
+    'ncdot_crashes_full': 180,  # Full re-fetch to pick up revisions to older records
     'osm': 7,            # OSM changes frequently
 }
 
@@ -8,9 +8,18 @@ or simply reflect enforcement/reporting bias.
 import pandas as pd
 import geopandas as gpd
 from pathlib import Path
+from typing import Optional, Sequence, Union
 from sklearn.metrics import mean_absolute_error
 from sklearn.linear_model import Ridge
-from config import CRASH_ANALYSIS_YEARS, CRASH_TRAINING_YEARS, CRASH_TEST_YEARS
+from config import CRASH_ANALYSIS_YEARS, CRASH_TRAINING_YEARS, CRASH_TEST_YEARS, QUINTILE_LABELS
+from utils.crash_store import read_crash_csv, read_crash_store
+from utils.demographic_analysis import classify_income_quintiles, income_quintile_breaks
+from utils.geocode_cache import CrashGeocodeCache
+from utils.geospatial import TractLocator
+from utils.tract_index import TractIndex, geometry_sha256, resolve_census
+
+# ArcGIS fields geocode_crashes always reads
+CRASH_GEOCODE_COLUMNS = ['CrashID', 'CrashDate', 'CrashYear', 'Latitude', 'Longitude']
 
 
 class CrashPredictionAuditor:
@@ -22,38 +31,67 @@ class CrashPredictionAuditor:
     than where they actually *occur*.
     """
 
-    def __init__(self, census_gdf: gpd.GeoDataFrame):
+    def __init__(self, census_gdf: Union[gpd.GeoDataFrame, TractIndex],
+                 geocode_cache_dir: Optional[Path] = None):
         """
         Initialize auditor with census tract data.
 
         Args:
-            census_gdf: GeoDataFrame with census tracts and demographics
+            census_gdf: GeoDataFrame with census tracts and demographics, or a
+                prepared TractIndex (reuses its spatial index for geocoding)
+            geocode_cache_dir: Directory for the persistent CrashID -> tract
+                cache (e.g. GEOCODE_CACHE_DIR); None geocodes every record
         """
-        self.census_gdf = census_gdf.copy()
+        self.census_gdf, self.tract_index = resolve_census(census_gdf)
+        self.geocode_cache_dir = geocode_cache_dir
+        self.income_breaks = income_quintile_breaks(self.census_gdf['median_income'])
         self.years = CRASH_ANALYSIS_YEARS
         self.ai_model = None
 
-    def load_real_crash_data(self, crash_csv_path: Path) -> pd.DataFrame:
+    def _tract_locator(self) -> TractLocator:
+        """Point-in-tract locator, reusing the TractIndex's when there is one."""
+        if self.tract_index is not None:
+            return self.tract_index.locator
+        return TractLocator(self.census_gdf)
+
+    def _tract_geometry_hash(self) -> str:
+        """Hash keying the geocode cache to the current tract geometries."""
+        if self.tract_index is not None:
+            return self.tract_index.geometry_hash
+        return geometry_sha256(self.census_gdf['tract_id'], self.census_gdf.geometry.values)
+
+    def geocode_crashes(self, crash_path: Union[Path, pd.DataFrame], extra_columns: Sequence[str] = ()) -> pd.DataFrame:
         """
-        Load real NCDOT non-motorist crash data and geocode to census tracts.
+        Load real NCDOT non-motorist crash records and geocode each to a census tract.
 
         Args:
-            crash_csv_path: Path to ncdot_nonmotorist_durham.csv
+            crash_path: Path to ncdot_nonmotorist_durham.csv, a crash store
+                directory (see utils.crash_store), which is read with column
+                and year pushdown, or records already in memory
+                (PipelineContext.crashes())
+            extra_columns: ArcGIS fields to carry along besides the ones
+                geocoding needs (e.g. CrashSevr, NM_Type)
 
         Returns:
-            DataFrame with crashes aggregated by tract and year
+            Crash-level DataFrame within the analysis years, with tract_id
+            (crashes outside every tract are dropped)
         """
         print("Loading NCDOT non-motorist crash data...")
 
         # Load crash data (ArcGIS column names)
-        crash_df = pd.read_csv(crash_csv_path)
+        columns = [*CRASH_GEOCODE_COLUMNS, *extra_columns]
+        if isinstance(crash_path, pd.DataFrame):
+            crash_df = crash_path[[name for name in columns if name in crash_path.columns]]
+        elif Path(crash_path).is_dir():
+            crash_df = read_crash_store(crash_path, columns=columns, years=self.years)
+        else:
+            crash_df = read_crash_csv(crash_path, columns=columns)
         crash_df = crash_df.rename(columns={
             'CrashDate': 'crash_date',
             'CrashYear': 'year',
             'Latitude': 'latitude',
             'Longitude': 'longitude',
         })
-        crash_df['crash_date'] = pd.to_datetime(crash_df['crash_date'])
         crash_df['year'] = crash_df['year'].astype(int)
 
         # Filter to analysis window (real data spans 2007-2024)
@@ -61,28 +99,41 @@ class CrashPredictionAuditor:
 
         print(f"Loaded {len(crash_df)} crash records ({min(self.years)}-{max(self.years)})")
 
-        # Create Point geometries for crashes
-        crash_gdf = gpd.GeoDataFrame(
-            crash_df,
-            geometry=gpd.points_from_xy(crash_df['longitude'], crash_df['latitude']),
-            crs='EPSG:4326'
-        )
-
-        # Ensure census GDF has same CRS
-        if self.census_gdf.crs != crash_gdf.crs:
-            self.census_gdf = self.census_gdf.to_crs(crash_gdf.crs)
+        # Ensure census GDF is in lon/lat to match crash coordinates
+        if self.census_gdf.crs is not None and self.census_gdf.crs != 'EPSG:4326':
+            self.census_gdf = self.census_gdf.to_crs('EPSG:4326')
+            self.tract_index = None
 
         print("Geocoding crashes to census tracts...")
 
-        # Spatial join: assign each crash to a census tract
-        crashes_with_tracts = gpd.sjoin(
-            crash_gdf,
-            self.census_gdf[['tract_id', 'geometry', 'median_income', 'pct_minority', 'total_population']],
-            how='inner',
-            predicate='within'
-        )
+        # Batch point-in-polygon: assign each crash to a census tract
+        if self.geocode_cache_dir is not None and 'CrashID' in crash_df.columns:
+            cache = CrashGeocodeCache(self._tract_geometry_hash(), self.geocode_cache_dir)
+            tract_ids = cache.lookup(
+                crash_df['CrashID'], crash_df['longitude'], crash_df['latitude'],
+                lambda lons, lats: self._tract_locator().lookup(lons, lats),
+            )
+            print(f"Reused {cache.hits} cached tract assignments, geocoded {cache.misses} new crashes")
+        else:
+            tract_ids = self._tract_locator().lookup(crash_df['longitude'], crash_df['latitude'])
+        crash_df = crash_df.assign(tract_id=tract_ids)
+        crashes_with_tracts = crash_df[crash_df['tract_id'].notna()]
+
+        print(f"Successfully geocoded {len(crashes_with_tracts)} crashes ({len(crashes_with_tracts)/len(crash_df)*100:.1f}%)")
+        return crashes_with_tracts
+
+    def load_real_crash_data(self, crash_path: Union[Path, pd.DataFrame]) -> pd.DataFrame:
+        """
+        Load real NCDOT non-motorist crash data and geocode to census tracts.
+
+        Args:
+            crash_path: Path to ncdot_nonmotorist_durham.csv, a crash store or
+                loaded records (see geocode_crashes)
 
-        print(f"Successfully geocoded {len(crashes_with_tracts)} crashes ({len(crashes_with_tracts)/len(crash_gdf)*100:.1f}%)")
+        Returns:
+            DataFrame with crashes aggregated by tract and year
+        """
+        crashes_with_tracts = self.geocode_crashes(crash_path)
 
         # Aggregate crashes by tract and year
         crash_counts = crashes_with_tracts.groupby(['tract_id', 'year']).size().reset_index(name='crash_count')
@@ -107,12 +158,10 @@ class CrashPredictionAuditor:
             how='left'
         )
 
-        # Add income quintiles
-        crash_by_tract['income_quintile'] = pd.qcut(
-            crash_by_tract['median_income'],
-            q=5,
-            labels=['Q1 (Poorest)', 'Q2', 'Q3', 'Q4', 'Q5 (Richest)'],
-            duplicates='drop'
+        # Add income quintiles (census-level breaks: each tract counts once,
+        # not once per year of the grid)
+        crash_by_tract['income_quintile'] = classify_income_quintiles(
+            crash_by_tract['median_income'], self.income_breaks, labels=QUINTILE_LABELS
         )
 
         print(f"Aggregated to {len(crash_by_tract)} tract-year observations")
@@ -8,9 +8,11 @@ if infrastructure were safe, but currently don't due to poor infrastructure.
 import numpy as np
 import pandas as pd
 import geopandas as gpd
-from typing import Dict
+from typing import Dict, Union
 from scipy.stats import pearsonr
 from config import SUPPRESSED_DEMAND_CONFIG, HIGH_SUPPRESSION_THRESHOLD, DEFAULT_RANDOM_SEED, QUINTILE_LABELS, HUMAN_EXPERT_DEMAND_BASELINE
+from utils.demographic_analysis import classify_income_quintiles, income_quintile_breaks
+from utils.tract_index import TractIndex, resolve_census
 
 
 class SuppressedDemandAnalyzer:
@@ -22,19 +24,20 @@ class SuppressedDemandAnalyzer:
     This creates inequitable investment patterns favoring already-served areas.
     """
 
-    def __init__(self, census_gdf: gpd.GeoDataFrame, infrastructure_df: pd.DataFrame = None):
+    def __init__(self, census_gdf: Union[gpd.GeoDataFrame, TractIndex], infrastructure_df: pd.DataFrame = None):
         """
         Initialize analyzer with census tract data and OSM infrastructure scores.
 
         Args:
-            census_gdf: GeoDataFrame with census tracts and demographics
+            census_gdf: GeoDataFrame with census tracts and demographics, or a TractIndex
             infrastructure_df: DataFrame with per-tract OSM infrastructure scores
         """
         if infrastructure_df is None:
             raise ValueError(
                 "infrastructure_df is required. Run fetch_osm_infrastructure.py first."
             )
-        self.census_gdf = census_gdf.copy()
+        self.census_gdf, self.tract_index = resolve_census(census_gdf)
+        self.income_breaks = income_quintile_breaks(self.census_gdf['median_income'])
         self.infrastructure_df = infrastructure_df
 
         # Normalize income for calculations
@@ -204,8 +207,8 @@ class SuppressedDemandAnalyzer:
             Dict with funnel stages by quintile
         """
         if 'income_quintile' not in demand_df.columns:
-            demand_df['income_quintile'] = pd.qcut(
-                demand_df['median_income'], q=5, labels=QUINTILE_LABELS
+            demand_df['income_quintile'] = classify_income_quintiles(
+                demand_df['median_income'], self.income_breaks, labels=QUINTILE_LABELS
             )
 
         # Calculate funnel stages by quintile
@@ -318,8 +321,8 @@ class SuppressedDemandAnalyzer:
         )
 
         if 'income_quintile' not in demand_df.columns:
-            demand_df['income_quintile'] = pd.qcut(
-                demand_df['median_income'], q=5, labels=QUINTILE_LABELS
+            demand_df['income_quintile'] = classify_income_quintiles(
+                demand_df['median_income'], self.income_breaks, labels=QUINTILE_LABELS
             )
 
         q1_data = demand_df[demand_df['income_quintile'] == QUINTILE_LABELS[0]]
@@ -441,8 +444,8 @@ class SuppressedDemandAnalyzer:
         demand_df = self.simulate_ai_detection(demand_df)
 
         # Calculate quintiles once for all sub-methods
-        demand_df['income_quintile'] = pd.qcut(
-            demand_df['median_income'], q=5, labels=QUINTILE_LABELS
+        demand_df['income_quintile'] = classify_income_quintiles(
+            demand_df['median_income'], self.income_breaks, labels=QUINTILE_LABELS
         )
 
         funnel_data = self.generate_funnel_data(demand_df)
@@ -9,12 +9,15 @@ vocal advocacy over high-danger corridors in underserved communities.
 import numpy as np
 import pandas as pd
 import geopandas as gpd
-from typing import Dict, List
+from typing import Dict, List, Union
 from config import (
     INFRASTRUCTURE_PROJECT_TYPES, INFRASTRUCTURE_DEFAULT_BUDGET,
     DANGER_SCORE_CONFIG, DEFAULT_RANDOM_SEED, QUINTILE_LABELS,
 )
-from utils.demographic_analysis import calculate_gini_coefficient
+from utils.columnar import columnar_report
+from utils.demographic_analysis import classify_income_quintiles, income_quintile_breaks
+from utils.inequality import inequality_indexes
+from utils.tract_index import TractIndex, resolve_census
 
 
 class InfrastructureRecommendationAuditor:
@@ -22,13 +25,13 @@ class InfrastructureRecommendationAuditor:
 
     PROJECT_TYPES = INFRASTRUCTURE_PROJECT_TYPES
 
-    def __init__(self, census_gdf: gpd.GeoDataFrame, infrastructure_df: pd.DataFrame = None,
+    def __init__(self, census_gdf: Union[gpd.GeoDataFrame, TractIndex], infrastructure_df: pd.DataFrame = None,
                  total_budget: float = INFRASTRUCTURE_DEFAULT_BUDGET):
         """
         Initialize auditor with census data and OSM infrastructure scores.
 
         Args:
-            census_gdf: GeoDataFrame with census tracts and demographics
+            census_gdf: GeoDataFrame with census tracts and demographics, or a TractIndex
             infrastructure_df: DataFrame with per-tract OSM infrastructure densities
             total_budget: Total infrastructure budget to allocate ($)
         """
@@ -36,7 +39,8 @@ class InfrastructureRecommendationAuditor:
             raise ValueError(
                 "infrastructure_df is required. Run fetch_osm_infrastructure.py first."
             )
-        self.census_gdf = census_gdf.copy()
+        self.census_gdf, self.tract_index = resolve_census(census_gdf)
+        self.income_breaks = income_quintile_breaks(self.census_gdf['median_income'])
         self.infrastructure_df = infrastructure_df
         self.total_budget = total_budget
         self.danger_scores = None
@@ -223,10 +227,8 @@ class InfrastructureRecommendationAuditor:
         if self.ai_recommendations is None or self.need_based_recommendations is None:
             raise ValueError("Must simulate recommendations first")
 
-        self.census_gdf['income_quintile'] = pd.qcut(
-            self.census_gdf['median_income'],
-            q=5,
-            labels=QUINTILE_LABELS
+        self.census_gdf['income_quintile'] = classify_income_quintiles(
+            self.census_gdf['median_income'], self.income_breaks, labels=QUINTILE_LABELS
         )
 
         ai_with_quintiles = self.ai_recommendations.merge(
@@ -252,37 +254,58 @@ class InfrastructureRecommendationAuditor:
         all_tract_ids = self.census_gdf['tract_id']
         ai_by_tract = self.ai_recommendations.groupby('tract_id')['cost'].sum()
         need_by_tract = self.need_based_recommendations.groupby('tract_id')['cost'].sum()
-        ai_per_tract = all_tract_ids.map(ai_by_tract).fillna(0).values
-        need_per_tract = all_tract_ids.map(need_by_tract).fillna(0).values
-        ai_gini = calculate_gini_coefficient(ai_per_tract)
-        need_gini = calculate_gini_coefficient(need_per_tract)
+        allocations = np.vstack([
+            all_tract_ids.map(ai_by_tract).fillna(0).values,
+            all_tract_ids.map(need_by_tract).fillna(0).values,
+        ])
+        ai_gini, need_gini = inequality_indexes(allocations)['gini']
+
+        # Per-capita indexes weighted by population; concentration ranks tracts by income
+        weighted = inequality_indexes(
+            allocations,
+            weights=self.census_gdf['total_population'].values,
+            rank_by=self.census_gdf['median_income'].values,
+        )
+        ai_weighted, need_weighted = (
+            {name: float(values[i]) for name, values in weighted.items()} for i in range(2)
+        )
 
         return {
             'ai_allocation': {
                 'by_quintile': ai_by_quintile.to_dict(),
                 'per_capita': ai_per_capita.to_dict(),
                 'disparate_impact_ratio': float(ai_disparate_impact),
-                'gini_coefficient': float(ai_gini)
+                'gini_coefficient': float(ai_gini),
+                'population_weighted': ai_weighted,
             },
             'need_based_allocation': {
                 'by_quintile': need_by_quintile.to_dict(),
                 'per_capita': need_per_capita.to_dict(),
                 'disparate_impact_ratio': float(need_disparate_impact),
-                'gini_coefficient': float(need_gini)
+                'gini_coefficient': float(need_gini),
+                'population_weighted': need_weighted,
             },
             'comparison': {
                 'equity_gap': float(need_disparate_impact - ai_disparate_impact),
-                'gini_improvement': float(need_gini - ai_gini)
+                'gini_improvement': float(need_gini - ai_gini),
+                'concentration_gap': float(ai_weighted['concentration'] - need_weighted['concentration']),
             }
         }
 
-    def generate_report(self) -> Dict:
+    def generate_report(self, layout: str = 'records') -> Dict:
         """
         Generate complete audit report.
 
+        Args:
+            layout: 'records' for the per-tract tables as lists of row dicts, or
+                'columnar' for Columns tables sharing one tract_id dictionary
+                (see utils.columnar; much smaller and faster to build)
+
         Returns:
             Dict with full audit results
         """
+        if layout not in ('records', 'columnar'):
+            raise ValueError(f"Unknown report layout: {layout!r}")
         if self.ai_recommendations is None:
             self.simulate_ai_recommendations()
         if self.need_based_recommendations is None:
@@ -290,7 +313,7 @@ class InfrastructureRecommendationAuditor:
 
         equity_metrics = self.calculate_equity_metrics()
 
-        return {
+        report = {
             'summary': {
                 'total_budget': self.total_budget,
                 'ai_projects': len(self.ai_recommendations),
@@ -298,12 +321,18 @@ class InfrastructureRecommendationAuditor:
                 'budget_allocated_ai': float(self.ai_recommendations['cost'].sum()),
                 'budget_allocated_need': float(self.need_based_recommendations['cost'].sum())
             },
-            'danger_scores': self.danger_scores.to_dict(orient='records'),
-            'ai_recommendations': self.ai_recommendations.to_dict(orient='records'),
-            'need_based_recommendations': self.need_based_recommendations.to_dict(orient='records'),
+            'danger_scores': self.danger_scores,
+            'ai_recommendations': self.ai_recommendations,
+            'need_based_recommendations': self.need_based_recommendations,
             'equity_metrics': equity_metrics,
             'findings': self._generate_findings(equity_metrics)
         }
+        if layout == 'columnar':
+            return columnar_report(report)
+
+        for key in ('danger_scores', 'ai_recommendations', 'need_based_recommendations'):
+            report[key] = report[key].to_dict(orient='records')
+        return report
 
     def _generate_findings(self, equity_metrics: Dict) -> List[str]:
         """Generate narrative findings from metrics."""
@@ -5,25 +5,38 @@ Analyzes bias in AI volume estimation tools (Strava Metro, StreetLight Data)
 by comparing predictions against ground truth counter data, stratified by demographics.
 """
 
+import numpy as np
 import pandas as pd
-import geopandas as gpd
 
+from config import DEFAULT_RANDOM_SEED, EQUITY_BOOTSTRAP_CONFIG, EQUITY_SIGNIFICANCE_CONFIG
 from utils.demographic_analysis import (
-    calculate_income_quintiles,
+    classify_income_quintiles,
+    income_quintile_breaks,
     calculate_minority_category,
     calculate_error_metrics,
-    equity_gap_analysis
+    grouped_error_metrics,
+    equity_gap_analysis,
+    MINORITY_CATEGORY_LABELS,
 )
+from utils.data_loading import PipelineContext
+from utils.tract_index import resolve_census
 
 class VolumeEstimationAuditor:
     """
     Audits AI volume estimation tools for demographic bias
     """
 
-    def __init__(self, census_gdf, ground_truth_df, ai_predictions_df):
-        self.census_gdf = census_gdf
+    def __init__(self, census_gdf, ground_truth_df, ai_predictions_df,
+                 n_bootstrap=EQUITY_BOOTSTRAP_CONFIG['n_bootstrap'], seed=DEFAULT_RANDOM_SEED):
+        # census_gdf may also be a TractIndex
+        self.census_gdf, self.tract_index = resolve_census(census_gdf, copy=False)
+        # Census-level breaks, shared with the other tests and the counter bias simulation
+        self.income_breaks = income_quintile_breaks(self.census_gdf['median_income'])
         self.ground_truth_df = ground_truth_df
         self.ai_predictions_df = ai_predictions_df
+        # Replicates for equity-gap confidence intervals (0 disables them)
+        self.n_bootstrap = n_bootstrap
+        self.seed = seed
 
         # Enrich data with demographics
         self._enrich_predictions()
@@ -53,7 +66,10 @@ class VolumeEstimationAuditor:
 
         # Calculate quintiles and categories (only if we have the data)
         if 'median_income' in self.ai_predictions_df.columns:
-            self.ai_predictions_df = calculate_income_quintiles(self.ai_predictions_df)
+            quintiles = classify_income_quintiles(self.ai_predictions_df['median_income'], self.income_breaks)
+            if not np.isnan(quintiles).any():
+                quintiles = quintiles.astype(int)
+            self.ai_predictions_df['income_quintile'] = quintiles
         if 'pct_minority' in self.ai_predictions_df.columns:
             self.ai_predictions_df = calculate_minority_category(self.ai_predictions_df)
 
@@ -67,6 +83,18 @@ class VolumeEstimationAuditor:
                 self.ai_predictions_df['error'] / self.ai_predictions_df['true_volume'] * 100
             )
 
+    def _gap_options(self):
+        """equity_gap_analysis keyword arguments for intervals and significance"""
+        return {
+            'n_bootstrap': self.n_bootstrap,
+            'confidence': EQUITY_BOOTSTRAP_CONFIG['confidence'],
+            'ci_method': EQUITY_BOOTSTRAP_CONFIG['method'],
+            'random_state': self.seed,
+            'n_jobs': EQUITY_BOOTSTRAP_CONFIG['n_jobs'],
+            'test': EQUITY_SIGNIFICANCE_CONFIG['test'],
+            'n_permutations': EQUITY_SIGNIFICANCE_CONFIG['n_permutations'],
+        }
+
     def analyze_overall_accuracy(self):
         """Calculate overall prediction accuracy metrics"""
 
@@ -85,38 +113,32 @@ class VolumeEstimationAuditor:
     def analyze_by_income(self):
         """Analyze prediction accuracy by income quintile"""
 
-        results = []
-
-        for quintile in [1, 2, 3, 4, 5]:
-            subset = self.ai_predictions_df[
-                self.ai_predictions_df['income_quintile'] == quintile
-            ]
-
-            if len(subset) == 0:
-                continue
-
-            metrics = calculate_error_metrics(
-                subset['true_volume'],
-                subset['predicted_volume']
-            )
-
-            median_income = subset['median_income'].median()
+        df = self.ai_predictions_df
+        metrics = grouped_error_metrics(
+            df['true_volume'],
+            df['predicted_volume'],
+            df['income_quintile']
+        )
+        median_income = df.groupby('income_quintile')['median_income'].median()
 
+        results = []
+        for quintile, row in metrics.iterrows():
             results.append({
-                'quintile': quintile,
-                'label': f'Q{quintile}',
-                'count': len(subset),
-                'median_income': float(median_income),
-                'mae': metrics['mae'],
-                'mape': metrics['mape'],
-                'bias': metrics['bias'],
-                'mean_error_pct': metrics['mean_pct_error'],
+                'quintile': int(quintile),
+                'label': f'Q{int(quintile)}',
+                'count': int(row['count']),
+                'median_income': float(median_income[quintile]),
+                'mae': float(row['mae']),
+                'mape': float(row['mape']),
+                'bias': float(row['bias']),
+                'mean_error_pct': float(row['mean_pct_error']),
             })
 
         gap = equity_gap_analysis(
             self.ai_predictions_df,
             'error_pct',
-            'income_quintile'
+            'income_quintile',
+            **self._gap_options()
         )
 
         return {
@@ -127,35 +149,34 @@ class VolumeEstimationAuditor:
     def analyze_by_race(self):
         """Analyze prediction accuracy by racial composition"""
 
-        results = []
-
-        for category in ['Low (<30%)', 'Medium (30-60%)', 'High (>60%)']:
-            subset = self.ai_predictions_df[
-                self.ai_predictions_df['minority_category'] == category
-            ]
+        df = self.ai_predictions_df
+        metrics = grouped_error_metrics(
+            df['true_volume'],
+            df['predicted_volume'],
+            df['minority_category']
+        )
+        mean_minority_pct = df.groupby('minority_category')['pct_minority'].mean()
 
-            if len(subset) == 0:
+        results = []
+        for category in MINORITY_CATEGORY_LABELS:
+            if category not in metrics.index:
                 continue
-
-            metrics = calculate_error_metrics(
-                subset['true_volume'],
-                subset['predicted_volume']
-            )
-
+            row = metrics.loc[category]
             results.append({
                 'category': category,
-                'count': len(subset),
-                'mean_minority_pct': float(subset['pct_minority'].mean()),
-                'mae': metrics['mae'],
-                'mape': metrics['mape'],
-                'bias': metrics['bias'],
-                'mean_error_pct': metrics['mean_pct_error'],
+                'count': int(row['count']),
+                'mean_minority_pct': float(mean_minority_pct[category]),
+                'mae': float(row['mae']),
+                'mape': float(row['mape']),
+                'bias': float(row['bias']),
+                'mean_error_pct': float(row['mean_pct_error']),
             })
 
         gap = equity_gap_analysis(
             self.ai_predictions_df,
             'error_pct',
-            'minority_category'
+            'minority_category',
+            **self._gap_options()
         )
 
         return {
@@ -163,6 +184,30 @@ class VolumeEstimationAuditor:
             'equity_gap': gap,
         }
 
+    def analyze_by_income_and_race(self):
+        """Analyze prediction accuracy for each income quintile x minority category cell"""
+
+        df = self.ai_predictions_df
+        metrics = grouped_error_metrics(
+            df['true_volume'],
+            df['predicted_volume'],
+            [df['income_quintile'], df['minority_category']]
+        )
+
+        results = []
+        for (quintile, category), row in metrics.iterrows():
+            results.append({
+                'quintile': int(quintile),
+                'category': category,
+                'count': int(row['count']),
+                'mae': float(row['mae']),
+                'mape': float(row['mape']),
+                'bias': float(row['bias']),
+                'mean_error_pct': float(row['mean_pct_error']),
+            })
+
+        return results
+
     def get_scatter_data(self):
         """Get data for predicted vs actual scatter plot"""
 
@@ -214,6 +259,7 @@ class VolumeEstimationAuditor:
             'overall_accuracy': self.analyze_overall_accuracy(),
             'by_income': self.analyze_by_income(),
             'by_race': self.analyze_by_race(),
+            'by_income_and_race': self.analyze_by_income_and_race(),
             'scatter_data': self.get_scatter_data(),
         }
 
@@ -240,7 +286,7 @@ class VolumeEstimationAuditor:
 def load_test1_data(raw_data_dir, simulated_data_dir):
     """Helper function to load all Test 1 data"""
 
-    census_gdf = gpd.read_file(raw_data_dir / 'durham_census_tracts.geojson')
+    census_gdf = PipelineContext.shared(raw_data_dir).census_gdf()
 
     ground_truth_df = pd.read_json(
         simulated_data_dir / 'ground_truth_counters.json'
@@ -0,0 +1,167 @@
+"""
+Run the data pipeline incrementally.
+
+Stages are sections of the notebooks in notebooks/, run as plain scripts
+(see utils/pipeline.py). Only out-of-date stages run, independent ones in
+parallel, so refreshing the crash data rebuilds the Test 2 artifacts and
+the manifest and leaves Tests 1, 3 and 4 alone.
+
+Usage (from backend/):
+    python run_pipeline.py                   # everything that is out of date
+    python run_pipeline.py fetch_crashes     # re-fetch crashes, rebuild what changed
+    python run_pipeline.py --dry-run
+    python run_pipeline.py --force -j 4
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+
+from config import BASE_DIR, DATA_FRESHNESS, RAW_DATA_DIR, SIMULATED_DATA_DIR, TRACT_GEOMETRY_LEVELS
+from utils.freshness import meta_path_for
+from utils.pipeline import NotebookTask, Pipeline, Stage
+from utils.tract_index import census_parquet_path
+
+REPO_ROOT = BASE_DIR.parent
+NOTEBOOKS_DIR = REPO_ROOT / 'notebooks'
+FRONTEND_DATA_DIR = REPO_ROOT / 'frontend' / 'public' / 'data'
+FRONTEND_TILES_DIR = REPO_ROOT / 'frontend' / 'public' / 'tiles'
+
+CENSUS = RAW_DATA_DIR / 'durham_census_tracts.geojson'
+CRASHES = RAW_DATA_DIR / 'ncdot_nonmotorist_durham.csv'
+OSM = RAW_DATA_DIR / 'osm_infrastructure.json'
+
+
+def _notebook(name: str, sections=None, exclude=()) -> NotebookTask:
+    return NotebookTask(NOTEBOOKS_DIR / f'{name}.ipynb', sections, exclude, repo_root=REPO_ROOT)
+
+
+def _frontend(*names: str):
+    return [FRONTEND_DATA_DIR / name for name in names]
+
+
+def _simulated(*names: str):
+    return [SIMULATED_DATA_DIR / name for name in names]
+
+
+STAGES = [
+    Stage(
+        'fetch_census', _notebook('01_fetch_data', sections=['1', '4', '5', '6']),
+        outputs=[
+            CENSUS, meta_path_for(CENSUS), census_parquet_path(CENSUS),
+            RAW_DATA_DIR / 'tdi_scores.json', RAW_DATA_DIR / 'bus_stops.json',
+            *_frontend('tracts-topo.json', 'equity-context.json',
+                       *[f'tracts-topo-{i}.json' for i in range(len(TRACT_GEOMETRY_LEVELS))]),
+        ],
+        config_keys=['CENSUS_VINTAGE', 'TIGER_VINTAGE', 'TIGER_TRACTS_LAYER', 'NCDOT_TDI_SERVICE',
+                     'GTFS_GODURHAM_URL', 'TOPOJSON_QUANTIZATION', 'TRACT_GEOMETRY_LEVELS',
+                     'FRONTEND_JSON_SIGNIFICANT_DIGITS'],
+        max_age_days=DATA_FRESHNESS['census'],
+    ),
+    Stage(
+        'fetch_crashes', _notebook('01_fetch_data', sections=['2']),
+        outputs=[CRASHES, meta_path_for(CRASHES)],
+        config_keys=['NCDOT_NONMOTORIST_SERVICE'],
+        max_age_days=DATA_FRESHNESS['ncdot_crashes'],
+    ),
+    Stage(
+        'fetch_osm', _notebook('01_fetch_data', sections=['3']),
+        inputs=[CENSUS],
+        outputs=[OSM, meta_path_for(OSM)],
+        config_keys=['DURHAM_BOUNDS', 'OVERPASS_API', 'OSM_EXTRACT_PATH', 'OSM_INFRASTRUCTURE_FEATURES'],
+        max_age_days=DATA_FRESHNESS['osm'],
+    ),
+    Stage(
+        'test1_volume', _notebook('02_test1_volume_estimation'),
+        inputs=[CENSUS],
+        outputs=[
+            *_simulated('ground_truth_counters.json', 'ai_volume_predictions.json',
+                        'tract_volume_predictions.json'),
+            *_frontend('volume-report.json', 'choropleth-data.json', 'accuracy-by-income.json',
+                       'accuracy-by-race.json', 'scatter-data.json'),
+        ],
+        config_keys=['BIAS_PARAMETERS', 'VOLUME_SIMULATION_CONFIG', 'CENSUS_VINTAGE',
+                     'DEFAULT_RANDOM_SEED', 'EQUITY_BOOTSTRAP_CONFIG', 'EQUITY_SIGNIFICANCE_CONFIG',
+                     'FRONTEND_JSON_SIGNIFICANT_DIGITS'],
+    ),
+    Stage(
+        'test2_crash', _notebook('03_test2_crash_prediction'),
+        inputs=[CENSUS, CRASHES],
+        outputs=[
+            *_simulated('crash_predictions.json', 'crash_time_series.json',
+                        'confusion_matrices.json', 'crash_geo_data.json'),
+            *_frontend('crash-report.json', 'crash-time-series.json',
+                       'confusion-matrices.json', 'crash-geo-data.json'),
+            FRONTEND_TILES_DIR,
+        ],
+        config_keys=['CRASH_ANALYSIS_YEARS', 'CRASH_TRAINING_YEARS', 'CRASH_TEST_YEARS',
+                     'CENSUS_VINTAGE', 'QUINTILE_LABELS', 'VECTOR_TILE_CONFIG',
+                     'FRONTEND_JSON_SIGNIFICANT_DIGITS'],
+    ),
+    Stage(
+        'test3_infrastructure', _notebook('04_test3_infrastructure'),
+        inputs=[CENSUS, OSM],
+        outputs=[
+            *_simulated('infrastructure_recommendations.json'),
+            *_frontend('infrastructure-report.json', 'danger-scores.json',
+                       'budget-allocation.json', 'recommendations.json'),
+        ],
+        config_keys=['INFRASTRUCTURE_PROJECT_TYPES', 'INFRASTRUCTURE_DEFAULT_BUDGET',
+                     'DANGER_SCORE_CONFIG', 'DEFAULT_RANDOM_SEED', 'QUINTILE_LABELS',
+                     'FRONTEND_JSON_SIGNIFICANT_DIGITS'],
+    ),
+    Stage(
+        'test4_demand', _notebook('05_test4_suppressed_demand', exclude=['9']),
+        inputs=[CENSUS, OSM],
+        outputs=[
+            *_simulated('demand_analysis.json', 'demand_funnel.json', 'correlation_matrix.json',
+                        'detection_scorecard.json', 'network_flow.json', 'demand_geo_data.json'),
+            *_frontend('demand-report.json', 'demand-funnel.json',
+                       'detection-scorecard.json', 'demand-geo-data.json'),
+        ],
+        config_keys=['SUPPRESSED_DEMAND_CONFIG', 'HIGH_SUPPRESSION_THRESHOLD',
+                     'HUMAN_EXPERT_DEMAND_BASELINE', 'DEFAULT_RANDOM_SEED', 'QUINTILE_LABELS',
+                     'CENSUS_VINTAGE', 'CRASH_ANALYSIS_YEARS', 'PLAUSIBILITY_RANGES',
+                     'FRONTEND_JSON_SIGNIFICANT_DIGITS'],
+    ),
+]
+
+# The manifest records when each source was fetched and a content hash of every
+# frontend file, so it follows the sidecars and the other stages' frontend outputs
+STAGES.append(Stage(
+    'frontend_export', _notebook('05_test4_suppressed_demand', sections=['9']),
+    inputs=[
+        meta_path_for(CENSUS), meta_path_for(CRASHES), meta_path_for(OSM),
+        *[path for stage in STAGES for path in stage.outputs if path.parent == FRONTEND_DATA_DIR],
+    ],
+    outputs=_frontend('data-manifest.json', 'metadata.json'),
+    config_keys=['CENSUS_VINTAGE', 'CRASH_ANALYSIS_YEARS', 'PLAUSIBILITY_RANGES',
+                 'FRONTEND_JSON_SIGNIFICANT_DIGITS'],
+))
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('stages', nargs='*', metavar='STAGE',
+                        help='Stages to run regardless of state (plus what depends on them); '
+                             f"one of: {', '.join(s.name for s in STAGES)}")
+    parser.add_argument('--force', action='store_true', help='Run every selected stage')
+    parser.add_argument('-j', '--jobs', type=int, default=None, help='Stages run at once')
+    parser.add_argument('--dry-run', action='store_true', help='Show what would run and why')
+    args = parser.parse_args(argv)
+
+    pipeline = Pipeline(STAGES)
+    if args.dry_run:
+        for name, reason in pipeline.plan(args.stages, args.force).items():
+            print(f"{name:22s} {reason}")
+        return 0
+
+    status = pipeline.run(args.stages, force=args.force, jobs=args.jobs)
+    counts = {s: sum(v == s for v in status.values()) for s in ('ran', 'skipped', 'failed', 'blocked')}
+    print(', '.join(f"{n} {s}" for s, n in counts.items() if n))
+    return 1 if counts['failed'] or counts['blocked'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,154 @@
+"""
+Local stand-in for an ArcGIS FeatureServer layer, for offline fetch tests.
+
+Serves /query over HTTP from an in-memory list of attribute dicts. Supports
+the parts of the REST API the fetchers use: simple AND-ed where clauses,
+outFields, orderByFields, resultOffset/resultRecordCount paging,
+returnCountOnly and f=json/geojson, plus the layer info document that
+carries maxRecordCount. Responses can be delayed and the first requests
+failed, to exercise concurrency and retries.
+"""
+
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+CLAUSE = re.compile(r"^\s*(\w+)\s*(>=|<=|=|>|<)\s*('(?:[^']*)'|-?[\d.]+)\s*$")
+OPERATORS = {
+    '=': lambda a, b: a == b,
+    '>': lambda a, b: a > b,
+    '<': lambda a, b: a < b,
+    '>=': lambda a, b: a >= b,
+    '<=': lambda a, b: a <= b,
+}
+
+
+def _matcher(where):
+    """Predicate for a where clause of `field op literal` terms joined by AND."""
+    tests = []
+    for clause in re.split(r'\s+AND\s+', where or '1=1', flags=re.IGNORECASE):
+        if clause.strip() == '1=1':
+            continue
+        match = CLAUSE.match(clause)
+        if not match:
+            raise ValueError(f"Unsupported where clause: {clause!r}")
+        field, op, literal = match.groups()
+        value = literal[1:-1] if literal.startswith("'") else float(literal)
+        tests.append((field, OPERATORS[op], value))
+    return lambda record: all(
+        record.get(field) is not None and op(record[field], value) for field, op, value in tests
+    )
+
+
+class StubFeatureServer:
+    """
+    Threaded HTTP server answering FeatureServer/0/query.
+
+    Use as a context manager; `url` is the layer URL to pass to fetchers and
+    `queries` records the parsed parameters of every answered query. Each response
+    waits `delay` seconds, and the first `fail_first` queries get a 503.
+    `peak_concurrency` is the most queries that were in flight at once.
+    """
+
+    def __init__(self, records, max_record_count=2000, delay=0.0, fail_first=0):
+        self.records = list(records)
+        self.max_record_count = max_record_count
+        self.delay = delay
+        self.fail_first = fail_first
+        self.queries = []
+        self.peak_concurrency = 0
+        self._in_flight = 0
+        self._lock = threading.Lock()
+
+    def _query(self, params):
+        with self._lock:
+            self.queries.append(params)
+
+        matches = [r for r in self.records if _matcher(params.get('where'))(r)]
+        if params.get('returnCountOnly') == 'true':
+            return {'count': len(matches)}
+
+        order = params.get('orderByFields')
+        if order:
+            field, *direction = order.split()
+            matches.sort(key=lambda r: r[field], reverse=direction == ['DESC'])
+
+        offset = int(params.get('resultOffset', 0))
+        limit = min(int(params.get('resultRecordCount', self.max_record_count)), self.max_record_count)
+        page = matches[offset:offset + limit]
+
+        fields = params.get('outFields', '*')
+        if fields != '*':
+            names = fields.split(',')
+            page = [{name: r.get(name) for name in names} for r in page]
+        exceeded = offset + limit < len(matches)
+        if params.get('f') == 'geojson':
+            return {
+                'type': 'FeatureCollection',
+                'features': [{'type': 'Feature', 'properties': r, 'geometry': None} for r in page],
+                'properties': {'exceededTransferLimit': exceeded},
+            }
+        return {
+            'features': [{'attributes': r} for r in page],
+            'exceededTransferLimit': exceeded,
+        }
+
+    def _respond(self, path, params):
+        """Status and JSON body for a request, honouring delay and fail_first."""
+        if path.endswith('/FeatureServer/0'):
+            return 200, {'maxRecordCount': self.max_record_count}
+        if not path.endswith('/query'):
+            return 404, {'error': {'code': 404, 'message': 'Not found'}}
+
+        with self._lock:
+            self._in_flight += 1
+            self.peak_concurrency = max(self.peak_concurrency, self._in_flight)
+            failing = self.fail_first > 0
+            self.fail_first -= failing
+        try:
+            time.sleep(self.delay)
+            if failing:
+                return 503, {'error': {'code': 503, 'message': 'Service unavailable'}}
+            try:
+                return 200, self._query(params)
+            except ValueError as exc:
+                # ArcGIS reports bad queries in the body of a 200 response
+                return 200, {'error': {'code': 400, 'message': str(exc)}}
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+
+    def __enter__(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                parsed = urlparse(self.path)
+                params = {k: v[0] for k, v in parse_qs(parsed.query).items()}
+                status, payload = stub._respond(parsed.path, params)
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True)
+        self.thread.start()
+        host, port = self.server.server_address
+        self.url = f'http://{host}:{port}/arcgis/rest/services/Stub/FeatureServer/0'
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
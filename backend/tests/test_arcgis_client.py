@@ -0,0 +1,81 @@
+"""
+Tests for the concurrent ArcGIS query client, against a local stub FeatureServer.
+"""
+
+import time
+
+import pytest
+import requests
+from tests.feature_server_stub import StubFeatureServer
+from utils.arcgis_client import ArcGISQueryError, FeatureServerClient
+
+
+def _records(n):
+    # Stored out of order so that only orderByFields gives the expected sequence
+    return [{'OBJECTID': i, 'County': 'DURHAM' if i % 4 else 'WAKE'} for i in reversed(range(1, n + 1))]
+
+
+def test_query_reassembles_pages_in_order():
+    """Concurrent pages come back in orderByFields order, one count query first."""
+    with StubFeatureServer(_records(50), max_record_count=7) as server:
+        client = FeatureServerClient(server.url, max_workers=4)
+        features = client.query("County='DURHAM'", out_fields=['OBJECTID'], order_by='OBJECTID')
+
+    assert [f['attributes']['OBJECTID'] for f in features] == [i for i in range(1, 51) if i % 4]
+    assert server.queries[0]['returnCountOnly'] == 'true'
+    assert sorted(int(q['resultOffset']) for q in server.queries[1:]) == list(range(0, 38, 7))
+
+
+def test_pages_are_fetched_concurrently():
+    """Wall-clock time is about one round trip per concurrency slot."""
+    delay = 0.2
+    with StubFeatureServer(_records(80), max_record_count=10, delay=delay) as server:
+        client = FeatureServerClient(server.url, max_workers=8)
+        start = time.perf_counter()
+        features = client.query(order_by='OBJECTID')
+        elapsed = time.perf_counter() - start
+
+    assert len(features) == 80
+    assert server.peak_concurrency > 1
+    # Layer info + count + 8 pages sequentially would take 10 round trips
+    assert elapsed < 6 * delay
+
+
+def test_empty_result_skips_page_requests():
+    with StubFeatureServer(_records(5)) as server:
+        assert FeatureServerClient(server.url).query("County='ORANGE'") == []
+    assert len(server.queries) == 1
+
+
+def test_transient_failures_are_retried():
+    with StubFeatureServer(_records(20), max_record_count=5, fail_first=3) as server:
+        client = FeatureServerClient(server.url, retries=3, backoff=0)
+        features = client.query(order_by='OBJECTID')
+    assert len(features) == 20
+
+
+def test_retries_are_bounded():
+    with StubFeatureServer(_records(5), fail_first=10) as server:
+        client = FeatureServerClient(server.url, retries=1, backoff=0)
+        with pytest.raises(requests.HTTPError):
+            client.count()
+
+
+def test_error_payload_raises():
+    with StubFeatureServer(_records(5)) as server:
+        client = FeatureServerClient(server.url, backoff=0)
+        with pytest.raises(ArcGISQueryError, match='Unsupported where clause'):
+            client.query("County LIKE 'D%'")
+    assert len(server.queries) == 1
+
+
+def test_multi_page_query_requires_order():
+    with StubFeatureServer(_records(10), max_record_count=4) as server:
+        with pytest.raises(ValueError, match='order_by'):
+            FeatureServerClient(server.url).query()
+
+
+def test_geojson_features():
+    with StubFeatureServer(_records(9), max_record_count=4) as server:
+        features = FeatureServerClient(server.url).query(order_by='OBJECTID', f='geojson')
+    assert [f['properties']['OBJECTID'] for f in features] == list(range(1, 10))
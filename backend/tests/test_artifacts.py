@@ -0,0 +1,108 @@
+"""
+Tests for change-aware artifact writes.
+"""
+
+import gzip
+import json
+import math
+import os
+
+from utils import artifacts
+from utils.artifacts import (
+    ArtifactWriter,
+    brotli,
+    compressed_siblings,
+    content_hash,
+    content_hashes,
+    dump_json,
+    round_floats,
+    write_if_changed,
+)
+
+
+def test_unchanged_content_is_not_rewritten(tmp_path):
+    path = tmp_path / 'report.json'
+    assert write_if_changed(path, b'{"a": 1}')
+    os.utime(path, (0, 0))
+
+    assert not write_if_changed(path, b'{"a": 1}')
+    assert path.stat().st_mtime == 0
+
+    assert write_if_changed(path, b'{"a": 2}')
+    assert path.read_bytes() == b'{"a": 2}'
+    assert [p.name for p in tmp_path.iterdir()] == ['report.json']
+
+
+def test_dump_json_matches_json_dump():
+    data = {'b': [1.5, None], 'a': 'x'}
+    assert dump_json(data) == json.dumps(data, indent=2).encode()
+    assert dump_json(data, indent=None) == b'{"b":[1.5,null],"a":"x"}'
+
+
+def test_writer_lists_changed_paths_relative_to_repo(tmp_path):
+    data_dir = tmp_path / 'frontend' / 'public' / 'data'
+    writer = ArtifactWriter(tmp_path)
+    writer.write_json(data_dir / 'a.json', {'x': 1})
+    writer.write_json(data_dir / 'b.json', {'y': 2}, indent=None)
+
+    rerun = ArtifactWriter(tmp_path)
+    rerun.write_json(data_dir / 'a.json', {'x': 1})
+    rerun.write_json(data_dir / 'b.json', {'y': 3}, indent=None)
+    rerun.copy(data_dir / 'a.json', data_dir / 'c.json')
+    rerun.write_json(data_dir / 'b.json', {'y': 3}, indent=None)
+
+    assert rerun.changed_paths() == ['frontend/public/data/b.json', 'frontend/public/data/c.json']
+    assert (data_dir / 'c.json').read_bytes() == (data_dir / 'a.json').read_bytes()
+    assert rerun.summary() == '2 changed, 2 unchanged'
+
+
+def test_round_floats_keeps_significant_digits():
+    data = {'lon': -78.91234567, 'p': 1.23456789e-08, 'n': 12, 'flag': True,
+            'nested': [(0.1 + 0.2, float('nan'))]}
+    rounded = round_floats(data, 7)
+
+    assert rounded['lon'] == -78.91235
+    assert rounded['p'] == 1.234568e-08
+    assert rounded['n'] == 12 and rounded['flag'] is True
+    assert rounded['nested'][0][0] == 0.3
+    assert math.isnan(rounded['nested'][0][1])
+
+
+def test_frontend_json_is_minified_with_compressed_siblings(tmp_path):
+    path = tmp_path / 'report.json'
+    writer = ArtifactWriter(tmp_path)
+    digest = writer.write_frontend_json(path, {'gap': 12.345678912, 'ids': ['001']})
+
+    payload = path.read_bytes()
+    assert payload == b'{"gap":12.34568,"ids":["001"]}'
+    assert digest == content_hash(payload)
+    siblings = compressed_siblings(path)
+    assert gzip.decompress(siblings['gzip'].read_bytes()) == payload
+    if brotli is not None:
+        assert brotli.decompress(siblings['br'].read_bytes()) == payload
+
+    rerun = ArtifactWriter(tmp_path)
+    assert rerun.write_frontend_json(path, {'gap': 12.345678912, 'ids': ['001']}) == digest
+    assert rerun.changed_paths() == []
+
+
+def test_stale_brotli_sibling_removal_is_published(tmp_path, monkeypatch):
+    path = tmp_path / 'data' / 'report.json'
+    compressed_siblings(path)['br'].parent.mkdir()
+    compressed_siblings(path)['br'].write_bytes(b'old')
+    monkeypatch.setattr(artifacts, 'brotli', None)
+
+    writer = ArtifactWriter(tmp_path)
+    writer.write_frontend_json(path, {'gap': 1.5})
+
+    assert not compressed_siblings(path)['br'].exists()
+    assert writer.changed_paths() == ['data/report.json', 'data/report.json.gz', 'data/report.json.br']
+    assert writer.summary() == '2 changed, 0 unchanged, 1 removed'
+
+
+def test_content_hashes_cover_each_file(tmp_path):
+    (tmp_path / 'a.json').write_bytes(b'[1]')
+    (tmp_path / 'a.json.gz').write_bytes(b'')
+    (tmp_path / 'data-manifest.json').write_bytes(b'{}')
+
+    assert content_hashes(tmp_path, exclude=['data-manifest.json']) == {'a.json': content_hash(b'[1]')}
@@ -0,0 +1,47 @@
+"""
+Tests for columnar report encoding.
+"""
+
+import pandas as pd
+import pytest
+
+from utils.columnar import columnar_report, columns_table, decode_report
+
+
+def test_record_lists_share_one_tract_dictionary():
+    report = {
+        'summary': {'projects': 3},
+        'ai': [{'tract_id': '002', 'cost': 10}, {'tract_id': '001', 'cost': 20}],
+        'need': {'rows': [{'tract_id': '001', 'cost': 5.5}, {'tract_id': None, 'cost': None}]},
+        'findings': ['a', 'b'],
+        'empty': [],
+    }
+    encoded = columnar_report(report)
+
+    assert encoded['tract_ids'] == ['002', '001']
+    assert encoded['ai'] == {
+        'type': 'Columns', 'length': 2,
+        'columns': {'tract_id': [0, 1], 'cost': [10, 20]}, 'encoded': ['tract_id'],
+    }
+    assert encoded['need']['rows']['columns']['tract_id'] == [1, None]
+    assert encoded['findings'] == ['a', 'b'] and encoded['empty'] == []
+    assert decode_report(encoded) == report
+
+
+def test_dataframes_keep_ints_and_nulls():
+    df = pd.DataFrame({'tract_id': ['001', '002'], 'n': [1, 2], 'x': [0.5, float('nan')]})
+    table = columns_table(df)
+
+    assert table['columns'] == {'tract_id': ['001', '002'], 'n': [1, 2], 'x': [0.5, None]}
+    assert decode_report(columnar_report({'t': df}))['t'] == [
+        {'tract_id': '001', 'n': 1, 'x': 0.5}, {'tract_id': '002', 'n': 2, 'x': None},
+    ]
+
+
+def test_heterogeneous_lists_are_left_alone():
+    rows = [{'a': 1}, {'b': 2}]
+    assert columnar_report({'rows': rows}) == {'rows': rows}
+    with pytest.raises(ValueError):
+        columns_table(rows)
+    with pytest.raises(ValueError, match='tract_ids'):
+        columnar_report({'tract_ids': []})
@@ -40,6 +40,25 @@ def test_load_real_crash_data(sample_census_gdf, tmp_path):
     assert crash_by_tract['crash_count'].min() >= 0
 
 
+def test_geocode_crashes(sample_census_gdf, tmp_path):
+    """Crash-level records keep their own columns and gain a tract_id."""
+    auditor = CrashPredictionAuditor(sample_census_gdf)
+
+    crash_csv = tmp_path / "crashes.csv"
+    crash_csv.write_text(
+        "CrashID,CrashDate,CrashYear,Latitude,Longitude\n"
+        "1,2023-03-15,2023,0.5,0.5\n"
+        "2,2023-06-20,2023,0.5,3.5\n"
+        "3,2022-01-10,2022,9.0,9.0\n"
+    )
+
+    crashes = auditor.geocode_crashes(crash_csv)
+
+    assert list(crashes['CrashID']) == [1, 2]
+    assert list(crashes['tract_id']) == ['001', '004']
+    assert {'latitude', 'longitude', 'year'} <= set(crashes.columns)
+
+
 def test_train_ai_on_real_data(sample_census_gdf, tmp_path):
     """Test AI model training on real crash data and prediction evaluation."""
     auditor = CrashPredictionAuditor(sample_census_gdf)
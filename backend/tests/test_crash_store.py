@@ -0,0 +1,85 @@
+"""
+Tests for the columnar crash store.
+"""
+
+import pytest
+import pandas as pd
+from models.crash_predictor import CrashPredictionAuditor
+from utils.crash_store import ensure_crash_store, ingest_crash_csv, read_crash_csv, read_crash_store
+
+CRASH_CSV = (
+    "CrashID,CrashDate,CrashYear,CrashHour,Latitude,Longitude,CrashSevr,NM_Race\n"
+    "1,2018-05-01,2018,7,0.5,0.5,C: Possible Injury,White\n"
+    "2,2023-03-15,2023,12,0.5,0.5,B: Suspected Minor Injury,Black\n"
+    "3,2023-06-20,2023,18,1.5,0.5,C: Possible Injury,Unknown\n"
+    "4,2024-01-10,2024,,0.5,3.5,K: Killed,Black\n"
+)
+
+
+@pytest.fixture
+def crash_csv(tmp_path):
+    path = tmp_path / "crashes.csv"
+    path.write_text(CRASH_CSV)
+    return path
+
+
+def test_ingest_types_and_partitions(crash_csv, tmp_path):
+    """The store is typed and has one partition per CrashYear."""
+    store = tmp_path / "store"
+    manifest = ingest_crash_csv(crash_csv, store)
+
+    assert manifest['record_count'] == 4
+    assert manifest['years'] == [2018, 2023, 2024]
+    assert sorted(p.name for p in (store / 'data').iterdir()) == [
+        'CrashYear=2018', 'CrashYear=2023', 'CrashYear=2024',
+    ]
+
+    df = read_crash_store(store)
+    assert list(df.columns) == manifest['columns']
+    assert df['CrashYear'].dtype == 'int16'
+    assert df['CrashSevr'].dtype == 'category'
+    assert pd.api.types.is_datetime64_any_dtype(df['CrashDate'])
+    assert df['CrashHour'].isna().sum() == 1
+
+
+def test_read_store_pushdown(crash_csv, tmp_path):
+    """Only requested columns and years are returned; unknown columns are skipped."""
+    store = tmp_path / "store"
+    ingest_crash_csv(crash_csv, store)
+
+    df = read_crash_store(store, columns=['CrashID', 'NM_Race', 'NotAField'], years=[2023])
+
+    assert list(df.columns) == ['CrashID', 'NM_Race']
+    assert sorted(df['CrashID']) == [2, 3]
+
+
+def test_ensure_crash_store_rebuilds_on_change(crash_csv, tmp_path):
+    """The store is reused until the CSV content changes."""
+    store = tmp_path / "store"
+    ensure_crash_store(crash_csv, store)
+    manifest_mtime = (store / 'manifest.json').stat().st_mtime_ns
+
+    ensure_crash_store(crash_csv, store)
+    assert (store / 'manifest.json').stat().st_mtime_ns == manifest_mtime
+
+    crash_csv.write_text(CRASH_CSV + "5,2024-02-02,2024,9,0.5,0.5,C: Possible Injury,White\n")
+    ensure_crash_store(crash_csv, store)
+    assert len(read_crash_store(store)) == 5
+
+
+def test_read_store_missing(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        read_crash_store(tmp_path / "nothing")
+
+
+def test_geocode_from_store_matches_csv(sample_census_gdf, crash_csv, tmp_path):
+    """Geocoding from the store gives the same crashes as from the CSV."""
+    store = ensure_crash_store(crash_csv, tmp_path / "store")
+    auditor = CrashPredictionAuditor(sample_census_gdf)
+
+    from_csv = auditor.geocode_crashes(crash_csv, extra_columns=['CrashSevr'])
+    from_store = auditor.geocode_crashes(store, extra_columns=['CrashSevr'])
+
+    assert list(from_store.columns) == list(from_csv.columns)
+    assert sorted(from_store['CrashID']) == sorted(from_csv['CrashID']) == [2, 4]
+    assert read_crash_csv(crash_csv, columns=['CrashID'])['CrashID'].tolist() == [1, 2, 3, 4]
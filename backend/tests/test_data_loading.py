@@ -0,0 +1,100 @@
+"""
+Tests for the shared pipeline context.
+"""
+
+import json
+
+import pytest
+from models.crash_predictor import CrashPredictionAuditor
+from models.demand_analyzer import SuppressedDemandAnalyzer
+from models.infrastructure_auditor import InfrastructureRecommendationAuditor
+from utils.data_loading import PipelineContext
+
+CRASH_CSV = (
+    "CrashID,CrashDate,CrashYear,Latitude,Longitude,NM_Race\n"
+    "1,2018-05-01,2018,0.5,0.5,White\n"
+    "2,2023-03-15,2023,0.5,1.5,Black\n"
+    "3,2023-06-20,2023,0.5,2.5,Unknown\n"
+    "4,2024-01-10,2024,0.5,3.5,Black\n"
+)
+
+
+def _write_table(path, rows):
+    path.write_text(json.dumps({'_provenance': {}, 'tracts': rows}))
+
+
+@pytest.fixture
+def raw_dir(tmp_path, sample_census_gdf, sample_infrastructure_df):
+    raw = tmp_path / 'raw'
+    raw.mkdir()
+    sample_census_gdf.to_file(raw / 'durham_census_tracts.geojson', driver='GeoJSON')
+    (raw / 'ncdot_nonmotorist_durham.csv').write_text(CRASH_CSV)
+    _write_table(raw / 'osm_infrastructure.json', sample_infrastructure_df.to_dict(orient='records'))
+    tract_ids = list(sample_census_gdf['tract_id'])
+    _write_table(raw / 'tdi_scores.json', [{'tract_id': t, 'tdi_score_county': 10.0 + i}
+                                           for i, t in enumerate(tract_ids)])
+    _write_table(raw / 'bus_stops.json', [{'tract_id': t, 'stop_count': i}
+                                          for i, t in enumerate(tract_ids)])
+    return raw
+
+
+@pytest.fixture
+def context(raw_dir, tmp_path):
+    return PipelineContext(raw_dir, crash_store_dir=tmp_path / 'crash_store',
+                           tract_index_cache_dir=tmp_path / 'tract_index')
+
+
+def test_each_input_is_read_once_across_auditors(context):
+    """Tests 2-4 share one parse of every raw file."""
+    crash_auditor = CrashPredictionAuditor(context.tract_index)
+    crash_auditor.geocode_crashes(context.crashes())
+    context.crashes(columns=['CrashYear', 'NM_Race'], years=[2023])
+    InfrastructureRecommendationAuditor(context.tract_index, context.infrastructure())
+    SuppressedDemandAnalyzer(context.tract_index, context.infrastructure())
+    context.census_gdf()
+    context.tdi()
+    context.tdi()
+    context.bus_stops()
+
+    assert context.load_counts == {
+        'census': 1, 'crashes': 1, 'infrastructure': 1, 'tdi': 1, 'bus_stops': 1,
+    }
+
+
+def test_views_do_not_leak_changes(context):
+    census = context.census_gdf()
+    census['median_income'] = 0
+    infra = context.infrastructure()
+    infra['osm_infrastructure_score'] = -1.0
+    infra['extra'] = 1
+
+    assert context.census_gdf()['median_income'].min() > 0
+    assert context.infrastructure()['osm_infrastructure_score'].min() > 0
+    assert 'extra' not in context.infrastructure().columns
+
+
+def test_crashes_are_narrowed_per_caller(context):
+    df = context.crashes(columns=['CrashID', 'NotAField'], years=[2023])
+
+    assert list(df.columns) == ['CrashID']
+    assert df['CrashID'].tolist() == [2, 3]
+    assert len(context.crashes()) == 4
+
+
+def test_invalid_inputs_are_rejected(context, raw_dir):
+    _write_table(raw_dir / 'tdi_scores.json', [{'tract_id': '001'}])
+    with pytest.raises(ValueError, match='tdi_score_county'):
+        context.tdi()
+
+    _write_table(raw_dir / 'bus_stops.json', [{'tract_id': '001', 'stop_count': 1}] * 2)
+    with pytest.raises(ValueError, match='duplicate tract_id'):
+        context.bus_stops()
+
+    (raw_dir / 'osm_infrastructure.json').unlink()
+    with pytest.raises(FileNotFoundError, match='01_fetch_data'):
+        context.infrastructure()
+
+
+def test_shared_context_is_per_directory(raw_dir, tmp_path):
+    assert PipelineContext.shared(raw_dir) is PipelineContext.shared(raw_dir)
+    assert PipelineContext.shared(raw_dir) is not PipelineContext.shared(tmp_path)
@@ -5,10 +5,15 @@ Tests for demographic analysis utilities.
 import pytest
 import pandas as pd
 import numpy as np
+from config import QUINTILE_LABELS
 from utils.demographic_analysis import (
     calculate_income_quintiles,
     calculate_minority_category,
+    classify_income_quintiles,
+    classify_minority_category,
+    income_quintile_breaks,
     calculate_error_metrics,
+    grouped_error_metrics,
     equity_gap_analysis,
     disparate_impact_ratio,
     calculate_gini_coefficient,
@@ -52,6 +57,43 @@ def test_calculate_minority_category():
     assert result.loc[2, 'minority_category'] == 'High (>60%)'
 
 
+def test_calculate_quintiles_does_not_mutate():
+    """Classifiers return new frames and leave the input untouched."""
+    df = pd.DataFrame({'median_income': [20000, 40000, 60000], 'pct_minority': [10, 35, 75]})
+    calculate_income_quintiles(df)
+    calculate_minority_category(df)
+
+    assert list(df.columns) == ['median_income', 'pct_minority']
+
+
+def test_classify_income_quintiles_matches_qcut():
+    """Labelled quintiles match pd.qcut, including ties and NaNs."""
+    rng = np.random.default_rng(0)
+    income = rng.integers(0, 8, size=40).astype(float) * 10000
+    income[[3, 17]] = np.nan
+
+    expected = pd.qcut(income, 5, labels=QUINTILE_LABELS)
+    result = classify_income_quintiles(income, labels=QUINTILE_LABELS)
+
+    assert list(result.categories) == QUINTILE_LABELS
+    assert pd.Series(result).equals(pd.Series(expected))
+
+
+def test_classify_income_quintiles_with_shared_breaks():
+    """Precomputed breaks are reused as-is; values on a break fall in the lower quintile."""
+    breaks = income_quintile_breaks([10, 20, 30, 40, 50, 60])
+    result = classify_income_quintiles([breaks[0], breaks[0] + 1, 1000, np.nan], breaks)
+
+    np.testing.assert_array_equal(result, [1, 2, 5, np.nan])
+
+
+def test_classify_minority_category_boundaries():
+    """Category edges: 30 is Medium, 60 is High, NaN stays missing."""
+    result = classify_minority_category([29.9, 30, 59.9, 60, np.nan])
+
+    assert list(result) == ['Low (<30%)', 'Medium (30-60%)', 'Medium (30-60%)', 'High (>60%)', None]
+
+
 def test_calculate_error_metrics():
     """Test error metrics calculation."""
     df = pd.DataFrame({
@@ -86,6 +128,40 @@ def test_calculate_error_metrics_perfect_prediction():
     assert metrics['r_squared'] == 1.0
 
 
+def test_grouped_error_metrics_matches_per_group():
+    """Grouped kernel agrees with calculate_error_metrics on each subset."""
+    rng = np.random.default_rng(0)
+    true = rng.uniform(50, 500, 200)
+    pred = true * rng.uniform(0.6, 1.4, 200)
+    groups = rng.choice(['a', 'b', 'c'], 200)
+
+    result = grouped_error_metrics(true, pred, groups)
+
+    assert list(result.index) == ['a', 'b', 'c']
+    for group in result.index:
+        mask = groups == group
+        expected = calculate_error_metrics(true[mask], pred[mask])
+        assert result.loc[group, 'count'] == mask.sum()
+        for key, value in expected.items():
+            assert result.loc[group, key] == pytest.approx(value)
+
+
+def test_grouped_error_metrics_intersection_and_missing():
+    """Intersections get a MultiIndex; rows with a missing group are dropped."""
+    true = [100, 200, 100, 200, 300, 400]
+    pred = [100, 200, 110, 180, 300, 999]
+    quintile = [1, 1, 2, 2, 2, np.nan]
+    category = ['Low', 'Low', 'Low', 'High', 'High', 'High']
+
+    result = grouped_error_metrics(true, pred, [quintile, category])
+
+    assert list(result.index) == [(1.0, 'Low'), (2.0, 'High'), (2.0, 'Low')]
+    assert list(result['count']) == [2, 2, 1]
+    assert result.loc[(1.0, 'Low'), 'r_squared'] == 1.0
+    assert result.loc[(2.0, 'Low'), 'r_squared'] == 0.0
+    assert result.loc[(2.0, 'High'), 'mae'] == pytest.approx(10.0)
+
+
 def test_equity_gap_analysis(sample_census_gdf):
     """Test equity gap analysis."""
     df = sample_census_gdf.copy()
@@ -0,0 +1,102 @@
+"""
+Tests for the CrashID -> tract geocoding cache.
+"""
+
+import numpy as np
+from models.crash_predictor import CrashPredictionAuditor
+from utils.geocode_cache import CrashGeocodeCache
+from utils.tract_index import TractIndex, geometry_sha256
+
+
+class CountingGeocoder:
+    """Records how many points each call geocodes."""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, lons, lats):
+        self.calls.append(len(lons))
+        return np.array([f'T{int(lon)}' if lon >= 0 else None for lon in lons], dtype=object)
+
+
+def test_lookup_geocodes_only_new_crash_ids(tmp_path):
+    """A second lookup only geocodes CrashIDs the cache has not seen."""
+    geocode = CountingGeocoder()
+    cache = CrashGeocodeCache('a' * 64, tmp_path)
+
+    first = cache.lookup([1, 2, 3], [1.0, 2.0, -1.0], [0.0, 0.0, 0.0], geocode)
+    assert list(first) == ['T1', 'T2', None]
+    assert (cache.hits, cache.misses) == (0, 3)
+
+    second = CrashGeocodeCache('a' * 64, tmp_path).lookup(
+        [3, 2, 1, 4], [-1.0, 2.0, 1.0, 4.0], [0.0, 0.0, 0.0, 0.0], geocode,
+    )
+    assert list(second) == [None, 'T2', 'T1', 'T4']
+    assert geocode.calls == [3, 1]
+
+
+def test_lookup_regeocodes_moved_crashes(tmp_path):
+    """Revised coordinates for a known CrashID are geocoded again."""
+    geocode = CountingGeocoder()
+    cache = CrashGeocodeCache('a' * 64, tmp_path)
+    cache.lookup([1, 2], [1.0, 2.0], [0.0, 0.0], geocode)
+
+    result = cache.lookup([1, 2], [1.0, 5.0], [0.0, 0.0], geocode)
+
+    assert list(result) == ['T1', 'T5']
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert list(cache.lookup([2], [5.0], [0.0], geocode)) == ['T5']
+
+
+def test_unlocatable_crashes_are_cache_hits(tmp_path):
+    """Crashes without coordinates or a tract are not geocoded or written again."""
+    geocode = CountingGeocoder()
+    args = ([1, 2, 3], [1.0, np.nan, -1.0], [0.0, np.nan, 0.0])
+    CrashGeocodeCache('a' * 64, tmp_path).lookup(*args, geocode)
+    path = next(tmp_path.glob('*.parquet'))
+    written = path.stat().st_mtime_ns
+
+    cache = CrashGeocodeCache('a' * 64, tmp_path)
+    assert list(cache.lookup(*args, geocode)) == ['T1', None, None]
+
+    assert (cache.hits, cache.misses) == (3, 0)
+    assert geocode.calls == [3]
+    assert path.stat().st_mtime_ns == written
+
+
+def test_new_geometry_hash_invalidates_cache(tmp_path):
+    """Changed tract geometries start a fresh cache and remove the old file."""
+    geocode = CountingGeocoder()
+    CrashGeocodeCache('a' * 64, tmp_path).lookup([1], [1.0], [0.0], geocode)
+    CrashGeocodeCache('b' * 64, tmp_path).lookup([1], [1.0], [0.0], geocode)
+
+    assert geocode.calls == [1, 1]
+    assert [p.name for p in tmp_path.glob('*.parquet')] == [f"crash_tracts-{'b' * 16}.parquet"]
+
+
+def test_geometry_hash_ignores_attributes(sample_census_gdf):
+    """Only tract ids and geometries feed the geometry hash."""
+    index = TractIndex.from_gdf(sample_census_gdf)
+    changed = sample_census_gdf.assign(median_income=sample_census_gdf['median_income'] + 1)
+
+    assert index.geometry_hash == TractIndex.from_gdf(changed).geometry_hash
+    moved = sample_census_gdf.geometry.translate(0.1, 0)
+    assert index.geometry_hash != geometry_sha256(sample_census_gdf['tract_id'], moved.values)
+
+
+def test_auditor_reuses_geocode_cache(sample_census_gdf, tmp_path):
+    """Repeated geocoding with a cache directory gives the same tracts."""
+    crash_csv = tmp_path / "crashes.csv"
+    crash_csv.write_text(
+        "CrashID,CrashDate,CrashYear,Latitude,Longitude\n"
+        "1,2023-03-15,2023,0.5,0.5\n"
+        "2,2023-06-20,2023,0.5,3.5\n"
+        "3,2022-01-10,2022,9.0,9.0\n"
+    )
+    cache_dir = tmp_path / "geocode"
+
+    first = CrashPredictionAuditor(sample_census_gdf, geocode_cache_dir=cache_dir).geocode_crashes(crash_csv)
+    second = CrashPredictionAuditor(sample_census_gdf, geocode_cache_dir=cache_dir).geocode_crashes(crash_csv)
+
+    assert list(first['tract_id']) == list(second['tract_id']) == ['001', '004']
+    assert len(list(cache_dir.glob('*.parquet'))) == 1
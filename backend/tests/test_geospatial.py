@@ -2,17 +2,29 @@
 Tests for geospatial utilities.
 """
 
+import io
+import json
+
 import pytest
+import numpy as np
 import pandas as pd
 import geopandas as gpd
 from shapely.geometry import Point, Polygon
 from utils.geospatial import (
     calculate_centroid,
+    geocode_points,
     point_in_tract,
+    TractLocator,
     simplify_geometry,
     calculate_area_demographics,
     create_choropleth_data,
+    write_geojson,
+    to_topojson,
+    topology_pyramid,
+    write_topology_pyramid,
+    tract_attribute_table,
 )
+from utils.columnar import decode_table
 
 
 def test_calculate_centroid():
@@ -50,6 +62,49 @@ def test_point_in_tract_boundary(sample_census_gdf):
     assert tract['tract_id'] == '001'
 
 
+def test_geocode_points(sample_census_gdf):
+    """Test batch geocoding of lon/lat arrays to tract ids."""
+    lons = [0.5, 1.5, 4.5, 10.0]
+    lats = [0.5, 0.5, 0.5, 10.0]
+
+    result = geocode_points(lons, lats, sample_census_gdf)
+
+    assert list(result) == ['001', '002', '005', None]
+
+
+def test_geocode_points_shared_boundary(sample_census_gdf):
+    """Test points on a shared edge go to the first tract in frame order."""
+    result = geocode_points([1.0, 2.0], [0.5, 0.5], sample_census_gdf)
+    assert list(result) == ['001', '002']
+
+    # Reversing the frame flips the winner, but deterministically
+    reversed_gdf = sample_census_gdf.iloc[::-1].reset_index(drop=True)
+    result = geocode_points([1.0, 2.0], [0.5, 0.5], reversed_gdf)
+    assert list(result) == ['002', '003']
+
+
+def test_tract_locator_missing_coordinates(sample_census_gdf):
+    """Test points with missing coordinates are left unassigned."""
+    locator = TractLocator(sample_census_gdf)
+    positions = locator.locate([0.5, np.nan], [0.5, 0.5])
+
+    assert positions.tolist() == [0, -1]
+
+
+def test_tract_locator_matches_row_scan(sample_census_gdf):
+    """Test batch lookup agrees with a per-tract contains scan for interior points."""
+    rng = np.random.default_rng(0)
+    lons = rng.uniform(-0.5, 5.5, 500)
+    lats = rng.uniform(-0.5, 1.5, 500)
+
+    result = TractLocator(sample_census_gdf).lookup(lons, lats)
+
+    for lon, lat, tract_id in zip(lons, lats, result):
+        matches = sample_census_gdf[sample_census_gdf.geometry.contains(Point(lon, lat))]
+        expected = matches['tract_id'].iloc[0] if len(matches) else None
+        assert expected == tract_id
+
+
 def test_simplify_geometry(sample_census_gdf):
     """Test geometry simplification."""
     original_gdf = sample_census_gdf.copy()
@@ -117,3 +172,228 @@ def test_create_choropleth_data_with_nan():
 
     assert result[0]['value'] == 100.0
     assert result[1]['value'] is None
+
+
+def test_create_choropleth_data_matches_per_row_coercion():
+    """Test column-wise coercion matches the per-cell rules for mixed dtypes."""
+    gdf = gpd.GeoDataFrame({
+        'tract_id': ['001', '002', '003'],
+        'metric': [1.5, np.nan, 2.0],
+        'count': np.array([3, 4, 5], dtype='int32'),
+        'flag': [True, False, True],
+        'label': ['x', None, 'y'],
+        'quintile': pd.Categorical(['Q1', 'Q2', None]),
+        'mixed': pd.Series(['x', 1, None], dtype=object),
+    }, geometry=[Point(0, 0), Point(1, 1), Point(2, 2)])
+
+    result = create_choropleth_data(gdf, 'metric')
+
+    for item, (_, row) in zip(result, gdf.iterrows()):
+        expected = {
+            key: (float(val) if isinstance(val, (int, float)) and pd.notna(val)
+                  else str(val) if pd.notna(val) else None)
+            for key, val in row.items()
+            if key not in ['geometry', 'tract_id']
+        }
+        assert item['properties'] == expected
+        assert all(type(a) is type(b) for a, b in zip(item['properties'].values(), expected.values()))
+
+
+def test_create_choropleth_data_columnar(sample_census_gdf):
+    """Test columnar layout carries one array per property."""
+    result = create_choropleth_data(sample_census_gdf, 'median_income', layout='columnar')
+
+    assert result['ids'] == ['001', '002', '003', '004', '005']
+    assert result['values'][0] == 30000.0
+    assert result['properties']['pct_minority'] == [70.0, 55.0, 40.0, 25.0, 15.0]
+    assert 'geometry' not in result['properties']
+
+    records = create_choropleth_data(sample_census_gdf, 'median_income')
+    assert [r['properties']['pct_minority'] for r in records] == result['properties']['pct_minority']
+
+
+def test_create_choropleth_data_rejects_non_numeric_values(sample_census_gdf):
+    """Test a non-numeric value is an error rather than a silent null."""
+    gdf = sample_census_gdf.copy()
+    gdf['metric'] = ['1', '2', 'n/a', '4', '5']
+    with pytest.raises(ValueError, match="'metric' is not numeric"):
+        create_choropleth_data(gdf, 'metric')
+
+    gdf['metric'] = ['1', '2', '3.5', None, '5']
+    assert [item['value'] for item in create_choropleth_data(gdf, 'metric')] == [1.0, 2.0, 3.5, None, 5.0]
+
+
+def test_create_choropleth_data_unknown_layout(sample_census_gdf):
+    """Test unknown layouts are rejected."""
+    with pytest.raises(ValueError, match="Unknown choropleth layout"):
+        create_choropleth_data(sample_census_gdf, 'median_income', layout='rows')
+
+
+@pytest.mark.parametrize('backend', ['json', 'orjson'])
+def test_write_geojson_matches_to_json(sample_census_gdf, backend):
+    """Streamed GeoJSON parses to the same FeatureCollection as gdf.to_json()."""
+    if backend == 'orjson':
+        pytest.importorskip('orjson')
+    gdf = sample_census_gdf.copy()
+    gdf['median_income'] = gdf['median_income'].astype(float)
+    gdf.loc[0, 'median_income'] = np.nan
+    gdf['income_quintile'] = pd.Categorical(['Q1', 'Q2', None, 'Q4', 'Q5'])
+    gdf['flag'] = [True, False, True, False, True]
+
+    buf = io.StringIO()
+    write_geojson(gdf, buf, json_backend=backend)
+    assert json.loads(buf.getvalue()) == json.loads(gdf.to_json())
+
+
+def test_write_geojson_precision(tmp_path):
+    """Coordinates are rounded to the requested precision."""
+    gdf = gpd.GeoDataFrame(
+        {'tract_id': ['a']},
+        geometry=[Polygon([(0.1234567, 0), (1, 0.9876543), (1, 1)])],
+        crs='EPSG:4326',
+    )
+    path = tmp_path / 'out.json'
+    write_geojson(gdf, path, precision=3)
+
+    coords = json.loads(path.read_text())['features'][0]['geometry']['coordinates'][0]
+    assert coords[0] == [0.123, 0.0]
+    assert coords[1] == [1.0, 0.988]
+
+
+def test_write_geojson_unknown_backend(sample_census_gdf):
+    """Unknown JSON backends are rejected."""
+    with pytest.raises(ValueError, match="Unknown JSON backend"):
+        write_geojson(sample_census_gdf, io.StringIO(), json_backend='ujson')
+
+
+def _decode_topology(topology, object_name='tracts'):
+    """Rebuild shapely polygons from a TopoJSON topology."""
+    (kx, ky), (x0, y0) = topology['transform']['scale'], topology['transform']['translate']
+    arcs = [np.cumsum(np.array(arc), axis=0) * [kx, ky] + [x0, y0] for arc in topology['arcs']]
+
+    def ring(refs):
+        points = []
+        for ref in refs:
+            arc = arcs[ref] if ref >= 0 else arcs[~ref][::-1]
+            points.extend(arc if not points else arc[1:])
+        return points
+
+    geometries = []
+    for obj in topology['objects'][object_name]['geometries']:
+        if obj['type'] == 'Polygon':
+            geometries.append(Polygon(ring(obj['arcs'][0]), [ring(r) for r in obj['arcs'][1:]]))
+        else:
+            geometries.append(None)
+    return geometries
+
+
+def test_to_topojson_shares_boundaries(sample_census_gdf):
+    """Each shared edge is stored once and referenced in reverse by the neighbour."""
+    topology = to_topojson(sample_census_gdf)
+
+    geometries = topology['objects']['tracts']['geometries']
+    assert [g['id'] for g in geometries] == list(sample_census_gdf['tract_id'])
+    refs = [ref for g in geometries for ring in g['arcs'] for ref in ring]
+    # 4 internal edges, the two end tracts' outer edges as one arc each, and
+    # separate top and bottom arcs for the three middle tracts
+    assert len(topology['arcs']) == 4 + 2 + 3 * 2
+    assert sum(ref < 0 for ref in refs) == 4
+
+
+def test_to_topojson_round_trip(sample_census_gdf):
+    """Decoded polygons match the originals within quantization error."""
+    topology = to_topojson(sample_census_gdf, quantization=1000)
+    decoded = _decode_topology(topology)
+
+    step = max(topology['transform']['scale'])
+    for original, result in zip(sample_census_gdf.geometry, decoded):
+        assert result.is_valid
+        assert original.symmetric_difference(result).area < original.length * step
+
+
+def test_to_topojson_enclave():
+    """A tract fully inside another shares its ring with the outer tract's hole."""
+    outer = Polygon([(0, 0), (4, 0), (4, 4), (0, 4)], [[(1, 1), (1, 3), (3, 3), (3, 1)]])
+    inner = Polygon([(1, 1), (3, 1), (3, 3), (1, 3)])
+    gdf = gpd.GeoDataFrame({'tract_id': ['a', 'b']}, geometry=[outer, inner])
+
+    topology = to_topojson(gdf)
+    assert len(topology['arcs']) == 2
+    step = max(topology['transform']['scale'])
+    for original, result in zip(gdf.geometry, _decode_topology(topology)):
+        assert original.symmetric_difference(result).area < original.length * step
+
+
+def test_to_topojson_simplify_keeps_shared_edges():
+    """Simplifying arcs keeps neighbouring tracts gap- and overlap-free."""
+    jagged = [(1 + 0.01 * (i % 2), i / 10) for i in range(11)]
+    left = Polygon([(0, 0)] + jagged + [(0, 1)])
+    right = Polygon(jagged + [(2, 1), (2, 0)])
+    gdf = gpd.GeoDataFrame({'tract_id': ['a', 'b']}, geometry=[left, right])
+
+    a, b = _decode_topology(to_topojson(gdf, simplify_tolerance=0.05))
+    assert len(a.exterior.coords) < len(left.exterior.coords)
+    assert a.intersection(b).area == pytest.approx(0, abs=1e-9)
+    assert a.union(b).area == pytest.approx(2.0, rel=1e-3)
+
+
+def test_to_topojson_simplify_never_collapses_rings():
+    """Rings that would simplify below a triangle keep their original arcs."""
+    left = Polygon([(0, 0), (0, 1), (1, 1), (1, 0)])
+    right = Polygon([(1, 0), (1, 1), (2, 1), (2, 0)])
+    gdf = gpd.GeoDataFrame({'tract_id': ['a', 'b']}, geometry=[left, right])
+
+    a, b = _decode_topology(to_topojson(gdf, simplify_tolerance=10))
+    assert a.area == pytest.approx(1.0, rel=1e-3)
+    assert b.area == pytest.approx(1.0, rel=1e-3)
+
+
+def test_topology_pyramid_shares_structure():
+    """Every level has the same geometries and arc references; only vertices differ."""
+    jagged = [(1 + 0.01 * (i % 2), i / 10) for i in range(11)]
+    gdf = gpd.GeoDataFrame({'tract_id': ['a', 'b']}, geometry=[
+        Polygon([(0, 0)] + jagged + [(0, 1)]),
+        Polygon(jagged + [(2, 1), (2, 0)]),
+    ])
+    coarse, fine = topology_pyramid(gdf, [0.05, None])
+
+    assert coarse['objects'] == fine['objects']
+    assert len(coarse['arcs']) == len(fine['arcs'])
+    vertices = [sum(len(arc) for arc in t['arcs']) for t in (coarse, fine)]
+    assert vertices[0] < vertices[1]
+
+
+def test_write_topology_pyramid(sample_census_gdf, tmp_path):
+    """Levels are written next to an index mapping zoom ranges to files."""
+    levels = [
+        {'max_zoom': 10, 'tolerance': 0.5},
+        {'max_zoom': 13, 'tolerance': 0.1},
+        {'max_zoom': None, 'tolerance': None},
+    ]
+    index = write_topology_pyramid(sample_census_gdf, tmp_path, levels)
+
+    assert json.loads((tmp_path / 'tracts-topo.json').read_text()) == index
+    assert [(l['min_zoom'], l['max_zoom']) for l in index['levels']] == [(0, 10), (11, 13), (14, None)]
+    for level in index['levels']:
+        topology = json.loads((tmp_path / f"{level['file']}.json").read_text())
+        assert topology['type'] == 'Topology'
+        assert level['vertices'] == sum(len(arc) for arc in topology['arcs'])
+
+
+def test_to_topojson_rejects_points():
+    """Only polygon layers can be exported."""
+    gdf = gpd.GeoDataFrame({'tract_id': ['a']}, geometry=[Point(0, 0)])
+    with pytest.raises(ValueError, match="Polygon"):
+        to_topojson(gdf)
+
+
+def test_tract_attribute_table(sample_census_gdf):
+    """Attribute tables drop geometry and key records by tract_id."""
+    table = tract_attribute_table(sample_census_gdf)
+
+    assert table['type'] == 'TractAttributes'
+    assert table['topology'] == 'tracts-topo'
+    assert table['records']['columns']['tract_id'] == ['001', '002', '003', '004', '005']
+    assert decode_table(table['records'])[0] == {
+        'tract_id': '001', 'median_income': 30000, 'pct_minority': 70, 'total_population': 5000,
+    }
@@ -0,0 +1,147 @@
+"""
+Tests for conditional downloads and sidecar validators.
+"""
+
+import hashlib
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from utils.freshness import mark_fresh, read_meta, response_validators, write_meta
+from utils.http_cache import conditional_get, payload_sha256, sweep_bodies
+
+
+class Origin:
+    """Local server whose body can change; ETags are optional."""
+
+    def __init__(self, body=b'stop_id,stop_lat\n1,35.9\n', etags=True):
+        self.body = body
+        self.etags = etags
+        self.requests = []
+
+    def __enter__(self):
+        origin = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                origin.requests.append(dict(self.headers))
+                etag = f'"{hashlib.md5(origin.body).hexdigest()}"'
+                if origin.etags and self.headers.get('If-None-Match') == etag:
+                    self.send_response(304)
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                if origin.etags:
+                    self.send_header('ETag', etag)
+                    self.send_header('Last-Modified', 'Mon, 01 Sep 2025 00:00:00 GMT')
+                self.send_header('Content-Length', str(len(origin.body)))
+                self.end_headers()
+                self.wfile.write(origin.body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True)
+        self.thread.start()
+        self.url = f'http://127.0.0.1:{self.server.server_address[1]}/feed.zip'
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+
+
+def test_not_modified_is_served_from_cache(tmp_path):
+    with Origin() as origin:
+        first = conditional_get(origin.url, cache_dir=tmp_path)
+        second = conditional_get(origin.url, validators=first.validators, cache_dir=tmp_path)
+
+    assert first.status == 200 and not first.unchanged
+    assert second.status == 304 and second.unchanged
+    assert second.content == origin.body
+    assert origin.requests[1]['If-None-Match'] == first.validators['etag']
+    assert origin.requests[1]['If-Modified-Since'] == first.validators['last_modified']
+
+
+def test_identical_body_without_etag_is_unchanged(tmp_path):
+    with Origin(etags=False) as origin:
+        first = conditional_get(origin.url, cache_dir=tmp_path)
+        second = conditional_get(origin.url, validators=first.validators, cache_dir=tmp_path)
+        origin.body = b'stop_id,stop_lat\n1,35.9\n2,36.0\n'
+        third = conditional_get(origin.url, validators=second.validators, cache_dir=tmp_path)
+
+    assert second.status == 200 and second.unchanged
+    assert not third.unchanged and third.content == origin.body
+    # The replaced body stays until a sweep finds nothing referencing it
+    assert {p.name for p in tmp_path.rglob('*') if p.is_file()} == {
+        first.validators['sha256'], third.validators['sha256'],
+    }
+
+
+def test_missing_cached_body_forces_full_download(tmp_path):
+    with Origin() as origin:
+        first = conditional_get(origin.url, cache_dir=tmp_path)
+        for path in tmp_path.rglob('*'):
+            if path.is_file():
+                path.unlink()
+        second = conditional_get(origin.url, validators=first.validators, cache_dir=tmp_path)
+
+    assert 'If-None-Match' not in origin.requests[1]
+    assert second.status == 200 and second.unchanged
+    assert second.content == origin.body
+
+
+def test_sweep_keeps_bodies_other_sidecars_reference(tmp_path):
+    cache_dir, data_dir = tmp_path / 'http', tmp_path / 'raw'
+    data_dir.mkdir()
+    with Origin() as origin:
+        shared = conditional_get(origin.url, cache_dir=cache_dir)
+        for name in ('stops.json', 'routes.json'):
+            data_file = data_dir / name
+            data_file.write_text('{}')
+            write_meta(data_file, source_url=origin.url, record_count=1,
+                       extra={'responses': {'gtfs': shared.validators}})
+
+        origin.body = b'stop_id,stop_lat\n2,36.0\n'
+        changed = conditional_get(origin.url, validators=shared.validators, cache_dir=cache_dir)
+        mark_fresh(data_dir / 'stops.json', responses={'gtfs': changed.validators})
+
+        # routes.json still points at the first body
+        assert sweep_bodies(data_dir, cache_dir) == []
+        again = conditional_get(origin.url, validators=shared.validators, cache_dir=cache_dir)
+        assert 'If-None-Match' in origin.requests[-1]
+
+        mark_fresh(data_dir / 'routes.json', responses={'gtfs': again.validators})
+        removed = sweep_bodies(data_dir, cache_dir)
+
+    assert [p.name for p in removed] == [shared.validators['sha256']]
+    assert [p.name for p in cache_dir.rglob('*') if p.is_file()] == [changed.validators['sha256']]
+
+
+def test_mark_fresh_leaves_data_file_alone(tmp_path):
+    data_file = tmp_path / 'bus_stops.json'
+    data_file.write_text('{}')
+    validators = {'etag': '"a"', 'last_modified': None, 'sha256': 'abc'}
+    write_meta(data_file, source_url='http://example.invalid', record_count=3,
+               extra={'responses': {'gtfs': validators}})
+    mtime = data_file.stat().st_mtime_ns
+    fetched_at = read_meta(data_file)['fetched_at']
+
+    assert response_validators(data_file, 'gtfs') == validators
+    assert response_validators(data_file, 'census') is None
+    meta = mark_fresh(data_file, responses={'gtfs': {**validators, 'etag': '"b"'}})
+
+    assert data_file.stat().st_mtime_ns == mtime
+    assert meta['fetched_at'] >= fetched_at
+    assert meta['record_count'] == 3
+    assert response_validators(data_file, 'gtfs')['etag'] == '"b"'
+
+
+@pytest.mark.parametrize('a, b, same', [
+    ({'x': 1, 'y': [1, 2]}, {'y': [1, 2], 'x': 1}, True),
+    ([{'x': 1}], [{'x': 2}], False),
+])
+def test_payload_sha256(a, b, same):
+    assert (payload_sha256(a) == payload_sha256(b)) is same
@@ -0,0 +1,66 @@
+"""
+Tests for batch inequality indexes.
+"""
+
+import pytest
+import numpy as np
+from utils.demographic_analysis import calculate_gini_coefficient
+from utils.inequality import inequality_indexes
+
+
+def test_unweighted_gini_matches_scalar_function():
+    """Each row's Gini equals calculate_gini_coefficient on that row."""
+    rng = np.random.default_rng(0)
+    allocations = rng.exponential(size=(50, 30))
+    allocations[0, :10] = 0
+
+    gini = inequality_indexes(allocations)['gini']
+
+    assert gini.shape == (50,)
+    np.testing.assert_allclose(gini, [calculate_gini_coefficient(row) for row in allocations])
+
+
+def test_weights_equal_replicated_units():
+    """Integer population weights behave like repeating each tract's per-capita value."""
+    rng = np.random.default_rng(1)
+    allocation = rng.exponential(size=20)
+    population = rng.integers(1, 6, size=20)
+    people = np.repeat(allocation / population, population)
+
+    weighted = inequality_indexes(allocation, weights=population)
+    ratio = people / people.mean()
+
+    assert weighted['gini'] == pytest.approx(calculate_gini_coefficient(people))
+    assert weighted['theil'] == pytest.approx(np.mean(ratio * np.log(ratio)))
+    assert weighted['atkinson'] == pytest.approx(1 - np.mean(np.sqrt(ratio)) ** 2)
+    assert inequality_indexes(allocation, population, epsilon=1)['atkinson'] == pytest.approx(
+        1 - np.exp(np.mean(np.log(ratio)))
+    )
+
+
+def test_equal_allocation_has_no_inequality():
+    """A uniform allocation scores zero on every index."""
+    result = inequality_indexes(np.full((3, 8), 5.0), rank_by=np.arange(8))
+
+    for name in ('gini', 'theil', 'atkinson', 'concentration'):
+        np.testing.assert_allclose(result[name], 0, atol=1e-12)
+
+
+def test_concentration_index_sign():
+    """Money going to low-income tracts gives a negative concentration index."""
+    income = [20_000, 40_000, 60_000, 80_000]
+
+    pro_poor = inequality_indexes([1, 1, 1, 0], rank_by=income)['concentration']
+    pro_rich = inequality_indexes([0, 1, 1, 1], rank_by=income)['concentration']
+
+    assert pro_poor == pytest.approx(-0.25)
+    assert pro_rich == pytest.approx(0.25)
+
+
+def test_missing_values_are_excluded():
+    """NaN allocations and zero-population tracts drop out of each row."""
+    with_missing = inequality_indexes([[1.0, 2.0, np.nan, 4.0]])['gini'][0]
+    assert with_missing == pytest.approx(calculate_gini_coefficient([1.0, 2.0, 4.0]))
+
+    population = np.array([10.0, 0.0, 10.0])
+    assert inequality_indexes([5.0, 99.0, 5.0], weights=population)['gini'] == pytest.approx(0.0)
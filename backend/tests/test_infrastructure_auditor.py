@@ -2,10 +2,13 @@
 Tests for infrastructure recommendation auditor model.
 """
 
+import json
+
 import pytest
 import pandas as pd
 from models.infrastructure_auditor import InfrastructureRecommendationAuditor
 from config import INFRASTRUCTURE_PROJECT_TYPES, INFRASTRUCTURE_DEFAULT_BUDGET
+from utils.columnar import decode_report
 
 
 def test_infrastructure_auditor_initialization(sample_census_gdf, sample_infrastructure_df):
@@ -81,3 +84,33 @@ def test_calculate_equity_metrics(sample_census_gdf, sample_infrastructure_df):
     # Disparate impact is Q1/Q5 per-capita — non-negative
     assert ai['disparate_impact_ratio'] >= 0
     assert nb['disparate_impact_ratio'] >= 0
+
+
+def test_equity_metrics_population_weighted(sample_census_gdf, sample_infrastructure_df):
+    """Population-weighted indexes are reported for both allocations."""
+    auditor = InfrastructureRecommendationAuditor(sample_census_gdf, sample_infrastructure_df)
+    auditor.simulate_ai_recommendations()
+    auditor.simulate_need_based_recommendations()
+
+    metrics = auditor.calculate_equity_metrics()
+
+    for allocation in ('ai_allocation', 'need_based_allocation'):
+        weighted = metrics[allocation]['population_weighted']
+        assert set(weighted) == {'gini', 'theil', 'atkinson', 'concentration'}
+        assert 0 <= weighted['gini'] <= 1
+        assert -1 <= weighted['concentration'] <= 1
+    assert 'concentration_gap' in metrics['comparison']
+
+
+def test_columnar_report_decodes_to_records(sample_census_gdf, sample_infrastructure_df):
+    """The columnar layout carries the same tables as the records layout."""
+    auditor = InfrastructureRecommendationAuditor(sample_census_gdf, sample_infrastructure_df)
+    records = auditor.generate_report()
+    columnar = auditor.generate_report(layout='columnar')
+
+    assert columnar['danger_scores']['type'] == 'Columns'
+    assert sorted(columnar['tract_ids']) == sorted(sample_census_gdf['tract_id'])
+    assert json.loads(json.dumps(decode_report(columnar))) == json.loads(json.dumps(records))
+
+    with pytest.raises(ValueError, match="Unknown report layout"):
+        auditor.generate_report(layout='rows')
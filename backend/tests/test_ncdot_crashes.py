@@ -0,0 +1,94 @@
+"""
+Tests for the NCDOT crash fetch and incremental sync, against a local stub FeatureServer.
+"""
+
+import json
+
+import pandas as pd
+from tests.feature_server_stub import StubFeatureServer
+from utils.freshness import meta_path_for, read_meta
+from utils.ncdot_crashes import NCDOT_OUT_FIELDS, fetch_crash_records, sync_crash_csv
+
+
+def _record(crash_id, year=2023, county='DURHAM', lat=35.99):
+    record = {field: 'Not coded' for field in NCDOT_OUT_FIELDS}
+    record.update({
+        'CrashID': crash_id,
+        'CrashDate': int(pd.Timestamp(f'{year}-06-01').timestamp() * 1000),
+        'CrashYear': year,
+        'CrashHour': 12,
+        'Latitude': lat,
+        'Longitude': -78.9,
+        'County': county,
+    })
+    return record
+
+
+def test_fetch_pages_and_filters():
+    """Records are paged in CrashID order and filtered to the county."""
+    records = [_record(i) for i in range(1, 8)] + [_record(100, county='WAKE'), _record(101, lat=None)]
+
+    with StubFeatureServer(records, max_record_count=3) as server:
+        crash_df = fetch_crash_records(server.url, page_size=3)
+
+    assert list(crash_df['CrashID']) == [1, 2, 3, 4, 5, 6, 7]
+    assert crash_df['CrashDate'].iloc[0] == '2023-06-01'
+    offsets = sorted(int(q['resultOffset']) for q in server.queries if 'resultOffset' in q)
+    assert offsets == [0, 3, 6]
+
+
+def test_sync_full_then_incremental(tmp_path):
+    """A second sync only asks for CrashIDs above the recorded maximum."""
+    csv_path = tmp_path / 'crashes.csv'
+    records = [_record(i, year=2019 + i % 3) for i in range(1, 6)]
+
+    with StubFeatureServer(records) as server:
+        meta = sync_crash_csv(csv_path, server.url)
+    assert meta['mode'] == 'full'
+    assert meta['max_crash_id'] == 5 and meta['new_records'] == 5
+
+    records += [_record(6), _record(7, year=2024)]
+    with StubFeatureServer(records) as server:
+        meta = sync_crash_csv(csv_path, server.url)
+
+    assert meta['mode'] == 'incremental'
+    assert meta['new_records'] == 2
+    assert meta['max_crash_id'] == 7
+    assert meta['year_range'] == [2019, 2024]
+    assert all('CrashID > 5' in q['where'] for q in server.queries)
+    assert list(pd.read_csv(csv_path)['CrashID']) == [1, 2, 3, 4, 5, 6, 7]
+    assert read_meta(csv_path) == meta
+
+
+def test_sync_without_new_records_keeps_csv(tmp_path):
+    """An empty delta refreshes the sidecar but leaves the CSV untouched."""
+    csv_path = tmp_path / 'crashes.csv'
+    records = [_record(i) for i in range(1, 4)]
+    with StubFeatureServer(records) as server:
+        sync_crash_csv(csv_path, server.url)
+    before = csv_path.stat().st_mtime_ns
+
+    with StubFeatureServer(records) as server:
+        meta = sync_crash_csv(csv_path, server.url)
+
+    assert meta['mode'] == 'incremental' and meta['new_records'] == 0
+    assert csv_path.stat().st_mtime_ns == before
+
+
+def test_sync_falls_back_to_full(tmp_path):
+    """An old full sync or a legacy sidecar without max_crash_id triggers a full fetch."""
+    csv_path = tmp_path / 'crashes.csv'
+    records = [_record(i) for i in range(1, 4)]
+    with StubFeatureServer(records) as server:
+        sync_crash_csv(csv_path, server.url)
+
+    meta = read_meta(csv_path)
+    meta['full_sync_at'] = '2000-01-01T00:00:00+00:00'
+    meta_path_for(csv_path).write_text(json.dumps(meta))
+    with StubFeatureServer(records) as server:
+        assert sync_crash_csv(csv_path, server.url)['mode'] == 'full'
+
+    meta_path_for(csv_path).write_text(json.dumps({'fetched_at': meta['fetched_at']}))
+    with StubFeatureServer(records) as server:
+        result = sync_crash_csv(csv_path, server.url)
+    assert result['mode'] == 'full' and result['new_records'] == 0
@@ -0,0 +1,126 @@
+"""
+Tests for streaming infrastructure counts out of a local OSM extract.
+"""
+
+import gzip
+
+import geopandas as gpd
+import pandas as pd
+import pytest
+from shapely.geometry import LineString, Point, Polygon, box
+from utils.osm_extract import count_extract_infrastructure, score_osm_extract
+from utils.osm_infrastructure import score_osm_infrastructure
+
+# Two tracts side by side: west [-79.0, -78.9], east [-78.9, -78.8]
+TRACTS = gpd.GeoDataFrame({
+    'tract_id': ['37063000100', '37063000200'],
+    'total_population': [1000, 2500],
+}, geometry=[box(-79.0, 35.9, -78.9, 36.0), box(-78.9, 35.9, -78.8, 36.0)], crs='EPSG:4326')
+
+NODES = {
+    # Tagged nodes
+    1: (-78.95, 35.95, {'highway': 'crossing'}),
+    2: (-78.85, 35.95, {'highway': 'traffic_signals'}),
+    3: (-78.84, 35.93, {'traffic_calming': 'bump'}),
+    4: (-78.70, 35.95, {'highway': 'crossing'}),  # outside both tracts
+    5: (-78.96, 35.97, {'highway': 'bus_stop'}),  # not queried
+    # Way nodes
+    10: (-78.99, 35.91, {}), 11: (-78.97, 35.91, {}), 12: (-78.97, 35.93, {}), 13: (-78.99, 35.93, {}),
+    20: (-78.88, 35.98, {}), 21: (-78.82, 35.98, {}),
+    30: (-78.86, 35.92, {}), 31: (-78.86, 35.96, {}),
+}
+WAYS = {
+    # Footway area in the west tract (closed, area=yes)
+    100: ([10, 11, 12, 13, 10], {'highway': 'footway', 'area': 'yes'}),
+    # Cycleway line in the east tract
+    101: ([20, 21], {'highway': 'cycleway'}),
+    # Path closed to bikes with traffic calming: speed_calming
+    102: ([30, 31], {'highway': 'path', 'bicycle': 'no', 'traffic_calming': 'table'}),
+    # Path closed to bikes: unclassified
+    103: ([30, 31], {'highway': 'path', 'bicycle': 'no'}),
+    # Footway whose second node is outside the extract: dropped
+    104: ([20, 999], {'highway': 'footway'}),
+    # Residential street: not queried
+    105: ([20, 21], {'highway': 'residential'}),
+}
+
+
+def _tags_xml(tags):
+    return ''.join(f'<tag k="{k}" v="{v}"/>' for k, v in tags.items())
+
+
+def _write_osm(path):
+    lines = ['<?xml version="1.0" encoding="UTF-8"?>', '<osm version="0.6">',
+             '<bounds minlat="35.9" minlon="-79.0" maxlat="36.0" maxlon="-78.6"/>']
+    for node_id, (lon, lat, tags) in NODES.items():
+        lines.append(f'<node id="{node_id}" lat="{lat}" lon="{lon}">{_tags_xml(tags)}</node>')
+    for way_id, (refs, tags) in WAYS.items():
+        nds = ''.join(f'<nd ref="{r}"/>' for r in refs)
+        lines.append(f'<way id="{way_id}">{nds}{_tags_xml(tags)}</way>')
+    lines.append('<relation id="500"><member type="way" ref="101" role=""/>'
+                 '<tag k="type" v="route"/></relation>')
+    lines.append('</osm>')
+    text = '\n'.join(lines).encode()
+    if path.suffix == '.gz':
+        path.write_bytes(gzip.compress(text))
+    else:
+        path.write_bytes(text)
+    return path
+
+
+def _overpass_equivalent():
+    """What osmnx would return for the same elements."""
+    rows = []
+    for node_id, (lon, lat, tags) in NODES.items():
+        if tags and node_id != 5:
+            rows.append({**tags, 'geometry': Point(lon, lat)})
+    coords = {node_id: (lon, lat) for node_id, (lon, lat, _) in NODES.items()}
+    rows.append({'highway': 'footway', 'area': 'yes', 'geometry': Polygon([coords[r] for r in [10, 11, 12, 13]])})
+    rows.append({'highway': 'cycleway', 'geometry': LineString([coords[20], coords[21]])})
+    rows.append({'highway': 'path', 'bicycle': 'no', 'traffic_calming': 'table',
+                 'geometry': LineString([coords[30], coords[31]])})
+    rows.append({'highway': 'path', 'bicycle': 'no', 'geometry': LineString([coords[30], coords[31]])})
+    return gpd.GeoDataFrame(rows, crs='EPSG:4326')
+
+
+@pytest.mark.parametrize('name, chunk_size', [('durham.osm', 100_000), ('durham.osm.gz', 2)])
+def test_counts_from_extract(tmp_path, name, chunk_size):
+    counts, classified = count_extract_infrastructure(_write_osm(tmp_path / name), TRACTS,
+                                                      chunk_size=chunk_size)
+
+    assert counts.loc['37063000100'].to_dict() == {
+        'crossings': 1, 'bike_infra': 0, 'traffic_signals': 0, 'speed_calming': 0, 'footways': 1,
+    }
+    assert counts.loc['37063000200'].to_dict() == {
+        'crossings': 0, 'bike_infra': 1, 'traffic_signals': 1, 'speed_calming': 2, 'footways': 0,
+    }
+    # The crossing outside both tracts is classified but not counted
+    assert classified['crossings'] == 2
+
+
+def test_scores_match_overpass_path(tmp_path):
+    classified, scores = score_osm_extract(_write_osm(tmp_path / 'durham.osm'), TRACTS)
+    points, expected = score_osm_infrastructure(_overpass_equivalent(), TRACTS)
+
+    assert classified.sum() == len(points)
+    pd.testing.assert_frame_equal(scores, expected)
+
+
+def test_pbf_matches_xml(tmp_path):
+    osmium = pytest.importorskip('osmium')
+    xml_path = _write_osm(tmp_path / 'durham.osm')
+    pbf_path = tmp_path / 'durham.osm.pbf'
+    with osmium.SimpleWriter(str(pbf_path)) as writer:
+        for obj in osmium.FileProcessor(str(xml_path)):
+            writer.add(obj)
+
+    pbf_counts, _ = count_extract_infrastructure(pbf_path, TRACTS)
+    xml_counts, _ = count_extract_infrastructure(xml_path, TRACTS)
+    pd.testing.assert_frame_equal(pbf_counts, xml_counts)
+
+
+def test_extract_without_infrastructure_raises(tmp_path):
+    path = tmp_path / 'empty.osm'
+    path.write_text('<osm version="0.6"><node id="1" lat="35.95" lon="-78.95"/></osm>')
+    with pytest.raises(RuntimeError, match='No infrastructure'):
+        score_osm_extract(path, TRACTS)
@@ -0,0 +1,151 @@
+"""
+Tests for the vectorized OSM infrastructure classification and scoring.
+"""
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import pytest
+from config import OSM_INFRASTRUCTURE_FEATURES
+from shapely.geometry import LineString, Point, box
+from utils.osm_infrastructure import (
+    classify_osm_features,
+    score_osm_infrastructure,
+    tract_category_counts,
+)
+
+CATEGORIES = list(OSM_INFRASTRUCTURE_FEATURES)
+
+
+def _tracts():
+    cells = [box(-78.95 + 0.02 * i, 35.95 + 0.02 * j, -78.93 + 0.02 * i, 35.97 + 0.02 * j)
+             for j in range(2) for i in range(3)]
+    return gpd.GeoDataFrame({
+        'tract_id': [f'370630{i:05d}' for i in range(6)],
+        'total_population': [1200, 3400, 0, 2500, 800, 4100],
+    }, geometry=cells, crs='EPSG:4326')
+
+
+def _features(n=600, seed=7):
+    rng = np.random.default_rng(seed)
+    highway = rng.choice(['crossing', 'traffic_signals', 'footway', 'cycleway', 'path',
+                          'residential', None], size=n).astype(object)
+    bicycle = rng.choice(['no', 'yes', None], size=n).astype(object)
+    calming = rng.choice(['bump', None, None], size=n).astype(object)
+    x = rng.uniform(-78.96, -78.88, size=n)
+    y = rng.uniform(35.94, 36.00, size=n)
+    kinds = rng.integers(0, 3, size=n)
+    geometry = [
+        Point(a, b) if k == 0 else LineString([(a, b), (a + 0.003, b + 0.001)]) if k == 1
+        else box(a, b, a + 0.002, b + 0.002)
+        for a, b, k in zip(x, y, kinds)
+    ]
+    geometry[5] = None
+    highway[11] = ['footway', 'crossing']
+    return gpd.GeoDataFrame({'highway': highway, 'bicycle': bicycle, 'traffic_calming': calming},
+                            geometry=geometry, crs='EPSG:4326')
+
+
+def _reference(features_gdf, tracts_gdf):
+    """The row-by-row implementation the module replaced."""
+    def classify_row(row):
+        highway = row.get('highway', '')
+        if isinstance(highway, list):
+            highway = highway[0] if highway else ''
+        if pd.isna(highway):
+            highway = ''
+        if highway == 'crossing':        return 'crossings'
+        if highway == 'traffic_signals': return 'traffic_signals'
+        if highway == 'footway':         return 'footways'
+        if highway in ('cycleway', 'path') and row.get('bicycle') != 'no':
+            return 'bike_infra'
+        if pd.notna(row.get('traffic_calming')): return 'speed_calming'
+        return None
+
+    records = []
+    for _, row in features_gdf.iterrows():
+        category = classify_row(row)
+        if category is None or row.geometry is None:
+            continue
+        geom = row.geometry
+        records.append({'category': category,
+                        'geometry': geom if geom.geom_type == 'Point' else geom.centroid})
+    infra_gdf = gpd.GeoDataFrame(records, crs='EPSG:4326')
+
+    tracts_gdf = tracts_gdf.copy()
+    tracts_gdf['area_km2'] = tracts_gdf.to_crs(epsg=3857).geometry.area / 1e6
+    joined = gpd.sjoin(infra_gdf, tracts_gdf[['tract_id', 'geometry']], how='left', predicate='within')
+    tract_ids = tracts_gdf['tract_id'].unique()
+    tract_data = {tid: {cat: 0 for cat in CATEGORIES} for tid in tract_ids}
+    for _, row in joined.iterrows():
+        if pd.isna(row.get('tract_id')):
+            continue
+        tract_data[row['tract_id']][row['category']] += 1
+
+    rows = []
+    for tid in tract_ids:
+        area_km2 = tracts_gdf.loc[tracts_gdf['tract_id'] == tid, 'area_km2'].iloc[0]
+        population = tracts_gdf.loc[tracts_gdf['tract_id'] == tid, 'total_population'].iloc[0]
+        row = {'tract_id': tid, 'area_km2': float(area_km2)}
+        for cat in CATEGORIES:
+            count = tract_data[tid][cat]
+            row[f'{cat}_count'] = count
+            row[f'{cat}_density'] = (count / population * 1000) if population > 0 else 0.0
+        rows.append(row)
+    result_df = pd.DataFrame(rows)
+    for cat in CATEGORIES:
+        log_col = np.log1p(result_df[f'{cat}_density'])
+        col_min = log_col.min()
+        col_range = log_col.max() - col_min
+        result_df[f'{cat}_norm'] = (log_col - col_min) / col_range if col_range > 0 else 0.0
+    result_df['osm_infrastructure_score'] = np.clip(sum(
+        result_df[f'{cat}_norm'] * OSM_INFRASTRUCTURE_FEATURES[cat]['weight'] for cat in CATEGORIES
+    ), 0.05, 0.95)
+    return infra_gdf, result_df
+
+
+def test_matches_row_by_row_implementation():
+    features_gdf, tracts_gdf = _features(), _tracts()
+    points, scores = score_osm_infrastructure(features_gdf, tracts_gdf)
+    expected_points, expected_scores = _reference(features_gdf, tracts_gdf)
+
+    assert len(points) == len(expected_points)
+    assert points['category'].value_counts().to_dict() == expected_points['category'].value_counts().to_dict()
+    pd.testing.assert_frame_equal(scores, expected_scores)
+    assert scores.to_dict(orient='records') == expected_scores.to_dict(orient='records')
+
+
+def test_classification_rules():
+    features = pd.DataFrame({
+        'highway': ['crossing', ['traffic_signals', 'crossing'], 'path', 'path', None, 'service'],
+        'bicycle': [None, None, 'no', 'designated', None, None],
+        'traffic_calming': [None, None, 'table', None, 'hump', None],
+    })
+    assert classify_osm_features(features).tolist() == [
+        'crossings', 'traffic_signals', 'speed_calming', 'bike_infra', 'speed_calming', None,
+    ]
+    # Extracts without a tag column still classify
+    assert classify_osm_features(features[['highway']]).tolist()[2] == 'bike_infra'
+
+
+def test_no_classified_features_raises():
+    features_gdf = gpd.GeoDataFrame({'highway': ['service']}, geometry=[Point(-78.9, 35.96)],
+                                    crs='EPSG:4326')
+    with pytest.raises(RuntimeError, match='No infrastructure'):
+        score_osm_infrastructure(features_gdf, _tracts())
+
+
+def test_boundary_points_follow_the_tract_locator_rule():
+    """Shared-boundary points go to the first tract, outer-boundary points count."""
+    tracts = _tracts()
+    points = gpd.GeoDataFrame({'category': ['crossings', 'crossings', 'footways']}, geometry=[
+        Point(-78.93, 35.96),   # edge between tracts 0 and 1
+        Point(-78.93, 35.97),   # corner of tracts 0, 1, 3 and 4
+        Point(-78.95, 35.96),   # western county edge of tract 0
+    ], crs='EPSG:4326')
+
+    counts = tract_category_counts(points, tracts, CATEGORIES)
+
+    assert counts.loc['37063000000', 'crossings'] == 2
+    assert counts.loc['37063000000', 'footways'] == 1
+    assert counts.to_numpy().sum() == 3
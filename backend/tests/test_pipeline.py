@@ -0,0 +1,220 @@
+"""
+Tests for the incremental pipeline runner.
+"""
+
+import json
+import threading
+from types import SimpleNamespace
+
+import pytest
+from utils.pipeline import NotebookTask, Pipeline, PipelineError, Stage
+
+
+class Transform:
+    """Toy stage action: writes the concatenated inputs (plus a tag) to each output."""
+
+    def __init__(self, inputs=(), outputs=(), tag='', barrier=None, fail=False):
+        self.inputs = inputs
+        self.outputs = outputs
+        self.tag = tag
+        self.barrier = barrier
+        self.fail = fail
+        self.calls = 0
+
+    def __call__(self, log_path=None):
+        self.calls += 1
+        if self.barrier is not None:
+            self.barrier.wait()
+        if self.fail:
+            raise RuntimeError('boom')
+        text = ''.join(p.read_text() for p in self.inputs) + self.tag
+        for path in self.outputs:
+            path.write_text(text)
+
+
+@pytest.fixture
+def toy(tmp_path):
+    """Census and crash fetches feeding two tests: the shape of the real pipeline."""
+    census, crashes = tmp_path / 'census.txt', tmp_path / 'crashes.csv'
+    volume, crash_report = tmp_path / 'volume.json', tmp_path / 'crash.json'
+    settings = SimpleNamespace(BIAS={'undercount': 0.25}, YEARS=[2023, 2024])
+    actions = {
+        'fetch_census': Transform(outputs=[census], tag='tracts'),
+        'fetch_crashes': Transform(outputs=[crashes], tag='crashes'),
+        'test1': Transform([census], [volume]),
+        'test2': Transform([census, crashes], [crash_report]),
+    }
+    stages = [
+        Stage('test2', actions['test2'], inputs=[census, crashes], outputs=[crash_report],
+              config_keys=['YEARS']),
+        Stage('test1', actions['test1'], inputs=[census], outputs=[volume], config_keys=['BIAS']),
+        Stage('fetch_census', actions['fetch_census'], outputs=[census]),
+        Stage('fetch_crashes', actions['fetch_crashes'], outputs=[crashes]),
+    ]
+    pipeline = Pipeline(stages, state_path=tmp_path / 'state.json', log_dir=tmp_path / 'logs',
+                        config_module=settings)
+    return SimpleNamespace(pipeline=pipeline, actions=actions, settings=settings,
+                           census=census, crashes=crashes, volume=volume)
+
+
+def calls(toy):
+    return {name: action.calls for name, action in toy.actions.items()}
+
+
+def test_first_run_builds_everything_in_dependency_order(toy):
+    status = toy.pipeline.run(jobs=2)
+
+    assert status == dict.fromkeys(['fetch_census', 'fetch_crashes', 'test1', 'test2'], 'ran')
+    assert toy.pipeline.order.index('fetch_census') < toy.pipeline.order.index('test1')
+    assert (toy.volume.read_text(), (toy.volume.parent / 'crash.json').read_text()) == \
+        ('tracts', 'tractscrashes')
+
+
+def test_second_run_skips_everything(toy):
+    toy.pipeline.run()
+    status = toy.pipeline.run()
+
+    assert set(status.values()) == {'skipped'}
+    assert set(calls(toy).values()) == {1}
+
+
+def test_crash_refresh_rebuilds_only_crash_stages(toy):
+    toy.pipeline.run()
+    toy.actions['fetch_crashes'].tag = 'crashes+new'
+
+    status = toy.pipeline.run(['fetch_crashes'])
+
+    assert status == {'fetch_crashes': 'ran', 'test2': 'ran'}
+    assert calls(toy) == {'fetch_census': 1, 'fetch_crashes': 2, 'test1': 1, 'test2': 2}
+
+
+def test_refetch_with_identical_data_skips_downstream(toy):
+    toy.pipeline.run()
+
+    status = toy.pipeline.run(['fetch_crashes'])
+
+    assert status == {'fetch_crashes': 'ran', 'test2': 'skipped'}
+
+
+def test_config_change_reruns_only_stages_that_read_it(toy):
+    toy.pipeline.run()
+    toy.settings.BIAS = {'undercount': 0.30}
+
+    status = toy.pipeline.run()
+
+    assert [name for name, s in status.items() if s == 'ran'] == ['test1']
+
+
+def test_edited_or_missing_output_is_rebuilt(toy):
+    toy.pipeline.run()
+    toy.volume.write_text('hand edited')
+
+    assert toy.pipeline.plan() == {
+        'fetch_census': 'up to date', 'fetch_crashes': 'up to date',
+        'test1': 'volume.json modified', 'test2': 'up to date',
+    }
+    toy.pipeline.run()
+    assert toy.volume.read_text() == 'tracts'
+
+
+def test_independent_stages_run_concurrently(tmp_path):
+    # Each action waits for the other; run one after the other the barrier times out
+    barrier = threading.Barrier(2, timeout=5)
+    stages = [
+        Stage(name, Transform(outputs=[tmp_path / f'{name}.txt'], barrier=barrier),
+              outputs=[tmp_path / f'{name}.txt'])
+        for name in ('a', 'b')
+    ]
+    pipeline = Pipeline(stages, state_path=tmp_path / 'state.json', log_dir=tmp_path / 'logs')
+
+    assert pipeline.run(jobs=2) == {'a': 'ran', 'b': 'ran'}
+
+
+def test_failure_blocks_downstream_and_is_retried(toy):
+    toy.actions['fetch_census'].fail = True
+
+    status = toy.pipeline.run()
+
+    assert status['fetch_census'] == 'failed'
+    assert status['test1'] == status['test2'] == 'blocked'
+    assert status['fetch_crashes'] == 'ran'
+
+    toy.actions['fetch_census'].fail = False
+    status = toy.pipeline.run()
+    assert status == {'fetch_census': 'ran', 'fetch_crashes': 'skipped', 'test1': 'ran', 'test2': 'ran'}
+
+
+def test_fetch_without_fresh_sidecar_is_stale(tmp_path):
+    out = tmp_path / 'osm.json'
+    out.write_text('{}')
+    action = Transform(outputs=[out], tag='{}')
+    pipeline = Pipeline([Stage('fetch_osm', action, outputs=[out], max_age_days=7)],
+                        state_path=tmp_path / 'state.json', log_dir=tmp_path / 'logs')
+
+    pipeline.run()
+    # No freshness sidecar: never counts as fresh
+    assert pipeline.plan() == {'fetch_osm': 'stale'}
+
+
+def test_shared_outputs_and_cycles_are_rejected(tmp_path):
+    a, b = tmp_path / 'a', tmp_path / 'b'
+    with pytest.raises(ValueError, match='written by both'):
+        Pipeline([Stage('x', Transform(), outputs=[a]), Stage('y', Transform(), outputs=[a])])
+    with pytest.raises(ValueError, match='cycle'):
+        Pipeline([Stage('x', Transform(), inputs=[b], outputs=[a]),
+                  Stage('y', Transform(), inputs=[a], outputs=[b])])
+
+
+def _notebook(path, cells):
+    nb = {'cells': [{'cell_type': kind, 'metadata': {}, 'source': source.splitlines(True),
+                     **({'outputs': [], 'execution_count': None} if kind == 'code' else {})}
+                    for kind, source in cells],
+          'metadata': {}, 'nbformat': 4, 'nbformat_minor': 5}
+    path.write_text(json.dumps(nb))
+
+
+def test_notebook_task_runs_selected_sections(tmp_path):
+    nb = tmp_path / 'fetch.ipynb'
+    _notebook(nb, [
+        ('code', '%pip install -q geopandas'),
+        ('markdown', '## 1. Bootstrap'),
+        ('code', 'import colab_utils\nrepo = colab_utils.prepare_notebook()'),
+        ('markdown', '## 2. Write'),
+        ('code', "from config import CENSUS_VINTAGE\n(repo / 'out.txt').write_text(str(CENSUS_VINTAGE))"),
+        ('markdown', '## 3. Fail'),
+        ('code', "raise SystemExit(3)"),
+    ])
+    task = NotebookTask(nb, sections=['1', '2'], repo_root=tmp_path)
+
+    assert len(task.cells()) == 1
+    task(tmp_path / 'log.txt')
+    assert (tmp_path / 'out.txt').read_text().isdigit()
+
+    before = task.digest()
+    _notebook(nb, [('markdown', '## 2. Write'), ('code', "print('changed')"),
+                   ('markdown', '## 3. Fail'), ('code', 'raise SystemExit(3)')])
+    assert task.digest() != before
+
+    with pytest.raises(PipelineError, match='status 3'):
+        NotebookTask(nb, sections=['3'], repo_root=tmp_path)(tmp_path / 'log.txt')
+
+
+def test_editing_an_imported_module_invalidates_notebook_stages(tmp_path):
+    nb = tmp_path / 'test1.ipynb'
+    _notebook(nb, [('markdown', '## 1. Report'), ('code', "(repo / 'out.txt').write_text('ok')")])
+    utils_dir = tmp_path / 'utils'
+    utils_dir.mkdir()
+    (utils_dir / 'geospatial.py').write_text('QUANTIZATION = 1e5\n')
+    (utils_dir / '__pycache__').mkdir()
+    stage = Stage('test1', NotebookTask(nb, repo_root=tmp_path, code=[utils_dir]),
+                  outputs=[tmp_path / 'out.txt'])
+    pipeline = Pipeline([stage], state_path=tmp_path / 'state.json', log_dir=tmp_path / 'logs')
+    pipeline.run()
+    assert pipeline.plan() == {'test1': 'up to date'}
+
+    (utils_dir / '__pycache__' / 'geospatial.cpython-311.pyc').write_bytes(b'\0')
+    assert pipeline.plan() == {'test1': 'up to date'}
+
+    (utils_dir / 'geospatial.py').write_text('QUANTIZATION = 1e6\n')
+    assert pipeline.plan() != {'test1': 'up to date'}
+    assert pipeline.run() == {'test1': 'ran'}
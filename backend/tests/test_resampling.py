@@ -0,0 +1,135 @@
+"""
+Tests for bootstrap and permutation resampling utilities.
+"""
+
+import pytest
+import numpy as np
+import pandas as pd
+from utils.resampling import bootstrap_group_means, bootstrap_interval, bootstrap_gap, permutation_test
+from utils.demographic_analysis import equity_gap_analysis
+
+
+def test_bootstrap_group_means_shape_and_seed():
+    """Replicates are reproducible and independent of chunking."""
+    groups = [np.arange(10.0), np.arange(5.0) * 2]
+
+    a = bootstrap_group_means(groups, 2500, random_state=7)
+    b = bootstrap_group_means(groups, 2500, random_state=7)
+
+    assert a.shape == (2500, 2)
+    np.testing.assert_array_equal(a, b)
+    assert not np.array_equal(a, bootstrap_group_means(groups, 2500, random_state=8))
+    # Resampled means stay within each group's range
+    assert a[:, 0].min() >= 0 and a[:, 0].max() <= 9
+
+
+def test_bootstrap_group_means_process_pool_matches_serial():
+    """Running chunks in worker processes gives the same replicates."""
+    groups = [np.random.default_rng(0).normal(size=30), np.ones(4)]
+
+    serial = bootstrap_group_means(groups, 3000, random_state=1)
+    parallel = bootstrap_group_means(groups, 3000, random_state=1, n_jobs=2)
+
+    np.testing.assert_array_equal(serial, parallel)
+
+
+def test_bootstrap_interval_methods():
+    """Percentile and BCa intervals bracket the estimate; unknown methods raise."""
+    replicates = np.random.default_rng(0).normal(5, 1, 5000)
+
+    lo, hi = bootstrap_interval(replicates, 5.0, method='percentile')
+    assert lo == pytest.approx(3.04, abs=0.1) and hi == pytest.approx(6.96, abs=0.1)
+
+    lo_bca, hi_bca = bootstrap_interval(replicates, 5.0, method='bca', jackknife=np.linspace(4, 6, 20))
+    assert lo_bca < 5.0 < hi_bca
+
+    with pytest.raises(ValueError):
+        bootstrap_interval(replicates, 5.0, method='normal')
+
+
+def test_bootstrap_gap_covers_point_estimate():
+    """Gap intervals contain the observed gap and gap_pct."""
+    rng = np.random.default_rng(3)
+    best = rng.normal(10, 3, 20)
+    worst = rng.normal(-20, 5, 15)
+
+    result = bootstrap_gap(best, worst, 2000, random_state=0)
+    gap = best.mean() - worst.mean()
+
+    assert result['n_bootstrap'] == 2000 and result['ci_method'] == 'bca'
+    assert result['gap_ci'][0] < gap < result['gap_ci'][1]
+    assert result['gap_pct_ci'][0] < gap / worst.mean() * 100 < result['gap_pct_ci'][1]
+
+
+def test_equity_gap_analysis_bootstrap():
+    """Bootstrap intervals are added only when requested."""
+    df = pd.DataFrame({
+        'group': ['a'] * 6 + ['b'] * 6,
+        'metric': [10, 12, 9, 11, 13, 10, -5, -8, -6, -4, -7, -9],
+    })
+
+    plain = equity_gap_analysis(df, 'metric', 'group')
+    assert 'gap_ci' not in plain
+
+    gap = equity_gap_analysis(df, 'metric', 'group', n_bootstrap=1000, random_state=0)
+    assert gap['gap'] == plain['gap']
+    assert gap['gap_ci'][0] <= gap['gap'] <= gap['gap_ci'][1]
+    assert gap == equity_gap_analysis(df, 'metric', 'group', n_bootstrap=1000, random_state=0)
+
+
+def test_permutation_test_exact_two_groups():
+    """Exact test enumerates all C(6,3) splits; only the observed split and its mirror are as extreme."""
+    values = np.array([1.0, 2, 3, 10, 11, 12])
+    codes = np.array([0, 0, 0, 1, 1, 1])
+
+    result = permutation_test(values, codes, n_permutations=100)
+
+    assert result['exact'] is True
+    assert result['n_permutations'] == 20
+    assert result['statistic'] == pytest.approx(9.0)
+    assert result['p_value'] == pytest.approx(2 / 20)
+
+
+def test_permutation_test_exact_matches_chunking():
+    """Chunk size does not change the exact enumeration."""
+    values = np.array([3.0, 1, 4, 1, 5, 9, 2, 6])
+    codes = np.array([0, 0, 1, 1, 1, 2, 2, 2])
+
+    full = permutation_test(values, codes, n_permutations=10000)
+    chunked = permutation_test(values, codes, n_permutations=10000, chunk_size=7)
+
+    assert full['exact'] and full['n_permutations'] == 560
+    assert chunked == full
+
+
+def test_permutation_test_monte_carlo():
+    """Monte Carlo p-values are seeded and separate null from real differences."""
+    rng = np.random.default_rng(0)
+    codes = np.repeat([0, 1, 2, 3, 4], 14)
+
+    null = rng.normal(size=70)
+    result = permutation_test(null, codes, n_permutations=5000, random_state=1)
+    assert result['exact'] is False and result['n_permutations'] == 5000
+    assert result['p_value'] > 0.05
+    assert result == permutation_test(null, codes, n_permutations=5000, random_state=1)
+
+    shifted = null + codes * 0.8
+    assert permutation_test(shifted, codes, n_permutations=5000, random_state=1)['p_value'] < 0.001
+
+
+def test_equity_gap_analysis_permutation():
+    """The permutation test replaces the t-test p-value; unknown tests raise."""
+    df = pd.DataFrame({
+        'group': ['a'] * 6 + ['b'] * 6 + ['c'] * 6,
+        'metric': [10, 12, 9, 11, 13, 10, -5, -8, -6, -4, -7, -9, 1, 2, 0, 1, 3, 2],
+    })
+
+    gap = equity_gap_analysis(df, 'metric', 'group', test='permutation', n_permutations=2000, random_state=0)
+
+    assert gap['test'] == 'permutation'
+    assert gap['n_permutations'] == 2000
+    assert gap['p_value'] == pytest.approx(1 / 2001)
+    assert gap['statistically_significant']
+
+    with pytest.raises(ValueError):
+        equity_gap_analysis(df, 'metric', 'group', test='ranksum')
@@ -0,0 +1,120 @@
+"""
+Tests for the prepared census tract index.
+"""
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+from utils.tract_index import TractIndex, census_parquet_path, read_census, write_census_parquet
+from models.crash_predictor import CrashPredictionAuditor
+from models.demand_analyzer import SuppressedDemandAnalyzer
+
+
+def test_tract_index_from_gdf(sample_census_gdf):
+    """Test index arrays line up with the source frame."""
+    index = TractIndex.from_gdf(sample_census_gdf)
+
+    assert len(index) == len(sample_census_gdf)
+    assert list(index.tract_ids) == list(sample_census_gdf['tract_id'])
+    assert np.allclose(index.centroids[0], [0.5, 0.5])
+    assert np.allclose(index.bounds[0], [0, 0, 1, 1])
+    assert (index.area_km2 > 0).all()
+    assert list(index.columns['median_income']) == list(sample_census_gdf['median_income'])
+
+
+def test_tract_index_save_and_read(sample_census_gdf, tmp_path):
+    """Test saved index round-trips through memory-mapped arrays."""
+    index = TractIndex.from_gdf(sample_census_gdf, source_hash='abc')
+    index.save(tmp_path / 'idx')
+
+    loaded = TractIndex.read(tmp_path / 'idx')
+
+    assert loaded.source_hash == 'abc'
+    assert isinstance(loaded.area_km2, np.memmap)
+    assert np.allclose(loaded.area_km2, index.area_km2)
+    gdf = loaded.to_gdf()
+    assert gdf.geometry.geom_equals(sample_census_gdf.geometry).all()
+    assert list(gdf['tract_id']) == list(sample_census_gdf['tract_id'])
+
+
+def test_tract_index_keeps_nulls_and_column_order(sample_census_gdf, tmp_path):
+    """Missing text attributes stay missing and columns keep their order."""
+    gdf = sample_census_gdf.copy()
+    gdf['county'] = ['Durham', None, 'Durham', None, 'Durham']
+    gdf = gdf[['county', 'geometry', 'tract_id', 'median_income']]
+    TractIndex.from_gdf(gdf).save(tmp_path / 'idx')
+
+    restored = TractIndex.read(tmp_path / 'idx').to_gdf()
+
+    assert list(restored.columns) == list(gdf.columns)
+    assert restored['county'].isna().tolist() == [False, True, False, True, False]
+    assert restored['county'].iloc[0] == 'Durham'
+    assert restored.geometry.geom_equals(gdf.geometry).all()
+
+
+def test_tract_index_load_keyed_by_content(sample_census_gdf, tmp_path):
+    """Test cache entries are reused until the GeoJSON content changes."""
+    geojson = tmp_path / 'tracts.geojson'
+    cache_dir = tmp_path / 'cache'
+    sample_census_gdf.to_file(geojson, driver='GeoJSON')
+
+    first = TractIndex.load(geojson, cache_dir=cache_dir)
+    again = TractIndex.load(geojson, cache_dir=cache_dir)
+    assert again.source_hash == first.source_hash
+    assert len(list(cache_dir.iterdir())) == 1
+
+    sample_census_gdf.iloc[:3].to_file(geojson, driver='GeoJSON')
+    changed = TractIndex.load(geojson, cache_dir=cache_dir)
+    assert changed.source_hash != first.source_hash
+    assert len(changed) == 3
+
+
+def test_tract_index_locator(sample_census_gdf):
+    """Test index exposes a point-in-tract locator."""
+    index = TractIndex.from_gdf(sample_census_gdf)
+    assert list(index.locator.lookup([2.5], [0.5])) == ['003']
+    assert index.position_of(['005', 'zzz']).tolist() == [4, -1]
+
+
+def test_auditors_accept_tract_index(sample_census_gdf, sample_infrastructure_df, tmp_path):
+    """Test auditors can be built from a TractIndex instead of a GeoDataFrame."""
+    index = TractIndex.from_gdf(sample_census_gdf)
+
+    crash_csv = tmp_path / "crashes.csv"
+    crash_csv.write_text(
+        "CrashDate,CrashYear,Latitude,Longitude\n"
+        "2023-03-15,2023,0.5,0.5\n"
+        "2023-06-20,2023,0.5,1.5\n"
+    )
+    crash_auditor = CrashPredictionAuditor(index)
+    crash_by_tract = crash_auditor.load_real_crash_data(crash_csv)
+    assert crash_by_tract['crash_count'].sum() == 2
+    assert crash_auditor.tract_index is index
+
+    analyzer = SuppressedDemandAnalyzer(index, sample_infrastructure_df)
+    assert len(analyzer.census_gdf) == len(sample_census_gdf)
+
+
+def test_census_parquet_copy_matches_geojson(sample_census_gdf, tmp_path):
+    """The GeoParquet copy reads back as the same frame as the GeoJSON."""
+    geojson = tmp_path / 'tracts.geojson'
+    sample_census_gdf.to_file(geojson, driver='GeoJSON')
+    copy = write_census_parquet(geojson)
+
+    assert copy == census_parquet_path(geojson) == tmp_path / 'tracts.parquet'
+    pd.testing.assert_frame_equal(read_census(geojson), gpd.read_file(geojson))
+
+
+def test_read_census_ignores_stale_copy(sample_census_gdf, tmp_path):
+    """A copy made from an older GeoJSON is not read; a lone copy is."""
+    geojson = tmp_path / 'tracts.geojson'
+    sample_census_gdf.to_file(geojson, driver='GeoJSON')
+    write_census_parquet(geojson)
+    sample_census_gdf.iloc[:3].to_file(geojson, driver='GeoJSON')
+
+    assert len(read_census(geojson)) == 3
+
+    write_census_parquet(geojson)
+    geojson.unlink()
+    assert len(read_census(geojson)) == 3
+    assert len(TractIndex.load(geojson, cache_dir=tmp_path / 'cache')) == 3
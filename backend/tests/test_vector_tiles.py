@@ -0,0 +1,207 @@
+"""
+Tests for the static vector tile builder.
+"""
+
+import json
+import struct
+
+import pytest
+import numpy as np
+import geopandas as gpd
+from shapely.geometry import Point, Polygon
+from utils.vector_tiles import TileLayer, build_vector_tiles, encode_tile
+
+
+def _read_varint(buf, pos):
+    result = shift = 0
+    while True:
+        byte = buf[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return result, pos
+        shift += 7
+
+
+def _fields(buf):
+    """Yield (field, value) pairs of a protobuf message."""
+    pos = 0
+    while pos < len(buf):
+        key, pos = _read_varint(buf, pos)
+        field, wire = key >> 3, key & 0x7
+        if wire == 0:
+            value, pos = _read_varint(buf, pos)
+        elif wire == 1:
+            value, pos = buf[pos:pos + 8], pos + 8
+        else:
+            length, pos = _read_varint(buf, pos)
+            value, pos = buf[pos:pos + length], pos + length
+        yield field, value
+
+
+def _packed(buf):
+    values, pos = [], 0
+    while pos < len(buf):
+        value, pos = _read_varint(buf, pos)
+        values.append(value)
+    return values
+
+
+def _unzigzag(n):
+    return (n >> 1) ^ -(n & 1)
+
+
+def _decode_value(buf):
+    for field, value in _fields(buf):
+        if field == 1:
+            return value.decode()
+        if field == 3:
+            return struct.unpack('<d', value)[0]
+        if field == 5:
+            return value
+        if field == 6:
+            return _unzigzag(value)
+        if field == 7:
+            return bool(value)
+
+
+def _decode_geometry(commands):
+    """Return rings/points as lists of (x, y) and the number of ClosePath commands."""
+    parts, x, y, i, closes = [], 0, 0, 0, 0
+    while i < len(commands):
+        cmd, count = commands[i] & 0x7, commands[i] >> 3
+        i += 1
+        if cmd == 7:
+            closes += 1
+            continue
+        for _ in range(count):
+            x += _unzigzag(commands[i])
+            y += _unzigzag(commands[i + 1])
+            i += 2
+            if cmd == 1:
+                parts.append([(x, y)])
+            else:
+                parts[-1].append((x, y))
+    return parts, closes
+
+
+def decode_tile(data):
+    """Minimal MVT decoder: {layer: {'extent', 'features': [(type, parts, closes, props)]}}."""
+    layers = {}
+    for field, layer_buf in _fields(data):
+        assert field == 3
+        name, keys, values, raw, extent, version = None, [], [], [], None, None
+        for f, value in _fields(layer_buf):
+            if f == 1:
+                name = value.decode()
+            elif f == 2:
+                raw.append(value)
+            elif f == 3:
+                keys.append(value.decode())
+            elif f == 4:
+                values.append(_decode_value(value))
+            elif f == 5:
+                extent = value
+            elif f == 15:
+                version = value
+        features = []
+        for feature_buf in raw:
+            tags, geom_type, commands = [], None, []
+            for f, value in _fields(feature_buf):
+                if f == 2:
+                    tags = _packed(value)
+                elif f == 3:
+                    geom_type = value
+                elif f == 4:
+                    commands = _packed(value)
+            props = {keys[tags[i]]: values[tags[i + 1]] for i in range(0, len(tags), 2)}
+            parts, closes = _decode_geometry(commands)
+            features.append((geom_type, parts, closes, props))
+        layers[name] = {'version': version, 'extent': extent, 'features': features}
+    return layers
+
+
+def _signed_area(ring):
+    xs, ys = np.array(ring, dtype=float).T
+    return 0.5 * np.sum(xs * np.roll(ys, -1) - np.roll(xs, -1) * ys)
+
+
+def test_encode_tile_round_trip():
+    """Points, polygons and typed properties survive encoding; rings are reoriented."""
+    # Clockwise exterior, counter-clockwise hole: the reverse of what MVT wants
+    square = Polygon([(10, 10), (10, 100), (100, 100), (100, 10)], [[(40, 40), (60, 40), (60, 60), (40, 60)]])
+    data = encode_tile({
+        'tracts': {'geometries': [square], 'properties': [{'tract_id': '001', 'score': 0.5}]},
+        'crashes': {'geometries': [Point(5, 7)], 'properties': [{'year': 2023, 'fatal': True, 'delta': -3, 'note': None}]},
+    })
+    layers = decode_tile(data)
+
+    assert layers['tracts']['version'] == 2
+    assert layers['tracts']['extent'] == 4096
+    geom_type, rings, closes, props = layers['tracts']['features'][0]
+    assert geom_type == 3 and closes == 2
+    assert props == {'tract_id': '001', 'score': 0.5}
+    assert _signed_area(rings[0]) > 0 > _signed_area(rings[1])
+
+    geom_type, points, _, props = layers['crashes']['features'][0]
+    assert geom_type == 1 and points == [[(5, 7)]]
+    assert props == {'year': 2023, 'fatal': True, 'delta': -3}
+
+
+def _durham_like_layers():
+    tracts = gpd.GeoDataFrame({'tract_id': ['a', 'b']}, geometry=[
+        Polygon([(-78.95, 35.95), (-78.95, 36.0), (-78.9, 36.0), (-78.9, 35.95)]),
+        Polygon([(-78.9, 35.95), (-78.9, 36.0), (-78.85, 36.0), (-78.85, 35.95)]),
+    ], crs='EPSG:4326')
+    crashes = gpd.GeoDataFrame({'CrashID': [1, 2, 3], 'year': [2022, 2023, 2023]}, geometry=[
+        Point(-78.93, 35.97), Point(-78.87, 35.98), Point(-78.871, 35.981),
+    ], crs='EPSG:4326')
+    return [
+        TileLayer('tracts', tracts, ['tract_id']),
+        TileLayer('crashes', crashes, ['CrashID', 'year'], min_zoom=12),
+    ]
+
+
+def test_build_vector_tiles_pyramid(tmp_path):
+    """Every zoom has tract tiles; crash points only appear from their min zoom."""
+    out = tmp_path / 'tiles'
+    metadata = build_vector_tiles(_durham_like_layers(), out, min_zoom=8, max_zoom=13)
+
+    assert json.loads((out / 'metadata.json').read_text()) == metadata
+    assert metadata['tile_count'] == len(list(out.rglob('*.pbf')))
+    west, south, east, north = metadata['bounds']
+    assert west == pytest.approx(-78.95) and north == pytest.approx(36.0)
+
+    for zoom in range(8, 14):
+        tiles = list((out / str(zoom)).rglob('*.pbf'))
+        assert tiles
+        names = set().union(*(decode_tile(t.read_bytes()).keys() for t in tiles))
+        assert 'tracts' in names
+        assert ('crashes' in names) == (zoom >= 12)
+
+    crashes = [f for t in (out / '13').rglob('*.pbf')
+               for f in decode_tile(t.read_bytes()).get('crashes', {'features': []})['features']]
+    assert sorted(f[3]['CrashID'] for f in crashes) == [1, 2, 3]
+
+
+def test_build_vector_tiles_clips_to_buffer(tmp_path):
+    """Polygon coordinates stay within the tile extent plus buffer."""
+    out = tmp_path / 'tiles'
+    build_vector_tiles(_durham_like_layers()[:1], out, min_zoom=13, max_zoom=13, buffer=64)
+
+    for tile in out.rglob('*.pbf'):
+        for _, rings, _, _ in decode_tile(tile.read_bytes())['tracts']['features']:
+            coords = np.array([p for ring in rings for p in ring])
+            assert coords.min() >= -64 and coords.max() <= 4096 + 64
+
+
+def test_build_vector_tiles_replaces_previous_output(tmp_path):
+    """Stale tiles from an earlier run are removed."""
+    out = tmp_path / 'tiles'
+    stale = out / '20' / '0' / '0.pbf'
+    stale.parent.mkdir(parents=True)
+    stale.write_bytes(b'')
+
+    build_vector_tiles(_durham_like_layers(), out, min_zoom=8, max_zoom=8)
+    assert not stale.exists()
+    assert (out / 'metadata.json').exists()
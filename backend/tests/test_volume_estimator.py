@@ -71,6 +71,11 @@ def test_analyze_by_income(sample_census_gdf, sample_predictions_df):
     assert 'equity_gap' in results
     assert len(results['by_quintile']) > 0
 
+    # Counters in the poorest and richest tracts keep their census quintiles
+    ends = df[df['tract_id'].isin(['001', '005'])]
+    by_quintile = VolumeEstimationAuditor(sample_census_gdf, ends, ends).analyze_by_income()['by_quintile']
+    assert [(q['quintile'], q['count']) for q in by_quintile] == [(1, 1), (5, 1)]
+
 
 def test_enrich_predictions(sample_census_gdf, sample_predictions_df):
     """Test demographic enrichment of predictions."""
@@ -83,3 +88,29 @@ def test_enrich_predictions(sample_census_gdf, sample_predictions_df):
     assert 'median_income' in auditor.ai_predictions_df.columns
     assert 'pct_minority' in auditor.ai_predictions_df.columns
     assert auditor.ai_predictions_df['median_income'].notna().any()
+    assert auditor.ai_predictions_df['income_quintile'].tolist() == [1, 2, 3, 4, 5]
+
+
+def test_enrich_predictions_uses_census_breaks(sample_census_gdf, sample_predictions_df):
+    """Counters take the quintile of their tract among all census tracts."""
+    upper = sample_predictions_df.iloc[2:].reset_index(drop=True)
+    auditor = VolumeEstimationAuditor(sample_census_gdf, upper, upper)
+
+    assert auditor.ai_predictions_df['income_quintile'].tolist() == [3, 4, 5]
+
+
+def test_analyze_by_income_and_race(sample_census_gdf, sample_predictions_df):
+    """Intersection cells partition the counters and agree with the marginals."""
+    auditor = VolumeEstimationAuditor(
+        sample_census_gdf,
+        sample_predictions_df,
+        sample_predictions_df
+    )
+
+    cells = auditor.analyze_by_income_and_race()
+    by_income = auditor.analyze_by_income()['by_quintile']
+
+    assert sum(c['count'] for c in cells) == sum(q['count'] for q in by_income)
+    for quintile in by_income:
+        in_quintile = [c['count'] for c in cells if c['quintile'] == quintile['quintile']]
+        assert sum(in_quintile) == quintile['count']
@@ -0,0 +1,201 @@
+"""
+Change-aware writes of pipeline artifacts.
+
+The notebooks regenerate every output on each run, but a typical run
+changes only a few of them. ArtifactWriter serializes a payload once,
+compares its SHA-256 with the file already on disk and replaces the file
+(temp file + rename, so readers never see a partial write) only when the
+bytes differ. Unchanged files keep their mtime and stay out of the publish
+commit: the writer records which paths it changed, in the repo-relative
+form colab_utils.publish_artifacts takes.
+
+Files the dashboard fetches go through write_frontend_json: minified, floats
+rounded, with precompressed .gz/.br siblings for servers that serve them.
+data-manifest.json lists a content hash per file (content_hashes), which the
+client appends to each URL so a data refresh only invalidates what changed.
+"""
+
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+import math
+import os
+import tempfile
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Union
+
+from config import FRONTEND_JSON_SIGNIFICANT_DIGITS
+
+try:
+    import brotli
+except ImportError:  # optional; .br siblings are skipped without it
+    brotli = None
+
+PathLike = Union[str, Path]
+
+# Hex digits of SHA-256 kept in data-manifest.json and the client's URLs
+CONTENT_HASH_LENGTH = 12
+
+
+def dump_json(data, indent: Optional[int] = 2) -> bytes:
+    """Serialize to JSON bytes; indent=None gives the compact form."""
+    if indent is None:
+        return json.dumps(data, separators=(',', ':')).encode()
+    return json.dumps(data, indent=indent).encode()
+
+
+def round_floats(data, digits: int = FRONTEND_JSON_SIGNIFICANT_DIGITS):
+    """Copy of a JSON-like structure with floats cut to `digits` significant digits."""
+    if isinstance(data, float):
+        return float(f'{data:.{digits}g}') if math.isfinite(data) else data
+    if isinstance(data, dict):
+        return {key: round_floats(value, digits) for key, value in data.items()}
+    if isinstance(data, (list, tuple)):
+        return [round_floats(value, digits) for value in data]
+    return data
+
+
+def content_hash(payload: bytes) -> str:
+    """Short hex SHA-256 of payload, as used in the data manifest."""
+    return hashlib.sha256(payload).hexdigest()[:CONTENT_HASH_LENGTH]
+
+
+def content_hashes(directory: PathLike, pattern: str = '*.json',
+                   exclude: Iterable[str] = ()) -> Dict[str, str]:
+    """Content hash of each file in directory matching pattern, by file name."""
+    exclude = set(exclude)
+    return {
+        path.name: content_hash(path.read_bytes())
+        for path in sorted(Path(directory).glob(pattern))
+        if path.name not in exclude
+    }
+
+
+def compressed_siblings(path: PathLike) -> Dict[str, Path]:
+    """The precompressed copies write_frontend_json keeps next to path."""
+    path = Path(path)
+    return {'gzip': path.with_name(path.name + '.gz'), 'br': path.with_name(path.name + '.br')}
+
+
+def _same_content(path: Path, payload: bytes) -> bool:
+    try:
+        if path.stat().st_size != len(payload):
+            return False
+    except FileNotFoundError:
+        return False
+    return hashlib.sha256(path.read_bytes()).digest() == hashlib.sha256(payload).digest()
+
+
+def write_if_changed(path: PathLike, payload: bytes) -> bool:
+    """
+    Atomically replace path with payload unless it already holds those bytes.
+
+    Returns:
+        True if the file was written
+    """
+    path = Path(path)
+    if _same_content(path, payload):
+        return False
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f'.{path.name}-')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(payload)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+    return True
+
+
+class ArtifactWriter:
+    """
+    Writes artifacts through write_if_changed and remembers what changed.
+
+    Args:
+        repo_root: Directory that changed_paths() are made relative to
+
+    Attributes:
+        changed: Paths written because their content changed, in write order
+        unchanged: Paths left alone because they already held the content
+        removed: Paths deleted because they would be stale
+    """
+
+    def __init__(self, repo_root: PathLike):
+        self.repo_root = Path(repo_root)
+        self.changed: List[Path] = []
+        self.unchanged: List[Path] = []
+        self.removed: List[Path] = []
+
+    def write_bytes(self, path: PathLike, payload: bytes) -> bool:
+        """Write payload to path if it differs; returns whether it did."""
+        path = Path(path)
+        written = write_if_changed(path, payload)
+        (self.changed if written else self.unchanged).append(path)
+        return written
+
+    def remove(self, path: PathLike) -> bool:
+        """Delete path if it exists; returns whether it did."""
+        path = Path(path)
+        if not path.exists():
+            return False
+        path.unlink()
+        self.removed.append(path)
+        return True
+
+    def write_json(self, path: PathLike, data, indent: Optional[int] = 2) -> bool:
+        """Serialize data once and write it if it differs from the file."""
+        return self.write_bytes(path, dump_json(data, indent))
+
+    def write_frontend_json(self, path: PathLike, data,
+                            digits: Optional[int] = FRONTEND_JSON_SIGNIFICANT_DIGITS) -> str:
+        """
+        Write data as minified JSON plus .gz and (with brotli) .br siblings.
+
+        The siblings are only recompressed when the JSON changed or one is
+        missing; gzip gets a zero mtime so equal JSON gives equal bytes.
+
+        Args:
+            path: Destination .json file
+            data: JSON-serializable payload
+            digits: Significant digits kept in floats; None keeps them all
+
+        Returns:
+            Content hash of the JSON, as listed in data-manifest.json
+        """
+        path = Path(path)
+        payload = dump_json(data if digits is None else round_floats(data, digits), indent=None)
+        siblings = compressed_siblings(path)
+        changed = self.write_bytes(path, payload)
+
+        compressors = {'gzip': lambda b: gzip.compress(b, compresslevel=9, mtime=0)}
+        if brotli is not None:
+            compressors['br'] = brotli.compress
+        elif changed:
+            # A stale .br would be served in place of the new JSON
+            self.remove(siblings['br'])
+        for name, compress in compressors.items():
+            if changed or not siblings[name].exists():
+                self.write_bytes(siblings[name], compress(payload))
+            else:
+                self.unchanged.append(siblings[name])
+        return content_hash(payload)
+
+    def copy(self, src: PathLike, dst: PathLike) -> bool:
+        """Copy src's bytes to dst (no re-parse) if dst differs."""
+        return self.write_bytes(dst, Path(src).read_bytes())
+
+    def changed_paths(self) -> List[str]:
+        """Changed and removed paths relative to repo_root, for publish_artifacts."""
+        root = self.repo_root.resolve()
+        paths = [
+            Path(os.path.relpath(path.resolve(), root)).as_posix()
+            for path in [*self.changed, *self.removed]
+        ]
+        return list(dict.fromkeys(paths))
+
+    def summary(self) -> str:
+        summary = f"{len(self.changed)} changed, {len(self.unchanged)} unchanged"
+        return f"{summary}, {len(self.removed)} removed" if self.removed else summary
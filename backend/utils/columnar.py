@@ -0,0 +1,124 @@
+"""
+Columnar encoding of report tables.
+
+Reports dumped with to_dict(orient='records') repeat every key in every
+row. A Columns table stores one array per field instead:
+
+    {"type": "Columns", "length": 2,
+     "columns": {"tract_id": [0, 1], "cost": [150000, 80000]},
+     "encoded": ["tract_id"]}
+
+Columns listed in "encoded" hold positions in the report's top-level
+"tract_ids" list, so every tract id is written once per file however many
+tables mention it. Null ids stay null.
+
+Decoder contract (decode_report here, decodeReport in
+frontend/src/services/columnar.js): tables are found in object members at
+any depth, never inside arrays; each decodes to `length` records with the
+fields in column order, and the "tract_ids" member is dropped.
+"""
+
+from __future__ import annotations
+
+from typing import Dict, List
+
+import geopandas as gpd
+import pandas as pd
+
+from utils.geospatial import _column_to_geojson
+
+COLUMNS_TYPE = 'Columns'
+TRACT_IDS_KEY = 'tract_ids'
+
+
+def _is_records(value) -> bool:
+    """A non-empty list of dicts that all share the first one's keys."""
+    if not isinstance(value, list) or not value or not all(isinstance(row, dict) for row in value):
+        return False
+    keys = value[0].keys()
+    return all(row.keys() == keys for row in value)
+
+
+def columns_table(data) -> Dict:
+    """
+    Columns table from a DataFrame or a list of records with identical keys.
+
+    DataFrame columns are converted whole (ints stay ints, nulls become
+    None) and geometry columns are dropped.
+    """
+    if isinstance(data, pd.DataFrame):
+        columns = {
+            str(key): _column_to_geojson(column)
+            for key, column in data.items()
+            if not isinstance(column.dtype, gpd.array.GeometryDtype)
+        }
+        return {'type': COLUMNS_TYPE, 'length': len(data), 'columns': columns}
+    if not _is_records(data):
+        raise ValueError("Expected a DataFrame or a non-empty list of records with identical keys")
+    return {
+        'type': COLUMNS_TYPE,
+        'length': len(data),
+        'columns': {key: [row[key] for row in data] for key in data[0]},
+    }
+
+
+def columnar_report(report: Dict, id_column: str = 'tract_id') -> Dict:
+    """
+    Copy of report with every table stored as a Columns table.
+
+    DataFrames, lists of records and Columns tables found in dict members
+    (at any depth, not inside lists) are encoded, and their id_column is
+    moved into the shared "tract_ids" dictionary. Empty lists are left as
+    they are.
+    """
+    if TRACT_IDS_KEY in report:
+        raise ValueError(f"Report already has a {TRACT_IDS_KEY!r} member")
+    tract_ids: Dict[str, int] = {}
+
+    def encode_ids(table: Dict) -> Dict:
+        encoded = table.get('encoded', [])
+        if id_column not in table['columns'] or id_column in encoded:
+            return table
+        ids = [
+            None if tract_id is None else tract_ids.setdefault(str(tract_id), len(tract_ids))
+            for tract_id in table['columns'][id_column]
+        ]
+        return {**table, 'columns': {**table['columns'], id_column: ids}, 'encoded': [*encoded, id_column]}
+
+    def walk(value):
+        if isinstance(value, pd.DataFrame) or _is_records(value):
+            return encode_ids(columns_table(value))
+        if isinstance(value, dict):
+            if value.get('type') == COLUMNS_TYPE:
+                return encode_ids(value)
+            return {key: walk(member) for key, member in value.items()}
+        return value
+
+    encoded = walk(report)
+    if tract_ids:
+        encoded[TRACT_IDS_KEY] = list(tract_ids)
+    return encoded
+
+
+def decode_table(table: Dict, tract_ids: List[str] = ()) -> List[Dict]:
+    """Records of a Columns table, with encoded columns looked up in tract_ids."""
+    columns = dict(table['columns'])
+    for name in table.get('encoded', []):
+        columns[name] = [None if i is None else tract_ids[i] for i in columns[name]]
+    keys = list(columns)
+    rows = zip(*columns.values()) if keys else ((),) * table['length']
+    return [dict(zip(keys, row)) for row in rows]
+
+
+def decode_report(report: Dict) -> Dict:
+    """Inverse of columnar_report: tables back to lists of records."""
+    tract_ids = report.get(TRACT_IDS_KEY, [])
+
+    def walk(value):
+        if isinstance(value, dict):
+            if value.get('type') == COLUMNS_TYPE:
+                return decode_table(value, tract_ids)
+            return {key: walk(member) for key, member in value.items()}
+        return value
+
+    return walk({key: value for key, value in report.items() if key != TRACT_IDS_KEY})
@@ -0,0 +1,154 @@
+"""
+Columnar store for NCDOT non-motorist crash records.
+
+The fetched CSV is the published interchange format, but reading it means
+parsing every column of every year as strings. The store holds the same
+records as typed Parquet (low-cardinality text as dictionary-encoded
+categories) partitioned by CrashYear, so loaders read only the columns they
+need and only the partitions for the analysis years.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Iterable, Optional, Sequence
+
+import pandas as pd
+
+from config import CACHE_DIR
+from utils.tract_index import file_sha256
+
+CRASH_STORE_DIR = CACHE_DIR / 'crash_store'
+CRASH_STORE_FORMAT_VERSION = 1
+
+# Column types for the ArcGIS field names; any other column is stored as a category
+CRASH_COLUMN_TYPES = {
+    'CrashID': 'int64',
+    'CrashYear': 'int16',
+    'CrashHour': 'Int8',
+    'NM_Age': 'Int16',
+    'Latitude': 'float64',
+    'Longitude': 'float64',
+}
+CRASH_DATE_COLUMNS = ['CrashDate']
+CRASH_PARTITION_COLUMN = 'CrashYear'
+
+
+def _typed(df: pd.DataFrame) -> pd.DataFrame:
+    """Apply CRASH_COLUMN_TYPES, parse dates and categorize remaining text."""
+    df = df.copy()
+    for name in df.columns:
+        if name in CRASH_COLUMN_TYPES:
+            dtype = CRASH_COLUMN_TYPES[name]
+            values = df[name]
+            if dtype[0] in 'Ii' and not pd.api.types.is_numeric_dtype(values):
+                values = pd.to_numeric(values, errors='coerce')
+            df[name] = values.astype(dtype)
+        elif name in CRASH_DATE_COLUMNS:
+            df[name] = pd.to_datetime(df[name])
+        elif not pd.api.types.is_numeric_dtype(df[name]):
+            df[name] = df[name].astype('category')
+    return df
+
+
+def read_crash_csv(csv_path: Path, columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    """
+    Read the crash CSV with store column types.
+
+    Args:
+        csv_path: Path to ncdot_nonmotorist_durham.csv
+        columns: Columns to read (missing ones are skipped); default all
+    """
+    usecols = None if columns is None else (lambda name: name in columns)
+    return _typed(pd.read_csv(csv_path, usecols=usecols))
+
+
+def ingest_crash_csv(csv_path: Path, store_dir: Path = CRASH_STORE_DIR) -> dict:
+    """
+    Convert the crash CSV into a year-partitioned Parquet store, atomically.
+
+    Returns:
+        The store manifest (source hash, record count, years and columns)
+    """
+    store_dir = Path(store_dir)
+    store_dir.parent.mkdir(parents=True, exist_ok=True)
+    df = read_crash_csv(csv_path)
+
+    tmp_dir = Path(tempfile.mkdtemp(dir=store_dir.parent, prefix=f'.{store_dir.name}-'))
+    df.to_parquet(tmp_dir / 'data', partition_cols=[CRASH_PARTITION_COLUMN], index=False)
+
+    manifest = {
+        'format_version': CRASH_STORE_FORMAT_VERSION,
+        'source_hash': file_sha256(csv_path),
+        'record_count': len(df),
+        'years': sorted(int(y) for y in df[CRASH_PARTITION_COLUMN].unique()),
+        'columns': list(df.columns),
+    }
+    with open(tmp_dir / 'manifest.json', 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+    if store_dir.exists():
+        shutil.rmtree(store_dir)
+    os.replace(tmp_dir, store_dir)
+    return manifest
+
+
+def read_store_manifest(store_dir: Path) -> Optional[dict]:
+    """Manifest of a crash store, or None if there is no current-format store."""
+    path = Path(store_dir) / 'manifest.json'
+    if not path.exists():
+        return None
+    with open(path) as f:
+        manifest = json.load(f)
+    if manifest.get('format_version') != CRASH_STORE_FORMAT_VERSION:
+        return None
+    return manifest
+
+
+def ensure_crash_store(csv_path: Path, store_dir: Path = CRASH_STORE_DIR) -> Path:
+    """
+    Return a crash store matching the CSV, (re)ingesting it if the CSV changed.
+    """
+    manifest = read_store_manifest(store_dir)
+    if manifest is None or manifest.get('source_hash') != file_sha256(csv_path):
+        ingest_crash_csv(csv_path, store_dir)
+    return Path(store_dir)
+
+
+def read_crash_store(store_dir: Path, columns: Optional[Sequence[str]] = None,
+                     years: Optional[Iterable[int]] = None) -> pd.DataFrame:
+    """
+    Read crash records from the store.
+
+    Only the requested columns are decoded and, when years is given, only the
+    matching CrashYear partitions are opened.
+
+    Args:
+        store_dir: Store written by ingest_crash_csv
+        columns: Columns to read (missing ones are skipped); default all
+        years: CrashYear values to keep; default all
+
+    Returns:
+        DataFrame with store column types; CrashYear included when requested
+    """
+    manifest = read_store_manifest(store_dir)
+    if manifest is None:
+        raise FileNotFoundError(f"No crash store at {store_dir}. Run ingest_crash_csv first.")
+
+    available = manifest['columns']
+    if columns is not None:
+        columns = [name for name in columns if name in available]
+    filters = None
+    if years is not None:
+        filters = [(CRASH_PARTITION_COLUMN, 'in', [int(y) for y in years])]
+
+    df = pd.read_parquet(Path(store_dir) / 'data', columns=columns, filters=filters)
+    if CRASH_PARTITION_COLUMN in df.columns:
+        # Hive partition values come back as a dictionary column
+        df[CRASH_PARTITION_COLUMN] = df[CRASH_PARTITION_COLUMN].astype(CRASH_COLUMN_TYPES[CRASH_PARTITION_COLUMN])
+    order = [name for name in (columns or available) if name in df.columns]
+    return df[order].reset_index(drop=True)
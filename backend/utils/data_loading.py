@@ -1,22 +1,174 @@
 """Shared data-loading helpers used by pipeline scripts."""
 
+from __future__ import annotations
+
 import json
+import threading
+from collections import Counter
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Optional, Sequence
 
+import geopandas as gpd
 import pandas as pd
 
 from config import RAW_DATA_DIR
+from utils.crash_store import CRASH_STORE_DIR, ensure_crash_store, read_crash_store
+from utils.tract_index import TRACT_INDEX_CACHE_DIR, TractIndex, census_parquet_path
 
+# Columns each input must carry; a file missing one is rejected on load
+CENSUS_REQUIRED_COLUMNS = ('median_income', 'pct_minority', 'total_population')
+CRASH_REQUIRED_COLUMNS = ('CrashID', 'CrashYear', 'Latitude', 'Longitude')
+TRACT_TABLE_REQUIRED_COLUMNS = {
+    'infrastructure': ('osm_infrastructure_score',),
+    'tdi': ('tdi_score_county',),
+    'bus_stops': ('stop_count',),
+}
 
-def load_infrastructure_data() -> pd.DataFrame:
-    """Load OSM infrastructure scores from the raw data directory."""
-    infra_path = RAW_DATA_DIR / 'osm_infrastructure.json'
-    if not infra_path.exists():
-        raise FileNotFoundError(
-            f"Infrastructure data not found at {infra_path}. "
-            "Run fetch_osm_infrastructure.py first."
-        )
-
-    with open(infra_path) as f:
+
+def _check_columns(df: pd.DataFrame, required: Iterable[str], source: Path) -> None:
+    missing = [name for name in required if name not in df.columns]
+    if missing:
+        raise ValueError(f"{source} is missing column(s): {', '.join(missing)}")
+
+
+def _read_tract_table(path: Path, required: Sequence[str]) -> pd.DataFrame:
+    """The 'tracts' records of a per-tract JSON file written by 01_fetch_data."""
+    if not path.exists():
+        raise FileNotFoundError(f"{path.name} not found at {path}. Run 01_fetch_data.ipynb first.")
+    with open(path) as f:
         data = json.load(f)
+    df = pd.DataFrame(data['tracts'])
+    _check_columns(df, ('tract_id', *required), path)
+    df['tract_id'] = df['tract_id'].astype(str)
+    if df['tract_id'].duplicated().any():
+        raise ValueError(f"{path} has duplicate tract_id rows")
+    return df
+
+
+class PipelineContext:
+    """
+    Raw pipeline inputs, loaded lazily and at most once per process.
+
+    The first access to a dataset reads and validates its file; later
+    accesses return the memoized copy. Consumers get views rather than the
+    memoized frames: census_gdf() materializes a fresh GeoDataFrame from the
+    (read-only) tract index, and tables come back as shallow copies, so an
+    auditor adding or replacing columns never affects the next one. In-place
+    edits to existing values would leak, which none of the auditors make.
+
+    Args:
+        raw_data_dir: Directory holding the files written by 01_fetch_data
+        crash_store_dir: Parquet store derived from the crash CSV
+        tract_index_cache_dir: Cache of prepared census tract indexes
+
+    Attributes:
+        load_counts: Number of times each dataset was actually read from disk
+    """
+
+    _shared: Dict[Path, 'PipelineContext'] = {}
+    _shared_lock = threading.Lock()
+
+    def __init__(self, raw_data_dir: Path = RAW_DATA_DIR, crash_store_dir: Path = CRASH_STORE_DIR,
+                 tract_index_cache_dir: Path = TRACT_INDEX_CACHE_DIR):
+        self.raw_data_dir = Path(raw_data_dir)
+        self.crash_store_dir = Path(crash_store_dir)
+        self.tract_index_cache_dir = Path(tract_index_cache_dir)
+        self.load_counts = Counter()
+        self._datasets = {}
+        self._lock = threading.RLock()
+
+    @classmethod
+    def shared(cls, raw_data_dir: Path = RAW_DATA_DIR) -> 'PipelineContext':
+        """The process-wide context for a raw data directory."""
+        key = Path(raw_data_dir).resolve()
+        with cls._shared_lock:
+            if key not in cls._shared:
+                cls._shared[key] = cls(raw_data_dir)
+            return cls._shared[key]
+
+    @property
+    def census_path(self) -> Path:
+        return self.raw_data_dir / 'durham_census_tracts.geojson'
 
-    return pd.DataFrame(data['tracts'])
+    @property
+    def crash_csv_path(self) -> Path:
+        return self.raw_data_dir / 'ncdot_nonmotorist_durham.csv'
+
+    def _memoized(self, name: str, load: Callable):
+        with self._lock:
+            if name not in self._datasets:
+                self._datasets[name] = load()
+                self.load_counts[name] += 1
+            return self._datasets[name]
+
+    def _load_tract_index(self) -> TractIndex:
+        if not self.census_path.exists() and not census_parquet_path(self.census_path).exists():
+            raise FileNotFoundError(
+                f"Census data not found at {self.census_path}. Run 01_fetch_data.ipynb first."
+            )
+        index = TractIndex.load(self.census_path, cache_dir=self.tract_index_cache_dir)
+        if len(index) == 0:
+            raise ValueError(f"{self.census_path} has no tracts")
+        missing = [name for name in CENSUS_REQUIRED_COLUMNS if name not in index.columns]
+        if missing:
+            raise ValueError(f"{self.census_path} is missing column(s): {', '.join(missing)}")
+        if pd.Index(index.tract_ids).has_duplicates:
+            raise ValueError(f"{self.census_path} has duplicate tract_id rows")
+        return index
+
+    @property
+    def tract_index(self) -> TractIndex:
+        """Prepared census tracts; pass this to the auditors."""
+        return self._memoized('census', self._load_tract_index)
+
+    def census_gdf(self) -> gpd.GeoDataFrame:
+        """A census GeoDataFrame of its own, built from the shared tract index."""
+        return self.tract_index.to_gdf()
+
+    def _load_crashes(self) -> pd.DataFrame:
+        if not self.crash_csv_path.exists():
+            raise FileNotFoundError(
+                f"Crash CSV not found at {self.crash_csv_path}. Run 01_fetch_data.ipynb first."
+            )
+        store = ensure_crash_store(self.crash_csv_path, self.crash_store_dir)
+        df = read_crash_store(store)
+        _check_columns(df, CRASH_REQUIRED_COLUMNS, self.crash_csv_path)
+        return df
+
+    def crashes(self, columns: Optional[Sequence[str]] = None,
+                years: Optional[Iterable[int]] = None) -> pd.DataFrame:
+        """
+        NCDOT crash records (store column types), optionally narrowed.
+
+        Args:
+            columns: Columns to keep (missing ones are skipped); default all
+            years: CrashYear values to keep; default all
+        """
+        df = self._memoized('crashes', self._load_crashes)
+        if years is not None:
+            df = df[df['CrashYear'].isin([int(y) for y in years])].reset_index(drop=True)
+        if columns is not None:
+            df = df[[name for name in columns if name in df.columns]]
+        return df.copy(deep=False)
+
+    def _table(self, name: str, filename: str) -> pd.DataFrame:
+        df = self._memoized(name, lambda: _read_tract_table(
+            self.raw_data_dir / filename, TRACT_TABLE_REQUIRED_COLUMNS[name]))
+        return df.copy(deep=False)
+
+    def infrastructure(self) -> pd.DataFrame:
+        """Per-tract OSM infrastructure counts, densities and scores."""
+        return self._table('infrastructure', 'osm_infrastructure.json')
+
+    def tdi(self) -> pd.DataFrame:
+        """Per-tract NCDOT Transportation Disadvantage Index scores."""
+        return self._table('tdi', 'tdi_scores.json')
+
+    def bus_stops(self) -> pd.DataFrame:
+        """Per-tract GoDurham bus stop counts."""
+        return self._table('bus_stops', 'bus_stops.json')
+
+
+def load_infrastructure_data() -> pd.DataFrame:
+    """Load OSM infrastructure scores from the raw data directory (once per process)."""
+    return PipelineContext.shared().infrastructure()
@@ -7,45 +7,81 @@ import numpy as np
 import pandas as pd
 from scipy import stats
 
-def calculate_income_quintiles(df, income_column='median_income'):
+from utils.inequality import inequality_indexes
+from utils.resampling import bootstrap_gap, permutation_test
+
+MINORITY_CATEGORY_BREAKS = [30, 60]
+MINORITY_CATEGORY_LABELS = ['Low (<30%)', 'Medium (30-60%)', 'High (>60%)']
+
+def income_quintile_breaks(income):
+    """
+    Inner quintile boundaries (20th/40th/60th/80th percentiles), ignoring NaNs.
+
+    Compute these once from the census tracts and pass them to
+    classify_income_quintiles so every test bins incomes the same way.
+    """
+    income = np.asarray(income, dtype=float)
+    if np.isnan(income).all():
+        return np.full(4, np.nan)
+    return np.nanquantile(income, [0.2, 0.4, 0.6, 0.8])
+
+def classify_income_quintiles(income, breaks=None, labels=None):
+    """
+    Assign income quintiles to an array of incomes.
+
+    Bins are right-closed like pd.qcut: a value equal to a breakpoint falls in
+    the lower quintile, so tied incomes always share a quintile.
+
+    Args:
+        income: Array-like of incomes (NaN allowed)
+        breaks: Four inner breakpoints (default: computed from income)
+        labels: Optional five labels, e.g. QUINTILE_LABELS
+
+    Returns:
+        Float array of 1-5 with NaN for missing income, or an ordered
+        pd.Categorical of labels when labels are given
+    """
+    income = np.asarray(income, dtype=float)
+    if breaks is None:
+        breaks = income_quintile_breaks(income)
+    codes = np.searchsorted(np.asarray(breaks, dtype=float), income, side='left')
+    missing = np.isnan(income)
+    if labels is not None:
+        return pd.Categorical.from_codes(np.where(missing, -1, codes), categories=labels, ordered=True)
+    return np.where(missing, np.nan, codes + 1.0)
+
+def classify_minority_category(pct_minority):
+    """
+    Categorize minority percentages as Low (<30), Medium (30-60) or High (>=60).
+
+    Returns:
+        Object array of category labels, None for missing values
+    """
+    pct = np.asarray(pct_minority, dtype=float)
+    codes = np.searchsorted(MINORITY_CATEGORY_BREAKS, pct, side='right')
+    categories = np.array(MINORITY_CATEGORY_LABELS, dtype=object)[np.minimum(codes, len(MINORITY_CATEGORY_LABELS) - 1)]
+    categories[np.isnan(pct)] = None
+    return categories
+
+def calculate_income_quintiles(df, income_column='median_income', breaks=None):
     """
     Assign income quintiles (1=lowest, 5=highest)
+
+    Returns a new frame with an income_quintile column; df is not modified.
+    Pass breaks (see income_quintile_breaks) to reuse census-level boundaries.
     """
-    quintiles = df[income_column].quantile([0.2, 0.4, 0.6, 0.8])
-
-    def get_quintile(income):
-        if pd.isna(income):
-            return None
-        if income <= quintiles[0.2]:
-            return 1
-        elif income <= quintiles[0.4]:
-            return 2
-        elif income <= quintiles[0.6]:
-            return 3
-        elif income <= quintiles[0.8]:
-            return 4
-        else:
-            return 5
-
-    df['income_quintile'] = df[income_column].apply(get_quintile)
-    return df
+    quintiles = classify_income_quintiles(df[income_column], breaks)
+    if not np.isnan(quintiles).any():
+        quintiles = quintiles.astype(int)
+    return df.assign(income_quintile=quintiles)
 
 def calculate_minority_category(df, minority_column='pct_minority'):
     """
     Categorize areas by minority percentage
+
+    Returns a new frame with a minority_category column; df is not modified.
     """
-    def get_category(pct):
-        if pd.isna(pct):
-            return None
-        if pct < 30:
-            return 'Low (<30%)'
-        elif pct < 60:
-            return 'Medium (30-60%)'
-        else:
-            return 'High (>60%)'
-
-    df['minority_category'] = df[minority_column].apply(get_category)
-    return df
+    return df.assign(minority_category=classify_minority_category(df[minority_column]))
 
 def calculate_error_metrics(true_values, predicted_values):
     """
@@ -80,10 +116,97 @@ def calculate_r_squared(true_values, predicted_values):
     ss_res = np.sum((true_values - predicted_values) ** 2)
     return float(1.0 - ss_res / ss_tot)
 
-def equity_gap_analysis(df, metric_column, group_column):
+def grouped_error_metrics(true_values, predicted_values, groups):
+    """
+    Calculate calculate_error_metrics for every group in one pass
+
+    Rows are reduced with np.bincount over integer group codes instead of
+    filtering the data once per group. Rows whose group is missing are
+    dropped, as in DataFrame.groupby.
+
+    Args:
+        true_values: Array-like of observed values
+        predicted_values: Array-like of predicted values
+        groups: Group labels, or a list of label arrays to stratify by their
+            intersection (e.g. [income_quintile, minority_category])
+
+    Returns:
+        DataFrame indexed by group (a MultiIndex for intersections), sorted,
+        with a count column plus the calculate_error_metrics keys
+    """
+    true_values = np.asarray(true_values, dtype=float)
+    predicted_values = np.asarray(predicted_values, dtype=float)
+
+    if isinstance(groups, (list, tuple)):
+        # Factorize each level, then combine the level codes into one key
+        levels = [pd.factorize(np.asarray(g), sort=True) for g in groups]
+        level_codes = [c for c, _ in levels]
+        shape = tuple(max(len(u), 1) for _, u in levels)
+        valid = np.logical_and.reduce([c >= 0 for c in level_codes])
+        flat = np.ravel_multi_index([c[valid] for c in level_codes], shape)
+        present, inverse = np.unique(flat, return_inverse=True)
+        codes = np.full(len(valid), -1, dtype=np.int64)
+        codes[valid] = inverse
+        uniques = pd.MultiIndex(
+            levels=[u for _, u in levels],
+            codes=np.unravel_index(present, shape),
+        )
+    else:
+        codes, uniques = pd.factorize(np.asarray(groups), sort=True)
+        uniques = pd.Index(uniques)
+
+    keep = codes >= 0
+    codes = codes[keep]
+    true_values = true_values[keep]
+    predicted_values = predicted_values[keep]
+    n_groups = len(uniques)
+
+    def group_sum(values):
+        return np.bincount(codes, weights=values, minlength=n_groups)
+
+    counts = np.bincount(codes, minlength=n_groups).astype(float)
+    errors = predicted_values - true_values
+    pct_errors = (errors / true_values) * 100
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean_error = group_sum(errors) / counts
+        mean_pct_error = group_sum(pct_errors) / counts
+        true_mean = group_sum(true_values) / counts
+        ss_res = group_sum(errors ** 2)
+        ss_tot = group_sum((true_values - true_mean[codes]) ** 2)
+        close = np.abs(errors) <= 1e-8 + 1e-5 * np.abs(true_values)
+        all_close = group_sum(~close) == 0
+
+        result = pd.DataFrame({
+            'count': counts.astype(int),
+            'mae': group_sum(np.abs(errors)) / counts,
+            'mape': group_sum(np.abs(pct_errors)) / counts,
+            'rmse': np.sqrt(ss_res / counts),
+            'mean_error': mean_error,
+            'mean_pct_error': mean_pct_error,
+            'bias': mean_pct_error,  # Positive = overestimate
+            'r_squared': np.where(ss_tot == 0, all_close.astype(float), 1.0 - ss_res / ss_tot),
+        }, index=uniques)
+
+    return result
+
+def equity_gap_analysis(df, metric_column, group_column, n_bootstrap=0, confidence=0.95,
+                        ci_method='bca', random_state=None, n_jobs=None,
+                        test='ttest', n_permutations=10000):
     """
     Calculate equity gaps between demographic groups
 
+    Args:
+        test: Significance test, 'ttest' (best vs worst group) or
+            'permutation' (range of all group means, see permutation_test)
+        n_permutations: Monte Carlo permutations for the permutation test
+        n_bootstrap: Replicates for confidence intervals on gap and gap_pct
+            (0 skips the bootstrap)
+        confidence: Interval coverage
+        ci_method: 'bca' or 'percentile'
+        random_state: Bootstrap seed
+        n_jobs: Worker processes for the bootstrap
+
     Returns:
         dict with gap analysis between highest and lowest performing groups
     """
@@ -102,9 +225,19 @@ def equity_gap_analysis(df, metric_column, group_column):
     best_data = df[df[group_column] == best_group][metric_column]
     worst_data = df[df[group_column] == worst_group][metric_column]
 
-    t_stat, p_value = stats.ttest_ind(best_data, worst_data)
-
-    return {
+    if test == 'ttest':
+        t_stat, p_value = stats.ttest_ind(best_data, worst_data)
+    elif test == 'permutation':
+        observed = df[[group_column, metric_column]].dropna()
+        codes, _ = pd.factorize(observed[group_column], sort=True)
+        permutation = permutation_test(
+            observed[metric_column].to_numpy(), codes, n_permutations, random_state=random_state,
+        )
+        p_value = permutation['p_value']
+    else:
+        raise ValueError(f"Unknown significance test: {test!r}")
+
+    result = {
         'best_group': str(best_group),
         'worst_group': str(worst_group),
         'best_group_mean': float(grouped.loc[best_group, 'mean']),
@@ -113,7 +246,18 @@ def equity_gap_analysis(df, metric_column, group_column):
         'gap_pct': float(gap_pct),
         'statistically_significant': bool(p_value < 0.05),
         'p_value': float(p_value),
+        'test': test,
     }
+    if test == 'permutation':
+        result['n_permutations'] = permutation['n_permutations']
+
+    if n_bootstrap:
+        result.update(bootstrap_gap(
+            best_data.dropna().to_numpy(), worst_data.dropna().to_numpy(), n_bootstrap,
+            confidence=confidence, method=ci_method, random_state=random_state, n_jobs=n_jobs,
+        ))
+
+    return result
 
 def disparate_impact_ratio(favorable_outcome_rate_protected, favorable_outcome_rate_reference):
     """
@@ -183,26 +327,27 @@ def racial_crash_baseline(census_gdf, crash_df, analysis_years, source_label):
 def calculate_gini_coefficient(values):
     """
     Calculate Gini coefficient (0=perfect equality, 1=perfect inequality)
+
+    Unweighted and for a single vector; see utils.inequality for population
+    weights and for scoring many vectors at once.
     """
-    values = np.array(values)
+    values = np.array(values, dtype=float)
     values = values[~np.isnan(values)]
 
     if len(values) == 0:
         return None
 
-    values = np.sort(values)
-    n = len(values)
-    index = np.arange(1, n + 1)
-
-    gini = (2 * np.sum(index * values)) / (n * np.sum(values)) - (n + 1) / n
-
-    return float(gini)
+    return inequality_indexes(values)['gini']
 
 def demographic_stratified_analysis(df, metric_column, income_column='median_income',
-                                    minority_column='pct_minority'):
+                                    minority_column='pct_minority', n_bootstrap=0, random_state=None,
+                                    test='ttest', n_permutations=10000):
     """
     Perform stratified analysis by income and race
 
+    Pass n_bootstrap to add bootstrap confidence intervals to the equity gaps,
+    and test='permutation' to test them by permutation (see equity_gap_analysis).
+
     Returns summary statistics for each demographic segment
     """
     df = calculate_income_quintiles(df, income_column)
@@ -214,27 +359,31 @@ def demographic_stratified_analysis(df, metric_column, income_column='median_inc
         'overall': {}
     }
 
-    # By income quintile
-    for quintile in [1, 2, 3, 4, 5]:
-        subset = df[df['income_quintile'] == quintile]
-        if len(subset) > 0:
-            results['by_income_quintile'][f'Q{quintile}'] = {
-                'mean': float(subset[metric_column].mean()),
-                'std': float(subset[metric_column].std()),
-                'count': int(len(subset)),
-                'median': float(subset[metric_column].median()),
+    def summarize(group_column):
+        # One groupby per stratification instead of one mask per group
+        stats_by_group = df.groupby(group_column)[metric_column].agg(['mean', 'std', 'size', 'median'])
+        return {
+            group: {
+                'mean': float(row['mean']),
+                'std': float(row['std']),
+                'count': int(row['size']),
+                'median': float(row['median']),
             }
+            for group, row in stats_by_group.iterrows()
+        }
+
+    # By income quintile
+    results['by_income_quintile'] = {
+        f'Q{int(quintile)}': summary
+        for quintile, summary in summarize('income_quintile').items()
+    }
 
     # By minority category
-    for category in ['Low (<30%)', 'Medium (30-60%)', 'High (>60%)']:
-        subset = df[df['minority_category'] == category]
-        if len(subset) > 0:
-            results['by_minority_category'][category] = {
-                'mean': float(subset[metric_column].mean()),
-                'std': float(subset[metric_column].std()),
-                'count': int(len(subset)),
-                'median': float(subset[metric_column].median()),
-            }
+    by_category = summarize('minority_category')
+    results['by_minority_category'] = {
+        category: by_category[category]
+        for category in MINORITY_CATEGORY_LABELS if category in by_category
+    }
 
     # Overall
     results['overall'] = {
@@ -245,8 +394,14 @@ def demographic_stratified_analysis(df, metric_column, income_column='median_inc
     }
 
     # Calculate equity gaps
-    income_gap = equity_gap_analysis(df, metric_column, 'income_quintile')
-    minority_gap = equity_gap_analysis(df, metric_column, 'minority_category')
+    gap_options = {
+        'n_bootstrap': n_bootstrap,
+        'random_state': random_state,
+        'test': test,
+        'n_permutations': n_permutations,
+    }
+    income_gap = equity_gap_analysis(df, metric_column, 'income_quintile', **gap_options)
+    minority_gap = equity_gap_analysis(df, metric_column, 'minority_category', **gap_options)
 
     results['equity_gaps'] = {
         'income': income_gap,
@@ -51,3 +51,29 @@ def read_meta(data_file: Path) -> Optional[dict]:
         return None
     with open(path) as f:
         return json.load(f)
+
+
+def response_validators(data_file: Path, name: str) -> Optional[dict]:
+    """HTTP validators stored for one of a data file's source responses."""
+    meta = read_meta(data_file) if data_file.exists() else None
+    if not meta:
+        return None
+    return meta.get('responses', {}).get(name)
+
+
+def mark_fresh(data_file: Path, responses: Optional[dict] = None) -> dict:
+    """
+    Record a fetch that found the source unchanged.
+
+    Only the sidecar is rewritten: fetched_at moves to now and any updated
+    response validators are merged in, while the data file (and so anything
+    keyed on its contents or mtime downstream) is left alone.
+    """
+    meta = read_meta(data_file) or {}
+    meta['fetched_at'] = datetime.now(timezone.utc).isoformat()
+    if responses:
+        meta['responses'] = {**meta.get('responses', {}), **responses}
+
+    with open(meta_path_for(data_file), 'w') as f:
+        json.dump(meta, f, indent=2)
+    return meta
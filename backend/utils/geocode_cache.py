@@ -0,0 +1,119 @@
+"""
+Persistent CrashID -> tract_id geocoding cache.
+
+Historic crashes never move, so once a CrashID has been placed in a tract
+the answer can be reused until the tract geometries change. Each cache file
+is named after the tract geometry hash; a new tract vintage starts a new
+file and removes the old one. Records are also re-geocoded if NCDOT revises
+their coordinates.
+"""
+
+from __future__ import annotations
+
+import os
+import tempfile
+from pathlib import Path
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+
+from config import CACHE_DIR
+
+GEOCODE_CACHE_DIR = CACHE_DIR / 'geocode'
+
+
+def _same_coordinates(cached: np.ndarray, current: np.ndarray) -> np.ndarray:
+    """Elementwise equality where two missing coordinates also match."""
+    return (cached == current) | (np.isnan(cached) & np.isnan(current))
+
+
+class CrashGeocodeCache:
+    """
+    CrashID -> tract_id mapping for one set of tract geometries.
+
+    Attributes:
+        hits: Records answered from the cache by the last lookup
+        misses: Records geocoded by the last lookup
+    """
+
+    def __init__(self, geometry_hash: str, cache_dir: Path = GEOCODE_CACHE_DIR):
+        self.cache_dir = Path(cache_dir)
+        self.path = self.cache_dir / f'crash_tracts-{geometry_hash[:16]}.parquet'
+        self.hits = 0
+        self.misses = 0
+
+    def _read(self) -> pd.DataFrame:
+        if not self.path.exists():
+            return pd.DataFrame({
+                'CrashID': pd.Series(dtype='int64'),
+                'longitude': pd.Series(dtype='float64'),
+                'latitude': pd.Series(dtype='float64'),
+                'tract_id': pd.Series(dtype=object),
+            })
+        return pd.read_parquet(self.path)
+
+    def _write(self, table: pd.DataFrame):
+        """Replace the cache file atomically and drop files for other geometries."""
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, prefix=f'.{self.path.name}-')
+        os.close(fd)
+        table.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, self.path)
+        for stale in self.cache_dir.glob('crash_tracts-*.parquet'):
+            if stale != self.path:
+                stale.unlink()
+
+    def lookup(self, crash_ids, lons, lats,
+               geocode: Callable[[np.ndarray, np.ndarray], np.ndarray]) -> np.ndarray:
+        """
+        Tract id for each crash, geocoding only unseen or moved CrashIDs.
+
+        Crashes without coordinates or outside every tract are cached as
+        None like any other answer, so they are not geocoded again.
+
+        Args:
+            crash_ids: CrashID per record
+            lons, lats: Coordinates per record
+            geocode: Called with the coordinates of cache misses; returns
+                their tract ids (None outside every tract), e.g.
+                TractLocator.lookup
+
+        Returns:
+            Object array of tract ids (None outside every tract)
+        """
+        crash_ids = np.asarray(crash_ids, dtype=np.int64)
+        lons = np.asarray(lons, dtype=float)
+        lats = np.asarray(lats, dtype=float)
+
+        table = self._read()
+        positions = pd.Index(table['CrashID']).get_indexer(crash_ids)
+        hit = positions >= 0
+        cached = positions[hit]
+        hit[hit] = (
+            _same_coordinates(table['longitude'].to_numpy()[cached], lons[hit])
+            & _same_coordinates(table['latitude'].to_numpy()[cached], lats[hit])
+        )
+
+        cached_tracts = table['tract_id'].astype(object)
+        cached_tracts = cached_tracts.where(cached_tracts.notna(), None).to_numpy()
+        tract_ids = np.empty(len(crash_ids), dtype=object)
+        tract_ids[hit] = cached_tracts[positions[hit]]
+
+        miss = ~hit
+        self.hits, self.misses = int(hit.sum()), int(miss.sum())
+        if self.misses:
+            tract_ids[miss] = geocode(lons[miss], lats[miss])
+            delta = pd.DataFrame({
+                'CrashID': crash_ids[miss],
+                'longitude': lons[miss],
+                'latitude': lats[miss],
+                'tract_id': tract_ids[miss],
+            }).drop_duplicates('CrashID', keep='last')
+            table = pd.concat(
+                [table[~table['CrashID'].isin(delta['CrashID'])], delta],
+                ignore_index=True,
+            )
+            self._write(table)
+
+        return tract_ids
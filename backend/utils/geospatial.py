@@ -3,15 +3,379 @@ Geospatial utility functions for processing Durham GeoJSON data
 """
 
 import json
+from contextlib import nullcontext
+from pathlib import Path
 import numpy as np
 import pandas as pd
 import geopandas as gpd
-from shapely.geometry import Point
+import shapely
+from shapely import STRtree
+
+from utils.artifacts import ArtifactWriter
+
+try:
+    import orjson
+except ImportError:  # optional fast JSON backend
+    orjson = None
 
 def geojson_to_dict(gdf):
     """Convert GeoDataFrame to GeoJSON dict"""
     return json.loads(gdf.to_json())
 
+def _json_dumps(backend):
+    """Return a compact str-producing JSON encoder for the requested backend."""
+    if backend == 'auto':
+        backend = 'orjson' if orjson is not None else 'json'
+    if backend == 'orjson':
+        if orjson is None:
+            raise ImportError("orjson is not installed; use json_backend='json'")
+        return lambda obj: orjson.dumps(obj).decode()
+    if backend == 'json':
+        return lambda obj: json.dumps(obj, separators=(',', ':'))
+    raise ValueError(f"Unknown JSON backend: {backend!r}")
+
+def _column_to_geojson(series, float_numbers=False):
+    """
+    Coerce a whole column to JSON-native Python values, nulls becoming None.
+
+    Ints and bools keep their type unless float_numbers is set, which turns
+    every number into a float and any other non-string value into str (the
+    choropleth rules).
+    """
+    if not float_numbers:
+        if pd.api.types.is_bool_dtype(series) and not series.hasnans:
+            return series.to_numpy(dtype=bool).tolist()
+        if pd.api.types.is_integer_dtype(series) and not series.hasnans:
+            return series.to_numpy(dtype=np.int64).tolist()
+    if pd.api.types.is_numeric_dtype(series) or (float_numbers and pd.api.types.is_bool_dtype(series)):
+        values = series.to_numpy(dtype=float, na_value=np.nan)
+        out = values.astype(object)
+        out[np.isnan(values)] = None
+        return out.tolist()
+    if isinstance(series.dtype, pd.StringDtype) and not series.hasnans:
+        return series.tolist()
+
+    mask = series.isna().to_numpy()
+    out = series.astype(object).to_numpy(copy=True)
+    out[mask] = None
+    if float_numbers:
+        return [v if v is None or isinstance(v, str) else float(v) if isinstance(v, (int, float)) else str(v)
+                for v in out.tolist()]
+    return [v if v is None or isinstance(v, (str, int, float, bool)) else str(v) for v in out.tolist()]
+
+def write_geojson(gdf, fp, precision=None, json_backend='auto'):
+    """
+    Stream a GeoDataFrame to a GeoJSON FeatureCollection.
+
+    Geometries go straight from shapely to GeoJSON text and attributes are
+    converted column by column, so no intermediate FeatureCollection string
+    or dict tree is built. Output matches gdf.to_json() apart from compact
+    separators.
+
+    Args:
+        fp: Output path or writable text file handle
+        precision: Round coordinates to this many decimal places (None keeps full precision)
+        json_backend: 'json', 'orjson', or 'auto' (orjson when installed)
+    """
+    dumps = _json_dumps(json_backend)
+
+    geometries = np.asarray(gdf.geometry.values, dtype=object)
+    if precision is not None:
+        geometries = shapely.transform(geometries, lambda coords: np.round(coords, precision))
+    geometry_json = shapely.to_geojson(geometries)
+
+    keys = [key for key in gdf.columns if key != gdf.geometry.name]
+    columns = [_column_to_geojson(gdf[key]) for key in keys]
+    ids = [str(i) for i in gdf.index]
+
+    opened = open(fp, 'w') if isinstance(fp, (str, bytes)) or hasattr(fp, '__fspath__') else nullcontext(fp)
+    with opened as f:
+        f.write('{"type":"FeatureCollection","features":[')
+        for i, (feature_id, geometry) in enumerate(zip(ids, geometry_json)):
+            properties = dumps(dict(zip(keys, (column[i] for column in columns))))
+            f.write(
+                f'{"," if i else ""}{{"id":{dumps(feature_id)},"type":"Feature",'
+                f'"properties":{properties},"geometry":{geometry if geometry is not None else "null"}}}'
+            )
+        f.write(']}')
+
+def _quantize_rings(geometries, quantization):
+    """
+    Split polygons into quantized open rings.
+
+    Returns the topology transform, the integer ring coordinates and, per
+    geometry, the nested ring numbering used to rebuild its arcs.
+    """
+    valid = ~(shapely.is_missing(geometries) | shapely.is_empty(geometries))
+    bad = ~np.isin(shapely.get_type_id(geometries[valid]), (3, 6))
+    if bad.any():
+        raise ValueError("TopoJSON export only supports Polygon and MultiPolygon geometries")
+
+    x0, y0, x1, y1 = shapely.total_bounds(geometries[valid]) if valid.any() else (0.0, 0.0, 0.0, 0.0)
+    kx = (x1 - x0) / (quantization - 1) if x1 > x0 else 1.0
+    ky = (y1 - y0) / (quantization - 1) if y1 > y0 else 1.0
+
+    rings = []
+    layout = []
+    for geom, ok in zip(geometries, valid):
+        if not ok:
+            layout.append(None)
+            continue
+        parts = shapely.get_parts(geom)
+        polygons = []
+        for polygon in parts:
+            ring_ids = []
+            for ring in [polygon.exterior, *polygon.interiors]:
+                coords = shapely.get_coordinates(ring)[:-1]
+                q = np.column_stack([
+                    np.rint((coords[:, 0] - x0) / kx),
+                    np.rint((coords[:, 1] - y0) / ky),
+                ]).astype(np.int64)
+                # Drop points that collapsed onto their predecessor (wrapping around)
+                q = q[np.any(q != np.roll(q, 1, axis=0), axis=1)] if len(q) > 1 else q
+                if len(q) < 3:
+                    if not ring_ids:
+                        break  # exterior collapsed, drop the whole polygon
+                    continue
+                ring_ids.append(len(rings))
+                rings.append(q)
+            if ring_ids:
+                polygons.append(ring_ids)
+        layout.append(polygons if polygons else None)
+
+    transform = {'scale': [kx, ky], 'translate': [x0, y0]}
+    return transform, rings, layout
+
+def _find_junctions(rings, quantization):
+    """
+    Flag ring points where neighbouring geometries start or stop sharing a boundary.
+
+    A point is a junction when it occurs more than once with different
+    neighbour pairs. A shared edge traversed in opposite directions has the
+    same (unordered) neighbours, so only its end points become junctions.
+    """
+    if not rings:
+        return []
+    lengths = np.array([len(r) for r in rings])
+    coords = np.concatenate(rings)
+    keys = coords[:, 0] * quantization + coords[:, 1]
+
+    starts = np.repeat(np.cumsum(lengths) - lengths, lengths)
+    offset = np.arange(len(keys)) - starts
+    ring_len = np.repeat(lengths, lengths)
+    prev_keys = keys[starts + (offset - 1) % ring_len]
+    next_keys = keys[starts + (offset + 1) % ring_len]
+
+    neighbours = np.column_stack([keys, np.minimum(prev_keys, next_keys), np.maximum(prev_keys, next_keys)])
+    distinct = np.unique(neighbours, axis=0)[:, 0]
+    point_keys, counts = np.unique(distinct, return_counts=True)
+    is_junction = np.isin(keys, point_keys[counts > 1])
+    return np.split(is_junction, np.cumsum(lengths)[:-1])
+
+def _cut_rings(rings, junctions):
+    """Cut rings into arcs at junctions, sharing identical and reversed arcs."""
+    arcs = []
+    index = {}
+
+    def add(arc):
+        key = arc.tobytes()
+        if key in index:
+            return index[key]
+        reverse_key = arc[::-1].tobytes()
+        if reverse_key in index:
+            return ~index[reverse_key]
+        index[key] = len(arcs)
+        arcs.append(arc)
+        return index[key]
+
+    ring_arcs = []
+    for ring, is_junction in zip(rings, junctions):
+        cuts = np.flatnonzero(is_junction)
+        if len(cuts) == 0:
+            # Closed arc: rotate to the smallest point so a ring shared with
+            # another geometry (an enclave and its hole) is found either way
+            start = np.lexsort((ring[:, 1], ring[:, 0]))[0]
+            rotated = np.roll(ring, -start, axis=0)
+            ring_arcs.append([add(np.vstack([rotated, rotated[:1]]))])
+            continue
+        rotated = np.roll(ring, -cuts[0], axis=0)
+        closed = np.vstack([rotated, rotated[:1]])
+        bounds = np.append(cuts - cuts[0], len(ring))
+        ring_arcs.append([add(closed[a:b + 1]) for a, b in zip(bounds[:-1], bounds[1:])])
+    return arcs, ring_arcs
+
+def _simplify_arcs(arcs, ring_arcs, transform, tolerance):
+    """
+    Douglas-Peucker simplify each arc once; end points (junctions) are kept.
+
+    Rings that would drop below a triangle keep their original arcs, so no
+    tract collapses at coarse tolerances.
+    """
+    scale = np.asarray(transform['scale'])
+    lines = shapely.linestrings(np.concatenate(arcs) * scale,
+                                indices=np.repeat(np.arange(len(arcs)), [len(a) for a in arcs]))
+    simplified = shapely.simplify(lines, tolerance, preserve_topology=False)
+    coords, owner = shapely.get_coordinates(simplified, return_index=True)
+    out = np.split(np.rint(coords / scale).astype(np.int64), np.flatnonzero(np.diff(owner)) + 1)
+
+    for refs in ring_arcs:
+        arc_ids = [ref if ref >= 0 else ~ref for ref in refs]
+        if sum(len(out[i]) - 1 for i in arc_ids) < 3:
+            for i in arc_ids:
+                out[i] = arcs[i]
+    return out
+
+def _build_topology(gdf, object_name, id_column, quantization, properties):
+    """Quantize and cut a polygon layer into (transform, arcs, ring_arcs, objects)."""
+    geometries = np.asarray(gdf.geometry.values, dtype=object)
+    transform, rings, layout = _quantize_rings(geometries, quantization)
+    arcs, ring_arcs = _cut_rings(rings, _find_junctions(rings, quantization))
+
+    ids = gdf[id_column].astype(str).tolist() if id_column else None
+    columns = {key: _column_to_geojson(gdf[key]) for key in (properties or [])}
+
+    geoms = []
+    for i, polygons in enumerate(layout):
+        if polygons is None:
+            obj = {'type': None}
+        elif len(polygons) == 1:
+            obj = {'type': 'Polygon', 'arcs': [ring_arcs[r] for r in polygons[0]]}
+        else:
+            obj = {'type': 'MultiPolygon', 'arcs': [[ring_arcs[r] for r in p] for p in polygons]}
+        if ids is not None:
+            obj['id'] = ids[i]
+        if columns:
+            obj['properties'] = {key: values[i] for key, values in columns.items()}
+        geoms.append(obj)
+
+    objects = {object_name: {'type': 'GeometryCollection', 'geometries': geoms}}
+    return transform, arcs, ring_arcs, objects
+
+def _encode_topology(transform, arcs, objects, quantization):
+    """Assemble a TopoJSON dict with delta-encoded arcs."""
+    encoded = []
+    for arc in arcs:
+        delta = arc.copy()
+        delta[1:] -= arc[:-1]
+        encoded.append(delta.tolist())
+
+    x0, y0 = transform['translate']
+    kx, ky = transform['scale']
+    return {
+        'type': 'Topology',
+        'bbox': [x0, y0, x0 + kx * (quantization - 1), y0 + ky * (quantization - 1)],
+        'transform': transform,
+        'objects': objects,
+        'arcs': encoded,
+    }
+
+def to_topojson(gdf, object_name='tracts', id_column='tract_id', quantization=100000,
+                simplify_tolerance=None, properties=None):
+    """
+    Convert polygon layers to a TopoJSON Topology with shared arcs.
+
+    Boundaries shared by neighbouring tracts are stored once and referenced by
+    both polygons (the second one as a reversed arc, ~i). Coordinates are
+    quantized to a quantization x quantization grid and delta-encoded.
+
+    Args:
+        object_name: Name of the GeometryCollection in topology['objects']
+        id_column: Column used as each geometry's id
+        quantization: Grid size for coordinate quantization
+        simplify_tolerance: Simplify each arc once with this tolerance (CRS units)
+        properties: Columns to keep as geometry properties (default: none)
+
+    Returns:
+        TopoJSON dict
+    """
+    return topology_pyramid(gdf, [simplify_tolerance], object_name, id_column,
+                            quantization, properties)[0]
+
+def topology_pyramid(gdf, tolerances, object_name='tracts', id_column='tract_id',
+                     quantization=100000, properties=None):
+    """
+    Build one topology per simplification tolerance from a single arc set.
+
+    Junctions and arcs are computed once; each level only simplifies the arc
+    coordinates, so every level has the same geometries in the same order
+    and references the same arc indexes.
+
+    Args:
+        tolerances: Simplification tolerance per level (None keeps full detail)
+
+    Returns:
+        List of TopoJSON dicts, one per tolerance
+    """
+    transform, arcs, ring_arcs, objects = _build_topology(
+        gdf, object_name, id_column, quantization, properties
+    )
+    levels = []
+    for tolerance in tolerances:
+        level_arcs = _simplify_arcs(arcs, ring_arcs, transform, tolerance) if tolerance and arcs else arcs
+        levels.append(_encode_topology(transform, level_arcs, objects, quantization))
+    return levels
+
+def write_topology_pyramid(gdf, output_dir, levels, name='tracts-topo', object_name='tracts',
+                           id_column='tract_id', quantization=100000, writer=None):
+    """
+    Write a multi-resolution topology plus the zoom index the frontend reads.
+
+    Each level goes to <name>-<i>.json; <name>.json lists the levels with the
+    zoom range each one covers. All are published with write_frontend_json, so
+    files whose content is unchanged are left alone.
+
+    Args:
+        levels: Ordered list of {'max_zoom': int | None, 'tolerance': float | None},
+                coarsest first; the last level should have max_zoom None
+        writer: ArtifactWriter recording the changed files (default: a new one)
+
+    Returns:
+        The index dict
+    """
+    output_dir = Path(output_dir)
+    if writer is None:
+        writer = ArtifactWriter(output_dir)
+    topologies = topology_pyramid(gdf, [level['tolerance'] for level in levels],
+                                  object_name, id_column, quantization)
+
+    index = {'type': 'TopologyPyramid', 'object': object_name, 'levels': []}
+    min_zoom = 0
+    for i, (level, topology) in enumerate(zip(levels, topologies)):
+        filename = f'{name}-{i}'
+        # Arcs are already integers; rounding would only perturb the transform
+        writer.write_frontend_json(output_dir / f'{filename}.json', topology, digits=None)
+        index['levels'].append({
+            'file': filename,
+            'min_zoom': min_zoom,
+            'max_zoom': level['max_zoom'],
+            'tolerance': level['tolerance'],
+            'vertices': sum(len(arc) for arc in topology['arcs']),
+        })
+        if level['max_zoom'] is not None:
+            min_zoom = level['max_zoom'] + 1
+
+    writer.write_frontend_json(output_dir / f'{name}.json', index)
+    return index
+
+def tract_attribute_table(df, topology='tracts-topo', object_name='tracts', id_column='tract_id'):
+    """
+    Build a tract attribute table that the frontend joins onto a shared topology.
+
+    Geometry columns are dropped; every other column becomes a JSON-native
+    list keyed by position, with the join key in id_column. The records are
+    a Columns table (see utils.columnar), which the client decodes on fetch.
+    """
+    columns = [key for key in df.columns if key != id_column and not isinstance(df[key].dtype, gpd.array.GeometryDtype)]
+    values = {key: _column_to_geojson(df[key]) for key in columns}
+    ids = df[id_column].astype(str).tolist()
+    return {
+        'type': 'TractAttributes',
+        'topology': topology,
+        'object': object_name,
+        'key': id_column,
+        'records': {'type': 'Columns', 'length': len(ids), 'columns': {id_column: ids, **values}},
+    }
+
 def simplify_geometry(gdf, tolerance=0.001):
     """Simplify geometries for faster frontend rendering"""
     gdf['geometry'] = gdf['geometry'].simplify(tolerance)
@@ -24,37 +388,125 @@ def calculate_centroid(geometry):
 
 def point_in_tract(point_lon, point_lat, tracts_gdf):
     """Find which census tract a point falls in"""
-    point = Point(point_lon, point_lat)
+    position = TractLocator(tracts_gdf).locate([point_lon], [point_lat])[0]
+    if position < 0:
+        return None
 
-    for _, tract in tracts_gdf.iterrows():
-        if tract.geometry.contains(point):
-            return tract
+    return tracts_gdf.iloc[position]
 
-    return None
+class TractLocator:
+    """
+    Reusable point-in-tract lookup backed by an STRtree of prepared tract polygons.
 
-def create_choropleth_data(gdf, value_column, id_column='tract_id'):
+    Points on a boundary shared by several tracts are assigned to the tract
+    that comes first in the source frame, so results never depend on the
+    order in which the tree reports candidates. Points on the outer county
+    boundary count as inside.
+    """
+
+    def __init__(self, tracts_gdf, id_column='tract_id'):
+        self._build(tracts_gdf.geometry.values, tracts_gdf[id_column].to_numpy())
+
+    @classmethod
+    def from_arrays(cls, geometries, tract_ids):
+        """Build a locator from a shapely geometry array and matching tract ids."""
+        locator = cls.__new__(cls)
+        locator._build(geometries, tract_ids)
+        return locator
+
+    def _build(self, geometries, tract_ids):
+        self.geometries = np.asarray(geometries, dtype=object)
+        shapely.prepare(self.geometries)
+        self.tree = STRtree(self.geometries)
+        self.tract_ids = np.asarray(tract_ids)
+
+    def locate(self, lons, lats):
+        """
+        Return the positional index of the containing tract for each point.
+
+        Points outside every tract, or with missing coordinates, get -1.
+        """
+        lons = np.asarray(lons, dtype=float)
+        lats = np.asarray(lats, dtype=float)
+        result = np.full(len(lons), -1, dtype=np.intp)
+
+        valid = np.flatnonzero(np.isfinite(lons) & np.isfinite(lats))
+        if len(valid) == 0:
+            return result
+
+        points = shapely.points(lons[valid], lats[valid])
+
+        # Bounding-box candidates from the tree, then one vectorized exact pass
+        point_idx, tract_idx = self.tree.query(points)
+        hits = shapely.covers(self.geometries[tract_idx], points[point_idx])
+        point_idx, tract_idx = point_idx[hits], tract_idx[hits]
+
+        # Lowest tract position wins for points shared by several tracts
+        order = np.lexsort((tract_idx, point_idx))
+        point_idx, tract_idx = point_idx[order], tract_idx[order]
+        first = np.ones(len(point_idx), dtype=bool)
+        first[1:] = point_idx[1:] != point_idx[:-1]
+
+        result[valid[point_idx[first]]] = tract_idx[first]
+        return result
+
+    def lookup(self, lons, lats):
+        """Return the tract id for each point (None where no tract contains it)."""
+        positions = self.locate(lons, lats)
+        ids = np.empty(len(positions), dtype=object)
+        found = positions >= 0
+        ids[found] = self.tract_ids[positions[found]]
+        return ids
+
+def geocode_points(lons, lats, tracts_gdf, id_column='tract_id'):
+    """
+    Batch-assign lon/lat arrays to census tract ids.
+
+    Builds a one-off TractLocator; hold on to a TractLocator instead when
+    geocoding several batches against the same tracts.
+    """
+    return TractLocator(tracts_gdf, id_column).lookup(lons, lats)
+
+def create_choropleth_data(gdf, value_column, id_column='tract_id', layout='records'):
     """
     Create data structure for choropleth maps
 
+    Null handling and type coercion run once per column rather than per cell.
+
+    Args:
+        layout: 'records' for a list of {id, value, properties} per feature, or
+            'columnar' for {ids, values, properties: {column: [...]}} with one
+            array per property (much smaller once serialized)
+
     Returns:
-        List of {id, value, properties} for each feature
-    """
-    data = []
-
-    for _, row in gdf.iterrows():
-        feature = {
-            'id': row[id_column],
-            'value': float(row[value_column]) if pd.notna(row[value_column]) else None,
-            'properties': {
-                key: (float(val) if isinstance(val, (int, float)) and pd.notna(val)
-                      else str(val) if pd.notna(val) else None)
-                for key, val in row.items()
-                if key not in ['geometry', id_column]
-            }
-        }
-        data.append(feature)
-
-    return data
+        List of {id, value, properties} for each feature, or the columnar dict
+
+    Raises:
+        ValueError: if value_column holds values that are not numbers
+    """
+    try:
+        numeric = pd.to_numeric(gdf[value_column])
+    except (TypeError, ValueError) as exc:
+        raise ValueError(f"Choropleth value column {value_column!r} is not numeric: {exc}") from exc
+    ids = gdf[id_column].tolist()
+    values = _column_to_geojson(numeric, float_numbers=True)
+    properties = {
+        key: _column_to_geojson(gdf[key], float_numbers=True)
+        for key in gdf.columns
+        if key not in ['geometry', id_column]
+    }
+
+    if layout == 'columnar':
+        return {'ids': ids, 'values': values, 'properties': properties}
+    if layout != 'records':
+        raise ValueError(f"Unknown choropleth layout: {layout!r}")
+
+    keys = list(properties)
+    rows = zip(*properties.values()) if keys else ((),) * len(ids)
+    return [
+        {'id': tract_id, 'value': value, 'properties': dict(zip(keys, row))}
+        for tract_id, value, row in zip(ids, values, rows)
+    ]
 
 def calculate_area_demographics(gdf, weight_column='total_population'):
     """
@@ -0,0 +1,157 @@
+"""
+Conditional HTTP downloads backed by a content-addressed body cache.
+
+Response bodies are stored under their SHA-256. The validators of the last
+download (ETag, Last-Modified and the body hash) live in the data file's
+freshness sidecar, so the next fetch can send If-None-Match /
+If-Modified-Since. A 304 is answered from the body cache, and a 200 whose
+body hashes the same as before counts as unchanged too, letting callers
+mark the data fresh without rewriting it.
+
+Several sidecars may point at the same body, so downloads never delete
+one; sweep_bodies removes the bodies no sidecar references any more.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import requests
+
+from config import CACHE_DIR, DATA_DIR
+
+HTTP_CACHE_DIR = CACHE_DIR / 'http'
+
+
+def payload_sha256(payload) -> str:
+    """Hex SHA-256 of a JSON-serializable payload, independent of key order."""
+    encoded = json.dumps(payload, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+
+class CachedResponse:
+    """
+    Result of conditional_get.
+
+    Attributes:
+        content: Response body (from the cache on a 304)
+        status: HTTP status of the request that was made (200 or 304)
+        unchanged: True if the body is identical to the one the validators
+            describe, whether the server said so (304) or the hash did
+        validators: etag, last_modified and sha256 to store for next time
+    """
+
+    def __init__(self, content: bytes, status: int, unchanged: bool, validators: Dict):
+        self.content = content
+        self.status = status
+        self.unchanged = unchanged
+        self.validators = validators
+
+    def json(self):
+        """Body parsed as JSON."""
+        return json.loads(self.content)
+
+
+def _body_path(cache_dir: Path, sha256: str) -> Path:
+    return Path(cache_dir) / sha256[:2] / sha256
+
+
+def _store_body(cache_dir: Path, sha256: str, content: bytes) -> None:
+    path = _body_path(cache_dir, sha256)
+    if path.exists():
+        return
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f'.{sha256[:8]}-')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(content)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def conditional_get(url: str, params: Optional[Dict] = None,
+                    validators: Optional[Dict] = None,
+                    session: Optional[requests.Session] = None,
+                    timeout: float = 60,
+                    cache_dir: Path = HTTP_CACHE_DIR) -> CachedResponse:
+    """
+    GET a URL, revalidating against the validators of the previous download.
+
+    Conditional headers are only sent when the previous body is still in the
+    cache, so a 304 can always be answered. A changed body is added next to
+    the previous one, which is left for sweep_bodies.
+
+    Args:
+        url: Resource URL
+        params: Query parameters
+        validators: validators from the previous CachedResponse, usually
+            read back with freshness.response_validators
+        session: requests session to reuse
+        timeout: Request timeout in seconds
+        cache_dir: Body cache directory
+
+    Returns:
+        CachedResponse
+    """
+    session = session or requests.Session()
+    validators = validators or {}
+    previous_sha = validators.get('sha256')
+    cached = previous_sha is not None and _body_path(cache_dir, previous_sha).exists()
+
+    headers = {}
+    if cached:
+        if validators.get('etag'):
+            headers['If-None-Match'] = validators['etag']
+        if validators.get('last_modified'):
+            headers['If-Modified-Since'] = validators['last_modified']
+
+    resp = session.get(url, params=params, headers=headers, timeout=timeout)
+    if resp.status_code == 304 and cached:
+        content = _body_path(cache_dir, previous_sha).read_bytes()
+        refreshed = {
+            'etag': resp.headers.get('ETag', validators.get('etag')),
+            'last_modified': resp.headers.get('Last-Modified', validators.get('last_modified')),
+            'sha256': previous_sha,
+        }
+        return CachedResponse(content, 304, True, refreshed)
+    resp.raise_for_status()
+
+    content = resp.content
+    sha256 = hashlib.sha256(content).hexdigest()
+    _store_body(cache_dir, sha256, content)
+    return CachedResponse(content, resp.status_code, sha256 == previous_sha, {
+        'etag': resp.headers.get('ETag'),
+        'last_modified': resp.headers.get('Last-Modified'),
+        'sha256': sha256,
+    })
+
+
+def sweep_bodies(data_dir: Path = DATA_DIR, cache_dir: Path = HTTP_CACHE_DIR) -> List[Path]:
+    """
+    Delete cached bodies that no freshness sidecar under data_dir references.
+
+    Run after the sidecars of a fetch have been written, so the bodies just
+    downloaded are referenced.
+
+    Returns:
+        Paths of the deleted bodies
+    """
+    referenced = set()
+    for sidecar in Path(data_dir).rglob('*.meta.json'):
+        with open(sidecar) as f:
+            responses = json.load(f).get('responses', {})
+        referenced.update(v.get('sha256') for v in responses.values())
+
+    removed = []
+    for path in Path(cache_dir).glob('*/*'):
+        if not path.name.startswith('.') and path.name not in referenced:
+            path.unlink()
+            removed.append(path)
+    return removed
@@ -0,0 +1,133 @@
+"""
+Fetch and incrementally sync NCDOT non-motorist crash records.
+
+A full fetch pages through every Durham record in the ArcGIS FeatureServer.
+After that, the freshness sidecar remembers the largest CrashID seen, and a
+sync asks only for records above it and merges them into the existing CSV
+(deduplicated on CrashID). A periodic full fetch still picks up revisions to
+older records.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional
+
+import pandas as pd
+import requests
+
+from config import DATA_FRESHNESS, NCDOT_NONMOTORIST_SERVICE
+from utils.arcgis_client import FeatureServerClient
+from utils.freshness import read_meta, write_meta
+
+NCDOT_OUT_FIELDS = [
+    'CrashID', 'CrashDate', 'CrashYear', 'CrashMonth', 'CrashHour',
+    'Latitude', 'Longitude',
+    'CrashSevr', 'CrashType', 'CrashTypGr', 'CrashAlcoh',
+    'NM_Type', 'NM_Age', 'NM_Sex', 'NM_Race', 'NM_Inj', 'NM_AlcDrg',
+    'NM_NumTot', 'NM_NumK', 'NM_NumA', 'NM_NumB', 'NM_NumC', 'NM_NumU',
+    'DrvrAge', 'DrvrSex', 'DrvrRace', 'DrvrVehTyp',
+    'SpeedLimit', 'RdClass', 'LightCond', 'Weather',
+    'County', 'City',
+]
+NCDOT_DURHAM_WHERE = "County='DURHAM'"
+NCDOT_PAGE_SIZE = 2000
+
+
+def fetch_crash_records(service_url: str = NCDOT_NONMOTORIST_SERVICE,
+                        where: str = NCDOT_DURHAM_WHERE,
+                        min_crash_id: Optional[int] = None,
+                        page_size: int = NCDOT_PAGE_SIZE,
+                        session: Optional[requests.Session] = None) -> pd.DataFrame:
+    """
+    Fetch crash records from the FeatureServer, ordered by CrashID.
+
+    Pages are requested concurrently through FeatureServerClient.
+
+    Args:
+        service_url: FeatureServer layer URL
+        where: Base where clause
+        min_crash_id: Only fetch records with a larger CrashID
+        page_size: Records per request (the server's maxRecordCount)
+        session: requests session to reuse
+
+    Returns:
+        DataFrame in the CSV layout: CrashDate as YYYY-MM-DD, rows without
+        coordinates dropped
+    """
+    if min_crash_id is not None:
+        where = f"{where} AND CrashID > {int(min_crash_id)}"
+    client = FeatureServerClient(service_url, page_size=page_size, session=session)
+    features = client.query(where, out_fields=NCDOT_OUT_FIELDS, order_by='CrashID')
+    records = [f['attributes'] for f in features]
+
+    crash_df = pd.DataFrame(records, columns=NCDOT_OUT_FIELDS)
+    if len(crash_df):
+        crash_df['CrashDate'] = pd.to_datetime(crash_df['CrashDate'], unit='ms').dt.strftime('%Y-%m-%d')
+
+    before = len(crash_df)
+    crash_df = crash_df.dropna(subset=['Latitude', 'Longitude'])
+    dropped = before - len(crash_df)
+    if dropped:
+        print(f"  Dropped {dropped} records with missing coordinates")
+    return crash_df.reset_index(drop=True)
+
+
+def sync_crash_csv(csv_path: Path, service_url: str = NCDOT_NONMOTORIST_SERVICE,
+                   where: str = NCDOT_DURHAM_WHERE, full: Optional[bool] = None,
+                   session: Optional[requests.Session] = None) -> dict:
+    """
+    Bring the crash CSV up to date with the FeatureServer.
+
+    Incremental by default: fetches records with CrashID above the sidecar's
+    max_crash_id and appends them. Falls back to a full fetch when there is
+    no usable sidecar, when the last full fetch is older than
+    DATA_FRESHNESS['ncdot_crashes_full'] days, or when full=True. The CSV is
+    only rewritten when records were added or changed.
+
+    Returns:
+        The sidecar written for the CSV, including mode and new_records
+    """
+    csv_path = Path(csv_path)
+    meta = read_meta(csv_path) if csv_path.exists() else None
+
+    if full is None:
+        full = True
+        if meta and meta.get('max_crash_id') is not None and meta.get('full_sync_at'):
+            full_age = datetime.now(timezone.utc) - datetime.fromisoformat(meta['full_sync_at'])
+            full = full_age.days >= DATA_FRESHNESS['ncdot_crashes_full']
+
+    if full:
+        print("Fetching all NCDOT non-motorist crash records...")
+        crash_df = fetch_crash_records(service_url, where, session=session)
+        if crash_df.empty:
+            raise RuntimeError("No records returned from NCDOT Feature Service")
+        existing_ids = (
+            set(pd.read_csv(csv_path, usecols=['CrashID'])['CrashID']) if csv_path.exists() else set()
+        )
+        new_records = len(set(crash_df['CrashID']) - existing_ids)
+        changed = True
+    else:
+        print(f"Fetching NCDOT crash records after CrashID {meta['max_crash_id']}...")
+        delta = fetch_crash_records(service_url, where, min_crash_id=meta['max_crash_id'], session=session)
+        existing = pd.read_csv(csv_path)
+        new_records = int((~delta['CrashID'].isin(existing['CrashID'])).sum())
+        crash_df = (
+            pd.concat([existing, delta], ignore_index=True)
+            .drop_duplicates('CrashID', keep='last')
+            .sort_values('CrashID', kind='stable')
+        )
+        changed = len(delta) > 0
+
+    if changed:
+        crash_df.to_csv(csv_path, index=False)
+
+    now = datetime.now(timezone.utc).isoformat()
+    return write_meta(csv_path, source_url=service_url, record_count=len(crash_df), extra={
+        'year_range': [int(crash_df['CrashYear'].min()), int(crash_df['CrashYear'].max())],
+        'max_crash_id': int(crash_df['CrashID'].max()),
+        'full_sync_at': now if full else meta['full_sync_at'],
+        'mode': 'full' if full else 'incremental',
+        'new_records': int(new_records),
+    })
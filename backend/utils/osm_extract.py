@@ -0,0 +1,292 @@
+"""
+Infrastructure scoring from a local OSM extract instead of Overpass.
+
+The extract (.osm XML, optionally .gz/.bz2, or .pbf with pyosmium) is read
+as a stream and never held in memory. Only elements carrying the
+OSM_QUERY_TAGS are kept, and only their classifying tags. Tagged nodes are
+classified, located and counted per tract in fixed-size chunks as they go
+by. Ways need node coordinates, which come before them in a sorted
+extract, so they take two passes. The first pass records the node refs of
+matching ways. The second reads just the coordinates of those nodes and
+stops at the first way.
+
+Memory is bounded by the chunk size plus the matching ways, not by the
+size of the extract, so a statewide file can be scored on a batch machine
+with no network.
+"""
+
+from __future__ import annotations
+
+import bz2
+import gzip
+import xml.etree.ElementTree as ET
+from array import array
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Tuple
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import shapely
+
+from config import OSM_INFRASTRUCTURE_FEATURES
+from utils.geospatial import TractLocator
+from utils.osm_infrastructure import (OSM_QUERY_TAGS, OSM_TAG_KEYS, classify_osm_features,
+                                      scores_from_counts)
+
+try:
+    import osmium
+except ImportError:  # optional, only needed for .pbf extracts
+    osmium = None
+
+OSM_EXTRACT_CHUNK_SIZE = 100_000
+
+# Closed ways tagged area=yes are polygons rather than lines
+_AREA_KEY = 'area'
+_READ_KEYS = frozenset(OSM_TAG_KEYS) | {_AREA_KEY}
+
+# (kind, id, lon, lat, tags, node refs)
+Element = Tuple[str, int, float, float, Optional[Dict[str, str]], Optional[list]]
+
+
+def _is_candidate(tags: Dict[str, str]) -> bool:
+    """Whether an element matches the Overpass infrastructure query."""
+    for key, values in OSM_QUERY_TAGS.items():
+        value = tags.get(key)
+        if value is not None and (values is True or value in values):
+            return True
+    return False
+
+
+def _open_extract(path: Path):
+    if path.suffix == '.gz':
+        return gzip.open(path, 'rb')
+    if path.suffix == '.bz2':
+        return bz2.open(path, 'rb')
+    return open(path, 'rb')
+
+
+def _xml_elements(path: Path, kinds: frozenset, with_tags: bool) -> Iterator[Element]:
+    """Stream nodes and ways out of OSM XML, clearing each element once read."""
+    with _open_extract(path) as f:
+        context = ET.iterparse(f, events=('start', 'end'))
+        _, root = next(context)
+        for event, elem in context:
+            if event != 'end' or elem.tag not in ('node', 'way', 'relation'):
+                continue
+            if elem.tag not in kinds:
+                root.clear()
+                if elem.tag == 'node':
+                    continue
+                # Sorted extracts hold nodes, then ways, then relations
+                if elem.tag == 'relation' or 'way' not in kinds:
+                    return
+                continue
+
+            tags = None
+            if with_tags:
+                tags = {t.get('k'): t.get('v') for t in elem.iterfind('tag') if t.get('k') in _READ_KEYS}
+            if elem.tag == 'node':
+                yield 'node', int(elem.get('id')), float(elem.get('lon')), float(elem.get('lat')), tags, None
+            else:
+                refs = [int(nd.get('ref')) for nd in elem.iterfind('nd')]
+                yield 'way', int(elem.get('id')), np.nan, np.nan, tags, refs
+            root.clear()
+
+
+def _pbf_elements(path: Path, kinds: frozenset, with_tags: bool) -> Iterator[Element]:
+    """Stream nodes and ways out of an OSM PBF file with pyosmium."""
+    if osmium is None:
+        raise ImportError("pyosmium is not installed; install osmium or convert the extract to .osm")
+    entities = osmium.osm.NODE if 'way' not in kinds else osmium.osm.NODE | osmium.osm.WAY
+    for obj in osmium.FileProcessor(str(path), entities):
+        tags = {tag.k: tag.v for tag in obj.tags if tag.k in _READ_KEYS} if with_tags else None
+        if obj.is_node():
+            if obj.location.valid():
+                yield 'node', obj.id, obj.location.lon, obj.location.lat, tags, None
+        elif obj.is_way():
+            if 'way' not in kinds:
+                return
+            yield 'way', obj.id, np.nan, np.nan, tags, [n.ref for n in obj.nodes]
+
+
+def _elements(path: Path, kinds, with_tags: bool = True) -> Iterator[Element]:
+    path = Path(path)
+    reader = _pbf_elements if path.suffix == '.pbf' else _xml_elements
+    return reader(path, frozenset(kinds), with_tags)
+
+
+class _TractCounter:
+    """Accumulates (tract, category) counts for located points, chunk by chunk."""
+
+    def __init__(self, tracts_gdf: gpd.GeoDataFrame, categories):
+        self.tract_codes, self.tract_ids = pd.factorize(tracts_gdf['tract_id'])
+        self.locator = TractLocator(tracts_gdf)
+        self.categories = list(categories)
+        self.counts = np.zeros((len(self.tract_ids), len(self.categories)), dtype=np.int64)
+        self.classified = np.zeros(len(self.categories), dtype=np.int64)
+
+    def add(self, lons, lats, tag_rows) -> None:
+        category = classify_osm_features(pd.DataFrame(tag_rows, columns=list(OSM_TAG_KEYS)))
+        codes = pd.Categorical(category, categories=self.categories).codes
+        # Ways with too few resolvable nodes have no location and are dropped
+        placed = (codes >= 0) & np.isfinite(lons) & np.isfinite(lats)
+        self.classified += np.bincount(codes[placed], minlength=len(self.categories))
+
+        positions = self.locator.locate(lons, lats)
+        hit = (codes >= 0) & (positions >= 0)
+        flat = self.tract_codes[positions[hit]] * len(self.categories) + codes[hit]
+        self.counts += np.bincount(flat, minlength=self.counts.size).reshape(self.counts.shape)
+
+    def frame(self) -> pd.DataFrame:
+        return pd.DataFrame(self.counts, index=pd.Index(self.tract_ids, name='tract_id'),
+                            columns=self.categories)
+
+
+def _way_centroids(refs: np.ndarray, offsets: np.ndarray, closed_area: np.ndarray,
+                   node_ids: np.ndarray, node_lons: np.ndarray, node_lats: np.ndarray):
+    """
+    Centroids of ways given as flattened node refs.
+
+    Refs without coordinates (outside a clipped extract) are dropped. Ways
+    left with fewer than two nodes get NaN. Closed area ways are polygons,
+    everything else a line, as in osmnx.
+    """
+    n_ways = len(offsets) - 1
+    way_index = np.repeat(np.arange(n_ways), np.diff(offsets))
+    position = np.searchsorted(node_ids, refs)
+    position[position == len(node_ids)] = 0
+    known = (node_ids[position] == refs) & np.isfinite(node_lons[position])
+    way_index, position = way_index[known], position[known]
+
+    lons = np.full(n_ways, np.nan)
+    lats = np.full(n_ways, np.nan)
+    n_nodes = np.bincount(way_index, minlength=n_ways)
+    usable = n_nodes >= 2
+    if not usable.any():
+        return lons, lats
+
+    keep = usable[way_index]
+    coords = np.column_stack([node_lons[position[keep]], node_lats[position[keep]]])
+    ways = np.flatnonzero(usable)
+    local_index = np.searchsorted(ways, way_index[keep])
+    geometries = shapely.linestrings(coords, indices=local_index)
+
+    polygon = closed_area[ways] & (n_nodes[ways] >= 4) & shapely.is_closed(geometries)
+    if polygon.any():
+        rings = shapely.linearrings(shapely.get_coordinates(geometries[polygon]),
+                                    indices=np.repeat(np.arange(polygon.sum()),
+                                                      shapely.get_num_points(geometries[polygon])))
+        geometries[polygon] = shapely.polygons(rings)
+
+    centroids = shapely.centroid(geometries)
+    lons[ways] = shapely.get_x(centroids)
+    lats[ways] = shapely.get_y(centroids)
+    return lons, lats
+
+
+def count_extract_infrastructure(extract_path: Path, tracts_gdf: gpd.GeoDataFrame,
+                                 features: Dict = OSM_INFRASTRUCTURE_FEATURES,
+                                 chunk_size: int = OSM_EXTRACT_CHUNK_SIZE
+                                 ) -> Tuple[pd.DataFrame, pd.Series]:
+    """
+    Per-tract infrastructure counts straight from an OSM extract.
+
+    Args:
+        extract_path: .osm, .osm.gz, .osm.bz2 or .pbf (needs pyosmium)
+        tracts_gdf: Census tracts with tract_id
+        features: Category config
+        chunk_size: Elements classified and located per batch
+
+    Returns:
+        (counts, classified): counts is indexed by tract_id with one column
+        per category (as tract_category_counts); classified is the number of
+        located elements per category, including those outside every tract
+    """
+    counter = _TractCounter(tracts_gdf, features)
+
+    # Pass 1: count tagged nodes as they stream by; remember matching ways
+    lons, lats, tag_rows = [], [], []
+    way_refs, way_offsets, way_tags, way_area = array('q'), array('q', [0]), [], []
+
+    def flush_nodes():
+        if tag_rows:
+            counter.add(np.array(lons), np.array(lats), tag_rows)
+            lons.clear()
+            lats.clear()
+            tag_rows.clear()
+
+    for kind, _, lon, lat, tags, refs in _elements(extract_path, ('node', 'way')):
+        if not tags or not _is_candidate(tags):
+            continue
+        row = [tags.get(key) for key in OSM_TAG_KEYS]
+        if kind == 'node':
+            lons.append(lon)
+            lats.append(lat)
+            tag_rows.append(row)
+            if len(tag_rows) >= chunk_size:
+                flush_nodes()
+        else:
+            way_refs.extend(refs)
+            way_offsets.append(len(way_refs))
+            way_tags.append(row)
+            way_area.append(len(refs) > 3 and refs[0] == refs[-1] and tags.get(_AREA_KEY) == 'yes')
+    flush_nodes()
+
+    if way_tags:
+        refs = np.frombuffer(way_refs, dtype=np.int64)
+        offsets = np.frombuffer(way_offsets, dtype=np.int64)
+
+        # Pass 2: coordinates of just the nodes those ways use
+        node_ids = np.unique(refs)
+        node_lons = np.full(len(node_ids), np.nan)
+        node_lats = np.full(len(node_ids), np.nan)
+        ids, xs, ys = array('q'), array('d'), array('d')
+
+        def resolve():
+            if ids:
+                chunk_ids = np.array(ids, dtype=np.int64)
+                position = np.searchsorted(node_ids, chunk_ids)
+                position[position == len(node_ids)] = 0
+                found = node_ids[position] == chunk_ids
+                node_lons[position[found]] = np.array(xs)[found]
+                node_lats[position[found]] = np.array(ys)[found]
+                del ids[:]
+                del xs[:]
+                del ys[:]
+
+        for _, node_id, lon, lat, _, _ in _elements(extract_path, ('node',), with_tags=False):
+            ids.append(node_id)
+            xs.append(lon)
+            ys.append(lat)
+            if len(ids) >= chunk_size:
+                resolve()
+        resolve()
+
+        area = np.array(way_area, dtype=bool)
+        for start in range(0, len(way_tags), chunk_size):
+            stop = min(start + chunk_size, len(way_tags))
+            chunk_offsets = offsets[start:stop + 1]
+            chunk_refs = refs[chunk_offsets[0]:chunk_offsets[-1]]
+            cx, cy = _way_centroids(chunk_refs, chunk_offsets - chunk_offsets[0], area[start:stop],
+                                    node_ids, node_lons, node_lats)
+            counter.add(cx, cy, way_tags[start:stop])
+
+    classified = pd.Series(counter.classified, index=counter.categories, name='elements')
+    return counter.frame(), classified
+
+
+def score_osm_extract(extract_path: Path, tracts_gdf: gpd.GeoDataFrame,
+                      features: Dict = OSM_INFRASTRUCTURE_FEATURES,
+                      chunk_size: int = OSM_EXTRACT_CHUNK_SIZE) -> Tuple[pd.Series, pd.DataFrame]:
+    """
+    Offline counterpart of score_osm_infrastructure.
+
+    Returns:
+        (classified, scores): elements per category, and the
+        scores_from_counts table
+    """
+    counts, classified = count_extract_infrastructure(extract_path, tracts_gdf, features, chunk_size)
+    if classified.sum() == 0:
+        raise RuntimeError(f"No infrastructure elements classified from {extract_path}")
+    return classified, scores_from_counts(counts, tracts_gdf, features)
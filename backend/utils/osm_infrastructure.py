@@ -0,0 +1,183 @@
+"""
+Per-tract OSM pedestrian and cycling infrastructure scores.
+
+Classifies the features returned by the Overpass query with column masks,
+reduces every geometry to a point in one shapely call, assigns points to
+tracts with the shared TractLocator (the rule osm_extract uses too) and
+counts them per tract and category with one bincount, so the cost stays
+linear for statewide extracts.
+"""
+
+from __future__ import annotations
+
+from typing import Dict, List, Tuple
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import shapely
+
+from config import OSM_INFRASTRUCTURE_FEATURES
+from utils.geospatial import TractLocator
+
+# Overpass tag query (osmnx tags argument) covering every category
+OSM_QUERY_TAGS = {
+    'highway': ['crossing', 'traffic_signals', 'footway', 'cycleway', 'path'],
+    'traffic_calming': True,
+}
+# Tags classify_osm_features reads
+OSM_TAG_KEYS = ('highway', 'bicycle', 'traffic_calming')
+
+# Score bounds, so no tract reads as entirely without (or saturated with) infrastructure
+OSM_SCORE_RANGE = (0.05, 0.95)
+
+
+def _tag_column(features: pd.DataFrame, tag: str) -> pd.Series:
+    """A tag column, all-missing if no feature carries the tag."""
+    if tag in features.columns:
+        return features[tag]
+    return pd.Series(np.nan, index=features.index, dtype=object)
+
+
+def classify_osm_features(features: pd.DataFrame) -> pd.Series:
+    """
+    Infrastructure category of each OSM feature, from its tags.
+
+    A highway tag wins over traffic_calming; cycleway and path count as bike
+    infrastructure unless bicycle=no. List-valued highway tags use their
+    first entry.
+
+    Returns:
+        Series of category names aligned with features; None when unclassified
+    """
+    highway = _tag_column(features, 'highway')
+    is_list = highway.map(lambda v: isinstance(v, list))
+    if is_list.any():
+        highway = highway.where(~is_list, highway[is_list].str[0])
+    highway = highway.fillna('').astype(str)
+    bicycle = _tag_column(features, 'bicycle')
+
+    conditions = [
+        highway == 'crossing',
+        highway == 'traffic_signals',
+        highway == 'footway',
+        highway.isin(['cycleway', 'path']) & (bicycle != 'no'),
+        _tag_column(features, 'traffic_calming').notna(),
+    ]
+    choices = ['crossings', 'traffic_signals', 'footways', 'bike_infra', 'speed_calming']
+    category = np.select([c.to_numpy() for c in conditions], choices, default='')
+    return pd.Series(np.where(category == '', None, category), index=features.index, dtype=object)
+
+
+def infrastructure_points(features_gdf: gpd.GeoDataFrame) -> gpd.GeoDataFrame:
+    """
+    Classified features as points (centroids for lines and polygons).
+
+    Features without a category or geometry are dropped.
+    """
+    category = classify_osm_features(features_gdf)
+    geometry = features_gdf.geometry.to_numpy()
+    keep = category.notna().to_numpy() & ~shapely.is_missing(geometry)
+    return gpd.GeoDataFrame(
+        {'category': category.to_numpy()[keep]},
+        geometry=shapely.centroid(geometry[keep]),
+        crs=features_gdf.crs,
+    )
+
+
+def tract_category_counts(points: gpd.GeoDataFrame, tracts_gdf: gpd.GeoDataFrame,
+                          categories: List[str]) -> pd.DataFrame:
+    """
+    Number of points of each category within each tract.
+
+    Points are placed with TractLocator: a point on a shared boundary counts
+    for the tract that comes first in tracts_gdf, one on the outer boundary
+    counts as inside.
+
+    Returns:
+        DataFrame indexed by tract_id (in first-appearance order), one
+        integer column per category
+    """
+    tract_codes, tract_ids = pd.factorize(tracts_gdf['tract_id'])
+    if points.crs is not None and tracts_gdf.crs is not None and points.crs != tracts_gdf.crs:
+        points = points.to_crs(tracts_gdf.crs)
+    geometry = points.geometry.to_numpy()
+    positions = TractLocator(tracts_gdf).locate(shapely.get_x(geometry), shapely.get_y(geometry))
+    category_codes = pd.Categorical(points['category'], categories=categories).codes
+    hit = (category_codes >= 0) & (positions >= 0)
+    flat = tract_codes[positions[hit]] * len(categories) + category_codes[hit]
+    counts = np.bincount(flat, minlength=len(tract_ids) * len(categories))
+    return pd.DataFrame(
+        counts.reshape(len(tract_ids), len(categories)),
+        index=pd.Index(tract_ids, name='tract_id'),
+        columns=categories,
+    )
+
+
+def scores_from_counts(counts: pd.DataFrame, tracts_gdf: gpd.GeoDataFrame,
+                       features: Dict = OSM_INFRASTRUCTURE_FEATURES) -> pd.DataFrame:
+    """
+    Per-tract densities and the weighted score from category counts.
+
+    Density is per 1,000 residents, not per km²: per-area density is highest
+    in urban cores (which are also lower-income in Durham), producing an
+    inverted income gradient. Each density is log1p-compressed and min-max
+    normalized before weighting.
+
+    Args:
+        counts: tract_category_counts output (tract_id index, one column
+            per category, tracts in first-appearance order)
+        tracts_gdf: Census tracts with tract_id and total_population
+        features: Category config with a weight per category
+
+    Returns:
+        One row per tract with tract_id, area_km2, <category>_count/_density
+        per category, <category>_norm per category and
+        osm_infrastructure_score
+    """
+    categories = list(features)
+    first = tracts_gdf.drop_duplicates('tract_id')
+    area_km2 = first.to_crs(epsg=3857).geometry.area.to_numpy() / 1e6
+    population = first['total_population'].to_numpy(dtype=float)
+    has_population = population > 0
+
+    columns = {'tract_id': counts.index.to_numpy(), 'area_km2': area_km2}
+    for cat in categories:
+        count = counts[cat].to_numpy()
+        columns[f'{cat}_count'] = count
+        with np.errstate(divide='ignore', invalid='ignore'):
+            columns[f'{cat}_density'] = np.where(has_population, count / population * 1000, 0.0)
+    scores = pd.DataFrame(columns)
+
+    for cat in categories:
+        # log1p before normalizing to compress outlier effect from dense downtown tracts
+        log_col = np.log1p(scores[f'{cat}_density'])
+        col_min = log_col.min()
+        col_range = log_col.max() - col_min
+        scores[f'{cat}_norm'] = (log_col - col_min) / col_range if col_range > 0 else 0.0
+
+    weighted = sum(scores[f'{cat}_norm'] * features[cat]['weight'] for cat in categories)
+    scores['osm_infrastructure_score'] = np.clip(weighted, *OSM_SCORE_RANGE)
+    return scores
+
+
+def score_osm_infrastructure(features_gdf: gpd.GeoDataFrame, tracts_gdf: gpd.GeoDataFrame,
+                             features: Dict = OSM_INFRASTRUCTURE_FEATURES
+                             ) -> Tuple[gpd.GeoDataFrame, pd.DataFrame]:
+    """
+    Per-tract infrastructure counts, densities and the weighted score.
+
+    Args:
+        features_gdf: Overpass features (osmnx features_from_bbox output)
+        tracts_gdf: Census tracts with tract_id and total_population
+        features: Category config with a weight per category
+
+    Returns:
+        (points, scores): the classified points and the scores_from_counts
+        table
+    """
+    points = infrastructure_points(features_gdf)
+    if points.empty:
+        raise RuntimeError("No infrastructure elements classified from OSM response")
+    counts = tract_category_counts(points, tracts_gdf, list(features))
+    return points, scores_from_counts(counts, tracts_gdf, features)
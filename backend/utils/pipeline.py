@@ -0,0 +1,417 @@
+"""
+Incremental DAG runner for the data pipeline.
+
+Each Stage declares the files it reads, the files it writes and the
+config.py settings it depends on. Its fingerprint hashes those inputs,
+those settings and the stage's own code (for notebook stages, the cells
+plus the backend modules they import), so a stage only runs again when
+one of them changed, an output went missing or was edited, or (for fetch
+stages) its data is older than the freshness threshold. Stages whose
+inputs are ready run concurrently; notebook stages each run in their own
+Python process.
+
+Run state (fingerprints and output hashes) lives in
+CACHE_DIR/pipeline/state.json, so deleting the cache simply makes the next
+run rebuild everything.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Sequence
+
+import config
+from config import BASE_DIR, CACHE_DIR
+from utils.freshness import is_fresh
+from utils.http_cache import payload_sha256
+from utils.tract_index import file_sha256
+
+PIPELINE_STATE_PATH = CACHE_DIR / 'pipeline' / 'state.json'
+PIPELINE_LOG_DIR = CACHE_DIR / 'pipeline' / 'logs'
+
+# Backend packages the notebooks import; editing any module in them
+# invalidates every notebook stage
+BACKEND_CODE = (BASE_DIR / 'models', BASE_DIR / 'utils')
+
+# Notebook cells that only make sense on Colab (installs, repo bootstrap,
+# secrets, publishing) are left out of pipeline runs
+COLAB_CELL_MARKERS = (
+    '%pip', '!pip', 'google.colab', 'colab_utils', 'prepare_notebook',
+    'save_notebook', 'publish_artifacts',
+)
+
+
+class PipelineError(RuntimeError):
+    """A stage could not be run or did not produce its outputs."""
+
+
+def path_sha256(path: Path) -> str:
+    """Hex SHA-256 of a file, or of every file (with its relative path) under a directory."""
+    path = Path(path)
+    if not path.is_dir():
+        return file_sha256(path)
+    digest = hashlib.sha256()
+    for file in sorted(p for p in path.rglob('*') if p.is_file()):
+        digest.update(file.relative_to(path).as_posix().encode())
+        digest.update(file_sha256(file).encode())
+    return digest.hexdigest()
+
+
+def sources_sha256(paths: Iterable[Path]) -> str:
+    """Hex SHA-256 of the .py files in the given files or directories (not bytecode)."""
+    digest = hashlib.sha256()
+    for root in paths:
+        root = Path(root)
+        files = [root] if root.is_file() else sorted(root.rglob('*.py'))
+        for file in files:
+            digest.update(file.relative_to(root.parent).as_posix().encode())
+            digest.update(file_sha256(file).encode())
+    return digest.hexdigest()
+
+
+def config_sha256(keys: Iterable[str], module=config) -> str:
+    """Hex SHA-256 of the named config settings."""
+    return payload_sha256({key: getattr(module, key) for key in sorted(keys)})
+
+
+class NotebookTask:
+    """
+    Stage action that runs the code cells of a notebook as a plain script.
+
+    Args:
+        notebook: Path to the .ipynb
+        sections: Numbers of the '## N.' sections to run; default all
+        exclude: Numbers of sections to leave out
+        repo_root: Bound to `repo` and `REPO` in the script, as the Colab
+            bootstrap cells do
+        code: Backend source files or directories the cells import; their
+            Python sources are part of digest()
+
+    Cells before the first numbered heading and Colab-only cells (see
+    COLAB_CELL_MARKERS) are skipped. The script runs in a fresh interpreter
+    with backend/ as the working directory and on sys.path.
+    """
+
+    def __init__(self, notebook: Path, sections: Optional[Sequence[str]] = None,
+                 exclude: Sequence[str] = (), repo_root: Path = BASE_DIR.parent,
+                 code: Sequence[Path] = BACKEND_CODE):
+        self.notebook = Path(notebook)
+        self.sections = None if sections is None else [str(s) for s in sections]
+        self.exclude = [str(s) for s in exclude]
+        self.repo_root = Path(repo_root)
+        self.code = [Path(p) for p in code]
+
+    def __repr__(self) -> str:
+        return f"NotebookTask({self.notebook.name}, sections={self.sections}, exclude={self.exclude})"
+
+    def cells(self) -> List[str]:
+        """Sources of the code cells this task runs, in notebook order."""
+        with open(self.notebook) as f:
+            nb = json.load(f)
+        section = None
+        selected = []
+        for cell in nb['cells']:
+            source = ''.join(cell['source'])
+            if cell['cell_type'] == 'markdown':
+                heading = source.lstrip()
+                if heading.startswith('## '):
+                    section = heading[3:].split('.', 1)[0].strip()
+                continue
+            if cell['cell_type'] != 'code' or section is None:
+                continue
+            if any(marker in source for marker in COLAB_CELL_MARKERS):
+                continue
+            if self.sections is not None and section not in self.sections:
+                continue
+            if section in self.exclude:
+                continue
+            selected.append(source)
+        return selected
+
+    def script(self) -> str:
+        """The cells joined into one script, behind a preamble replacing the bootstrap."""
+        preamble = (
+            "import sys\n"
+            "from pathlib import Path\n"
+            f"sys.path.insert(0, {str(BASE_DIR)!r})\n"
+            f"repo = REPO = Path({str(self.repo_root)!r})\n"
+        )
+        return '\n\n'.join([preamble, *self.cells()]) + '\n'
+
+    def digest(self) -> str:
+        """
+        Hash of the code that would run, so editing a cell or an imported
+        backend module invalidates the stage.
+        """
+        digest = hashlib.sha256(self.script().encode())
+        digest.update(sources_sha256(self.code).encode())
+        return digest.hexdigest()
+
+    def __call__(self, log_path: Optional[Path] = None) -> None:
+        with tempfile.NamedTemporaryFile('w', suffix='.py', prefix=f'{self.notebook.stem}-',
+                                         delete=False) as f:
+            f.write(self.script())
+        try:
+            with open(log_path or os.devnull, 'w') as log:
+                result = subprocess.run([sys.executable, f.name], cwd=BASE_DIR,
+                                        stdout=log, stderr=subprocess.STDOUT)
+        finally:
+            os.unlink(f.name)
+        if result.returncode != 0:
+            where = f", see {log_path}" if log_path else ''
+            raise PipelineError(f"{self.notebook.name} exited with status {result.returncode}{where}")
+
+
+class Stage:
+    """
+    One step of the pipeline.
+
+    Args:
+        name: Unique stage name
+        action: Callable run with the log file path as its only argument;
+            if it has a digest() method the result is part of the fingerprint
+        inputs: Files or directories the stage reads
+        outputs: Files or directories the stage writes
+        config_keys: Names of config.py settings the stage depends on
+        max_age_days: Re-run once the first output's freshness sidecar is
+            older than this (fetch stages); None for pure computations
+    """
+
+    def __init__(self, name: str, action: Callable, inputs: Sequence[Path] = (),
+                 outputs: Sequence[Path] = (), config_keys: Sequence[str] = (),
+                 max_age_days: Optional[int] = None):
+        self.name = name
+        self.action = action
+        self.inputs = [Path(p) for p in inputs]
+        self.outputs = [Path(p) for p in outputs]
+        self.config_keys = list(config_keys)
+        self.max_age_days = max_age_days
+
+    def __repr__(self) -> str:
+        return f"Stage({self.name!r})"
+
+    def fingerprint(self, config_module=config) -> str:
+        """Hash of the stage's code, input contents and config settings."""
+        missing = [str(p) for p in self.inputs if not p.exists()]
+        if missing:
+            raise PipelineError(f"{self.name}: missing input(s) {', '.join(missing)}")
+        digest = getattr(self.action, 'digest', None)
+        return payload_sha256({
+            'code': digest() if digest else getattr(self.action, '__qualname__', repr(self.action)),
+            'inputs': {str(p): path_sha256(p) for p in self.inputs},
+            'config': config_sha256(self.config_keys, config_module),
+        })
+
+
+class Pipeline:
+    """
+    A set of stages wired together by their inputs and outputs.
+
+    Args:
+        stages: Stages in any order; a stage depends on every stage that
+            writes one of its inputs
+        state_path: JSON file holding fingerprints of the last successful runs
+        log_dir: Per-stage output logs
+        config_module: Module the stages' config_keys are read from
+    """
+
+    def __init__(self, stages: Sequence[Stage], state_path: Path = PIPELINE_STATE_PATH,
+                 log_dir: Path = PIPELINE_LOG_DIR, config_module=config):
+        self.stages = {s.name: s for s in stages}
+        if len(self.stages) != len(stages):
+            raise ValueError("Stage names must be unique")
+        self.state_path = Path(state_path)
+        self.log_dir = Path(log_dir)
+        self.config_module = config_module
+
+        producers = {}
+        for stage in stages:
+            for path in stage.outputs:
+                if path in producers:
+                    raise ValueError(f"{path} is written by both {producers[path]} and {stage.name}")
+                producers[path] = stage.name
+        self.upstream = {s.name: sorted({producers[p] for p in s.inputs if p in producers})
+                         for s in stages}
+        self._check_acyclic()
+
+    def _check_acyclic(self) -> None:
+        """Reject cycles and record a topological order in self.order."""
+        visiting, visited = set(), set()
+        self.order = []
+
+        def visit(name):
+            if name in visited:
+                return
+            if name in visiting:
+                raise ValueError(f"Pipeline has a cycle through {name}")
+            visiting.add(name)
+            for dep in self.upstream[name]:
+                visit(dep)
+            visiting.discard(name)
+            visited.add(name)
+            self.order.append(name)
+
+        for name in self.stages:
+            visit(name)
+
+    def downstream(self, names: Iterable[str]) -> List[str]:
+        """The named stages and every stage that (transitively) depends on them."""
+        selected = set(names)
+        unknown = selected - set(self.stages)
+        if unknown:
+            raise KeyError(f"Unknown stage(s): {', '.join(sorted(unknown))}")
+        changed = True
+        while changed:
+            changed = False
+            for name, deps in self.upstream.items():
+                if name not in selected and selected.intersection(deps):
+                    selected.add(name)
+                    changed = True
+        return [name for name in self.order if name in selected]
+
+    def load_state(self) -> Dict:
+        if not self.state_path.exists():
+            return {}
+        with open(self.state_path) as f:
+            return json.load(f)
+
+    def _save_state(self, state: Dict) -> None:
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.state_path.with_suffix('.tmp')
+        with open(tmp, 'w') as f:
+            json.dump(state, f, indent=2, sort_keys=True)
+        os.replace(tmp, self.state_path)
+
+    def reason_to_run(self, stage: Stage, state: Dict, fingerprint: str) -> Optional[str]:
+        """Why a stage is out of date, or None if its outputs are current."""
+        record = state.get(stage.name)
+        if record is None:
+            return 'never run'
+        if record.get('fingerprint') != fingerprint:
+            return 'inputs changed'
+        for path in stage.outputs:
+            if not path.exists():
+                return f'{path.name} missing'
+            if record.get('outputs', {}).get(str(path)) != path_sha256(path):
+                return f'{path.name} modified'
+        if stage.max_age_days is not None and stage.outputs \
+                and not is_fresh(stage.outputs[0], stage.max_age_days):
+            return 'stale'
+        return None
+
+    def plan(self, targets: Optional[Iterable[str]] = None, force: bool = False) -> Dict[str, str]:
+        """
+        What run() would do given the files as they are now.
+
+        Stages downstream of one that will run can only be judged once it
+        has, so they are reported as 'after upstream'.
+        """
+        forced = set(self.stages) if force else set(targets or ())
+        selected = self.downstream(targets) if targets else list(self.order)
+        state = self.load_state()
+        plan: Dict[str, str] = {}
+        for name in selected:
+            if name in forced:
+                plan[name] = 'forced'
+            elif any(plan.get(d, 'up to date') != 'up to date' for d in self.upstream[name]):
+                plan[name] = 'after upstream'
+            else:
+                try:
+                    fingerprint = self.stages[name].fingerprint(self.config_module)
+                except PipelineError as e:
+                    plan[name] = str(e)
+                    continue
+                plan[name] = self.reason_to_run(self.stages[name], state, fingerprint) or 'up to date'
+        return plan
+
+    def _run_stage(self, stage: Stage) -> float:
+        self.log_dir.mkdir(parents=True, exist_ok=True)
+        start = time.perf_counter()
+        stage.action(self.log_dir / f'{stage.name}.log')
+        missing = [str(p) for p in stage.outputs if not p.exists()]
+        if missing:
+            raise PipelineError(f"{stage.name} did not write {', '.join(missing)}")
+        return time.perf_counter() - start
+
+    def run(self, targets: Optional[Iterable[str]] = None, force: bool = False,
+            jobs: Optional[int] = None) -> Dict[str, str]:
+        """
+        Bring the selected stages up to date.
+
+        Args:
+            targets: Stages to run unconditionally, together with everything
+                downstream of them (which still runs only if out of date);
+                default every stage, each only if out of date
+            force: Run every selected stage regardless of fingerprints
+            jobs: Stages run at once; default the CPU count
+
+        Returns:
+            {stage name: 'ran' | 'skipped' | 'failed' | 'blocked'} for the
+            selected stages. Stages outside the selection are treated as
+            up to date.
+        """
+        forced = set(self.stages) if force else set(targets or ())
+        selected = self.downstream(targets) if targets else list(self.order)
+        state = self.load_state()
+        status: Dict[str, str] = {}
+        pending = list(selected)
+        running = {}
+
+        with ThreadPoolExecutor(max_workers=jobs or os.cpu_count() or 1) as pool:
+            while pending or running:
+                for name in list(pending):
+                    deps = [d for d in self.upstream[name] if d in selected]
+                    if any(status.get(d) in ('failed', 'blocked') for d in deps):
+                        status[name] = 'blocked'
+                        print(f"[{name}] blocked by a failed upstream stage")
+                        pending.remove(name)
+                        continue
+                    if not all(d in status for d in deps):
+                        continue
+                    pending.remove(name)
+
+                    stage = self.stages[name]
+                    try:
+                        fingerprint = stage.fingerprint(self.config_module)
+                    except PipelineError as e:
+                        status[name] = 'failed'
+                        print(f"[{name}] failed: {e}")
+                        continue
+                    reason = 'forced' if name in forced else self.reason_to_run(stage, state, fingerprint)
+                    if reason is None:
+                        status[name] = 'skipped'
+                        print(f"[{name}] up to date")
+                        continue
+                    print(f"[{name}] running ({reason})")
+                    running[pool.submit(self._run_stage, stage)] = (name, fingerprint)
+
+                if not running:
+                    continue
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    name, fingerprint = running.pop(future)
+                    try:
+                        elapsed = future.result()
+                    except Exception as e:
+                        status[name] = 'failed'
+                        print(f"[{name}] failed: {e}")
+                        continue
+                    status[name] = 'ran'
+                    state[name] = {
+                        'fingerprint': fingerprint,
+                        'outputs': {str(p): path_sha256(p) for p in self.stages[name].outputs},
+                        'finished_at': datetime.now(timezone.utc).isoformat(),
+                    }
+                    self._save_state(state)
+                    print(f"[{name}] done in {elapsed:.1f}s")
+
+        return {name: status[name] for name in selected}
@@ -0,0 +1,269 @@
+"""
+Bootstrap and permutation resampling for group comparisons.
+
+Replicates are drawn within each group (stratified bootstrap) as one index
+matrix per group, so thousands of replicate group means come out of a single
+fancy-indexing reduction instead of a Python loop over replicates. Work is
+split into fixed-size chunks, each seeded from its own child of one
+SeedSequence; the chunks can run in a process pool and the result is the
+same whether they do or not.
+
+Permutation tests shuffle group labels in preallocated chunk matrices and
+get every permutation's group means from one matrix product.
+"""
+
+from __future__ import annotations
+
+from concurrent.futures import ProcessPoolExecutor
+from itertools import combinations
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+from scipy import stats
+from scipy.special import gammaln
+
+BOOTSTRAP_CHUNK_SIZE = 1000
+
+
+def _group_mean_chunk(groups: Sequence[np.ndarray], n_replicates: int,
+                      seed: np.random.SeedSequence) -> np.ndarray:
+    """Replicate means for each group: (n_replicates, n_groups)."""
+    rng = np.random.default_rng(seed)
+    means = np.empty((n_replicates, len(groups)))
+    for j, values in enumerate(groups):
+        idx = rng.integers(0, len(values), size=(n_replicates, len(values)))
+        means[:, j] = values[idx].mean(axis=1)
+    return means
+
+
+def bootstrap_group_means(groups: Sequence[np.ndarray], n_bootstrap: int,
+                          random_state: Optional[int] = None,
+                          n_jobs: Optional[int] = None,
+                          chunk_size: int = BOOTSTRAP_CHUNK_SIZE) -> np.ndarray:
+    """
+    Stratified bootstrap of group means.
+
+    Args:
+        groups: One 1-D array of observations per group
+        n_bootstrap: Number of replicates
+        random_state: Seed; equal seeds give equal replicates for any n_jobs
+        n_jobs: Worker processes (None or 1 runs in this process)
+        chunk_size: Replicates per chunk, bounding the index matrix size
+
+    Returns:
+        (n_bootstrap, n_groups) array of replicate means
+    """
+    groups = [np.asarray(g, dtype=float) for g in groups]
+    sizes = [chunk_size] * (n_bootstrap // chunk_size)
+    if n_bootstrap % chunk_size:
+        sizes.append(n_bootstrap % chunk_size)
+    seeds = np.random.SeedSequence(random_state).spawn(len(sizes))
+
+    if n_jobs is not None and n_jobs > 1 and len(sizes) > 1:
+        with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+            chunks = list(pool.map(_group_mean_chunk, [groups] * len(sizes), sizes, seeds))
+    else:
+        chunks = [_group_mean_chunk(groups, size, seed) for size, seed in zip(sizes, seeds)]
+
+    if not chunks:
+        return np.empty((0, len(groups)))
+    return np.vstack(chunks)
+
+
+def _jackknife_gap(best: np.ndarray, worst: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Leave-one-out gap and gap_pct over the observations of both groups."""
+    best_loo = (best.sum() - best) / (len(best) - 1) if len(best) > 1 else np.empty(0)
+    worst_loo = (worst.sum() - worst) / (len(worst) - 1) if len(worst) > 1 else np.empty(0)
+    best_mean, worst_mean = best.mean(), worst.mean()
+
+    gap = np.concatenate([best_loo - worst_mean, best_mean - worst_loo])
+    with np.errstate(divide='ignore', invalid='ignore'):
+        gap_pct = np.concatenate([
+            (best_loo - worst_mean) / worst_mean,
+            (best_mean - worst_loo) / worst_loo,
+        ]) * 100
+    return gap, gap_pct
+
+
+def bootstrap_interval(replicates: np.ndarray, estimate: float, confidence: float = 0.95,
+                       method: str = 'bca', jackknife: Optional[np.ndarray] = None) -> Tuple[float, float]:
+    """
+    Confidence interval from bootstrap replicates.
+
+    Args:
+        replicates: 1-D array of replicate statistics
+        estimate: Statistic on the original sample
+        confidence: Coverage, e.g. 0.95
+        method: 'percentile' or 'bca' (bias-corrected and accelerated)
+        jackknife: Leave-one-out statistics, used for the BCa acceleration
+
+    Returns:
+        (lower, upper); NaN when there are no finite replicates
+    """
+    replicates = replicates[np.isfinite(replicates)]
+    if len(replicates) == 0:
+        return float('nan'), float('nan')
+
+    alpha = (1 - confidence) / 2
+    quantiles = np.array([alpha, 1 - alpha])
+
+    if method == 'bca':
+        proportion = np.mean(replicates < estimate)
+        if 0 < proportion < 1:
+            z0 = stats.norm.ppf(proportion)
+            acceleration = 0.0
+            if jackknife is not None:
+                jackknife = jackknife[np.isfinite(jackknife)]
+                d = jackknife.mean() - jackknife if len(jackknife) else np.empty(0)
+                denom = 6 * np.sum(d ** 2) ** 1.5
+                if denom > 0:
+                    acceleration = np.sum(d ** 3) / denom
+            z = z0 + stats.norm.ppf(quantiles)
+            quantiles = stats.norm.cdf(z0 + z / (1 - acceleration * z))
+    elif method != 'percentile':
+        raise ValueError(f"Unknown bootstrap interval method: {method!r}")
+
+    lower, upper = np.quantile(replicates, quantiles)
+    return float(lower), float(upper)
+
+
+def bootstrap_gap(best: np.ndarray, worst: np.ndarray, n_bootstrap: int,
+                  confidence: float = 0.95, method: str = 'bca',
+                  random_state: Optional[int] = None,
+                  n_jobs: Optional[int] = None) -> Dict:
+    """
+    Bootstrap intervals for the gap between two group means.
+
+    The gap is mean(best) - mean(worst) and gap_pct is the gap as a
+    percentage of mean(worst), matching equity_gap_analysis.
+
+    Returns:
+        dict with gap_ci, gap_pct_ci, ci_method, confidence and n_bootstrap
+    """
+    best = np.asarray(best, dtype=float)
+    worst = np.asarray(worst, dtype=float)
+    means = bootstrap_group_means([best, worst], n_bootstrap, random_state, n_jobs)
+
+    gap = means[:, 0] - means[:, 1]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        gap_pct = gap / means[:, 1] * 100
+
+    estimate = best.mean() - worst.mean()
+    estimate_pct = estimate / worst.mean() * 100 if worst.mean() != 0 else float('nan')
+    jack_gap, jack_pct = _jackknife_gap(best, worst) if method == 'bca' else (None, None)
+
+    return {
+        'gap_ci': list(bootstrap_interval(gap, estimate, confidence, method, jack_gap)),
+        'gap_pct_ci': list(bootstrap_interval(gap_pct, estimate_pct, confidence, method, jack_pct)),
+        'ci_method': method,
+        'confidence': confidence,
+        'n_bootstrap': int(n_bootstrap),
+    }
+
+
+PERMUTATION_CHUNK_SIZE = 2000
+
+
+def _group_mean_range(means: np.ndarray) -> np.ndarray:
+    """Largest minus smallest group mean along the last axis."""
+    return means.max(axis=-1) - means.min(axis=-1)
+
+
+def _label_arrangements(counts: Sequence[int]):
+    """Yield every distinct assignment of group codes to positions."""
+    n = int(sum(counts))
+
+    def assign(labels, free, group):
+        if group == len(counts) - 1:
+            labels[free] = group
+            yield labels.copy()
+            return
+        for chosen in combinations(range(len(free)), counts[group]):
+            taken = np.zeros(len(free), dtype=bool)
+            taken[list(chosen)] = True
+            labels[free[taken]] = group
+            yield from assign(labels, free[~taken], group + 1)
+
+    yield from assign(np.empty(n, dtype=np.intp), np.arange(n), 0)
+
+
+def permutation_test(values: np.ndarray, codes: np.ndarray, n_permutations: int = 10000,
+                     random_state: Optional[int] = None, exact: Optional[bool] = None,
+                     chunk_size: int = PERMUTATION_CHUNK_SIZE) -> Dict:
+    """
+    Permutation test for a difference in group means.
+
+    The statistic is the range of group means (largest minus smallest), so
+    the test accounts for best and worst groups being picked after the fact.
+    Group labels are shuffled; each chunk of permutations is a preallocated
+    (chunk_size, n) matrix whose group means come from one matrix product
+    with the group indicator matrix, keeping memory bounded by chunk_size.
+
+    Args:
+        values: 1-D array of observations
+        codes: Integer group code (0..k-1) per observation
+        n_permutations: Monte Carlo permutations
+        random_state: Seed for the Monte Carlo permutations
+        exact: Enumerate every distinct labelling. Defaults to True when
+            there are no more of them than n_permutations.
+        chunk_size: Permutations evaluated per vectorized step
+
+    Returns:
+        dict with statistic, p_value, n_permutations and exact
+    """
+    values = np.asarray(values, dtype=float)
+    codes = np.asarray(codes)
+    n_groups = int(codes.max()) + 1
+    counts = np.bincount(codes, minlength=n_groups)
+    indicator = np.zeros((len(values), n_groups))
+    indicator[np.arange(len(values)), codes] = 1.0 / counts[codes]
+
+    observed = float(_group_mean_range(values @ indicator))
+    # Guard against float noise when a permutation reproduces the observed split
+    threshold = observed - 1e-9 * max(abs(observed), 1.0)
+
+    if exact is None:
+        # Number of distinct labellings is the multinomial n! / prod(n_g!)
+        log_arrangements = gammaln(len(values) + 1) - gammaln(counts + 1).sum()
+        exact = log_arrangements <= np.log(n_permutations) + 1e-9
+
+    extreme = 0
+    if exact:
+        # Place the values a labelling assigns to group g in the slots that
+        # group g occupies in the observed labelling, then reuse the indicator
+        slots = np.argsort(codes, kind='stable')
+        buffer = np.empty((chunk_size, len(values)))
+        arrangements = _label_arrangements(counts.tolist())
+        n_evaluated = 0
+        while True:
+            filled = 0
+            for labels in arrangements:
+                buffer[filled, slots] = values[np.argsort(labels, kind='stable')]
+                filled += 1
+                if filled == chunk_size:
+                    break
+            if not filled:
+                break
+            extreme += int(np.sum(_group_mean_range(buffer[:filled] @ indicator) >= threshold))
+            n_evaluated += filled
+        p_value = extreme / n_evaluated
+    else:
+        rng = np.random.default_rng(random_state)
+        buffer = np.empty((chunk_size, len(values)))
+        remaining = n_permutations
+        while remaining:
+            size = min(chunk_size, remaining)
+            block = buffer[:size]
+            block[:] = values
+            rng.permuted(block, axis=1, out=block)
+            extreme += int(np.sum(_group_mean_range(block @ indicator) >= threshold))
+            remaining -= size
+        p_value = (extreme + 1) / (n_permutations + 1)
+        n_evaluated = n_permutations
+
+    return {
+        'statistic': observed,
+        'p_value': float(p_value),
+        'n_permutations': int(n_evaluated),
+        'exact': bool(exact),
+    }
@@ -0,0 +1,374 @@
+"""
+Prepared census tract index shared by all four auditors.
+
+Parsing durham_census_tracts.geojson, projecting it and building spatial
+indexes is the same work in every test. TractIndex does it once, stores the
+result as plain .npy arrays keyed by a content hash of the GeoJSON, and
+memory-maps them back on later runs.
+
+The fetch step also writes a GeoParquet copy of the GeoJSON next to it
+(WKB geometry, typed columns). read_census loads that copy whenever it was
+made from the current GeoJSON, which skips text and coordinate parsing.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from functools import cached_property
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+import shapely
+
+from config import CACHE_DIR, PROJECTED_CRS
+from utils.geospatial import TractLocator
+
+TRACT_INDEX_CACHE_DIR = CACHE_DIR / 'tract_index'
+TRACT_INDEX_FORMAT_VERSION = 2
+
+# Parquet schema metadata of the census copy: SHA-256 of the GeoJSON it was
+# made from, and the CRS as a plain authority string (building it from the
+# GeoParquet PROJJSON costs more than reading the whole file)
+CENSUS_PARQUET_SOURCE_KEY = b'source_sha256'
+CENSUS_PARQUET_CRS_KEY = b'crs'
+
+
+def file_sha256(path: Path) -> str:
+    """Hex SHA-256 of a file's bytes."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def geometry_sha256(tract_ids, geometries) -> str:
+    """
+    Hex SHA-256 of tract ids and their WKB geometries, in order.
+
+    Unlike file_sha256 of the GeoJSON this ignores demographic columns, so
+    caches of point-in-tract results survive an ACS refresh.
+    """
+    digest = hashlib.sha256()
+    for tract_id, wkb in zip(np.asarray(tract_ids, dtype=str), shapely.to_wkb(np.asarray(geometries))):
+        digest.update(tract_id.encode())
+        digest.update(wkb)
+    return digest.hexdigest()
+
+
+def census_parquet_path(geojson_path: Path) -> Path:
+    """The GeoParquet copy that sits next to a census GeoJSON."""
+    return Path(geojson_path).with_suffix('.parquet')
+
+
+def write_census_parquet(geojson_path: Path) -> Path:
+    """
+    Write the GeoParquet copy of a census GeoJSON, atomically.
+
+    The copy is made from the file as written, so both give the same frame.
+    It records the GeoJSON's SHA-256 so a copy left behind by an older
+    fetch is never read in place of a newer GeoJSON.
+
+    Returns:
+        Path of the copy
+    """
+    geojson_path = Path(geojson_path)
+    out = census_parquet_path(geojson_path)
+    fd, tmp = tempfile.mkstemp(dir=out.parent, prefix=f'.{out.stem}-', suffix='.parquet')
+    os.close(fd)
+    try:
+        gdf = gpd.read_file(geojson_path)
+        gdf.to_parquet(tmp, index=False)
+        table = pq.read_table(tmp)
+        metadata = {**(table.schema.metadata or {}),
+                    CENSUS_PARQUET_SOURCE_KEY: file_sha256(geojson_path).encode()}
+        if gdf.crs is not None:
+            metadata[CENSUS_PARQUET_CRS_KEY] = gdf.crs.to_string().encode()
+        pq.write_table(table.replace_schema_metadata(metadata), tmp)
+        os.replace(tmp, out)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+    return out
+
+
+def census_parquet_source(parquet_path: Path) -> Optional[str]:
+    """SHA-256 of the GeoJSON a GeoParquet copy was made from, or None if there is no copy."""
+    if not Path(parquet_path).exists():
+        return None
+    metadata = pq.read_schema(parquet_path).metadata or {}
+    source = metadata.get(CENSUS_PARQUET_SOURCE_KEY)
+    return source.decode() if source else None
+
+
+def _read_census_parquet(parquet_path: Path) -> gpd.GeoDataFrame:
+    """Read a census copy: Arrow table to pandas, then one vectorized WKB decode."""
+    table = pq.read_table(parquet_path)
+    metadata = table.schema.metadata or {}
+    if CENSUS_PARQUET_CRS_KEY not in metadata:
+        return gpd.read_parquet(parquet_path)
+    geo = json.loads(metadata[b'geo'])
+    geometry_column = geo['primary_column']
+    df = table.to_pandas()
+    geometries = shapely.from_wkb(df.pop(geometry_column).to_numpy())
+    gdf = gpd.GeoDataFrame(df, geometry=geometries, crs=metadata[CENSUS_PARQUET_CRS_KEY].decode())
+    if geometry_column != 'geometry':
+        gdf = gdf.rename_geometry(geometry_column)
+    return gdf[table.column_names]
+
+
+def read_census(geojson_path: Path, source_hash: Optional[str] = None) -> gpd.GeoDataFrame:
+    """
+    Census tracts, from the GeoParquet copy when it matches the GeoJSON.
+
+    Falls back to parsing the GeoJSON when the copy is missing or was made
+    from a different version of it. With the GeoJSON absent, the copy is
+    read on its own.
+
+    Args:
+        geojson_path: Path to durham_census_tracts.geojson
+        source_hash: The GeoJSON's SHA-256, if the caller already has it
+    """
+    geojson_path = Path(geojson_path)
+    parquet_path = census_parquet_path(geojson_path)
+    copy_source = census_parquet_source(parquet_path)
+    if copy_source is not None:
+        if not geojson_path.exists() or copy_source == (source_hash or file_sha256(geojson_path)):
+            return _read_census_parquet(parquet_path)
+    return gpd.read_file(geojson_path)
+
+
+def census_source_hash(geojson_path: Path) -> str:
+    """SHA-256 identifying the census data: the GeoJSON's, or the one its copy records."""
+    geojson_path = Path(geojson_path)
+    if geojson_path.exists():
+        return file_sha256(geojson_path)
+    source = census_parquet_source(census_parquet_path(geojson_path))
+    if source is None:
+        raise FileNotFoundError(f"Census data not found at {geojson_path}")
+    return source
+
+
+class TractIndex:
+    """
+    Column-oriented view of the census tracts.
+
+    Holds tract ids, geometries, projected areas, centroids, bounding boxes
+    and every attribute column as NumPy arrays in source order. Text columns
+    are fixed-width strings; their missing values are recorded in
+    null_masks. The STRtree used for point lookups is built lazily from the
+    geometries.
+    """
+
+    def __init__(self, tract_ids: np.ndarray, geometries: np.ndarray, area_km2: np.ndarray,
+                 centroids: np.ndarray, bounds: np.ndarray, columns: Dict[str, np.ndarray],
+                 crs: Optional[str] = None, source_hash: Optional[str] = None,
+                 null_masks: Optional[Dict[str, np.ndarray]] = None,
+                 column_order: Optional[List[str]] = None):
+        self.tract_ids = tract_ids
+        self.geometries = geometries
+        self.area_km2 = area_km2
+        self.centroids = centroids
+        self.bounds = bounds
+        self.columns = columns
+        self.crs = crs
+        self.source_hash = source_hash
+        self.null_masks = null_masks or {}
+        self.column_order = column_order or ['tract_id', *columns, 'geometry']
+
+    def __len__(self) -> int:
+        return len(self.tract_ids)
+
+    @classmethod
+    def from_gdf(cls, gdf: gpd.GeoDataFrame, source_hash: Optional[str] = None) -> 'TractIndex':
+        """Build an index from a census GeoDataFrame."""
+        if gdf.crs is None:
+            gdf = gdf.set_crs('EPSG:4326')
+
+        geometries = np.asarray(gdf.geometry.values, dtype=object)
+        area_km2 = gdf.geometry.to_crs(PROJECTED_CRS).area.to_numpy() / 1e6
+        centroids = shapely.get_coordinates(shapely.centroid(geometries))
+        bounds = shapely.bounds(geometries)
+
+        columns, null_masks = {}, {}
+        for name in gdf.columns:
+            if name in (gdf.geometry.name, 'tract_id'):
+                continue
+            values = gdf[name]
+            if pd.api.types.is_numeric_dtype(values) or pd.api.types.is_bool_dtype(values):
+                columns[name] = values.to_numpy()
+                continue
+            missing = values.isna().to_numpy()
+            columns[name] = np.where(missing, '', values.astype(object).to_numpy()).astype(str)
+            if missing.any():
+                null_masks[name] = missing
+
+        return cls(
+            tract_ids=gdf['tract_id'].astype(str).to_numpy(dtype=str),
+            geometries=geometries,
+            area_km2=area_km2,
+            centroids=centroids,
+            bounds=bounds,
+            columns=columns,
+            crs=gdf.crs.to_string(),
+            source_hash=source_hash,
+            null_masks=null_masks,
+            column_order=['geometry' if name == gdf.geometry.name else str(name) for name in gdf.columns],
+        )
+
+    @classmethod
+    def load(cls, geojson_path: Path, cache_dir: Path = TRACT_INDEX_CACHE_DIR) -> 'TractIndex':
+        """
+        Load the index for a census GeoJSON, building and caching it on first use.
+
+        The cache entry is keyed by the file's SHA-256, so a re-fetched
+        GeoJSON gets a fresh index and stale entries are never read. A cache
+        miss reads the tracts with read_census.
+        """
+        source_hash = census_source_hash(geojson_path)
+        entry = Path(cache_dir) / source_hash[:16]
+        manifest_path = entry / 'manifest.json'
+        if manifest_path.exists():
+            with open(manifest_path) as f:
+                manifest = json.load(f)
+            if (manifest.get('format_version') == TRACT_INDEX_FORMAT_VERSION
+                    and manifest.get('source_hash') == source_hash):
+                return cls.read(entry)
+
+        index = cls.from_gdf(read_census(geojson_path, source_hash), source_hash=source_hash)
+        index.save(entry)
+        return index
+
+    def save(self, directory: Path):
+        """Write the index as .npy arrays plus a manifest, atomically."""
+        directory = Path(directory)
+        directory.parent.mkdir(parents=True, exist_ok=True)
+        tmp_dir = Path(tempfile.mkdtemp(dir=directory.parent, prefix=f'.{directory.name}-'))
+
+        wkb = shapely.to_wkb(self.geometries)
+        offsets = np.zeros(len(wkb) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(b) for b in wkb])
+        blob = np.frombuffer(b''.join(wkb), dtype=np.uint8)
+
+        arrays = {
+            'tract_ids': self.tract_ids,
+            'wkb': blob,
+            'wkb_offsets': offsets,
+            'area_km2': self.area_km2,
+            'centroids': self.centroids,
+            'bounds': self.bounds,
+        }
+        column_files, mask_files = {}, {}
+        for i, (name, values) in enumerate(self.columns.items()):
+            column_files[name] = f'col_{i:03d}.npy'
+            arrays[column_files[name][:-4]] = values
+            if name in self.null_masks:
+                mask_files[name] = f'null_{i:03d}.npy'
+                arrays[mask_files[name][:-4]] = self.null_masks[name]
+
+        for name, values in arrays.items():
+            np.save(tmp_dir / f'{name}.npy', np.ascontiguousarray(values), allow_pickle=False)
+
+        manifest = {
+            'format_version': TRACT_INDEX_FORMAT_VERSION,
+            'source_hash': self.source_hash,
+            'crs': self.crs,
+            'num_tracts': len(self),
+            'columns': column_files,
+            'null_masks': mask_files,
+            'column_order': self.column_order,
+        }
+        with open(tmp_dir / 'manifest.json', 'w') as f:
+            json.dump(manifest, f, indent=2)
+
+        if directory.exists():
+            shutil.rmtree(directory)
+        os.replace(tmp_dir, directory)
+
+    @classmethod
+    def read(cls, directory: Path) -> 'TractIndex':
+        """Memory-map a saved index."""
+        directory = Path(directory)
+        with open(directory / 'manifest.json') as f:
+            manifest = json.load(f)
+
+        if manifest.get('format_version') != TRACT_INDEX_FORMAT_VERSION:
+            raise ValueError(
+                f"Tract index at {directory} has format version "
+                f"{manifest.get('format_version')}, expected {TRACT_INDEX_FORMAT_VERSION}"
+            )
+
+        def load(name):
+            return np.load(directory / name, mmap_mode='r', allow_pickle=False)
+
+        blob = load('wkb.npy')
+        offsets = load('wkb_offsets.npy')
+        wkb = [blob[offsets[i]:offsets[i + 1]].tobytes() for i in range(len(offsets) - 1)]
+
+        return cls(
+            tract_ids=load('tract_ids.npy'),
+            geometries=shapely.from_wkb(wkb),
+            area_km2=load('area_km2.npy'),
+            centroids=load('centroids.npy'),
+            bounds=load('bounds.npy'),
+            columns={name: load(fname) for name, fname in manifest['columns'].items()},
+            crs=manifest['crs'],
+            source_hash=manifest['source_hash'],
+            null_masks={name: load(fname) for name, fname in manifest['null_masks'].items()},
+            column_order=manifest['column_order'],
+        )
+
+    @cached_property
+    def geometry_hash(self) -> str:
+        """SHA-256 of the tract ids and geometries (see geometry_sha256)."""
+        return geometry_sha256(self.tract_ids, self.geometries)
+
+    @cached_property
+    def locator(self) -> TractLocator:
+        """Point-in-tract locator over the index geometries."""
+        return TractLocator.from_arrays(self.geometries, self.tract_ids)
+
+    def position_of(self, tract_ids) -> np.ndarray:
+        """Positional index of each tract id (-1 for unknown ids)."""
+        lookup = pd.Index(self.tract_ids)
+        return lookup.get_indexer(np.asarray(tract_ids, dtype=str))
+
+    def to_gdf(self) -> gpd.GeoDataFrame:
+        """Materialize a census GeoDataFrame with the original columns, nulls and order."""
+        data = {}
+        for name in self.column_order:
+            if name == 'tract_id':
+                data[name] = np.asarray(self.tract_ids, dtype=object)
+            elif name == 'geometry':
+                data[name] = list(self.geometries)
+            else:
+                values = np.asarray(self.columns[name])
+                if values.dtype.kind != 'U':
+                    data[name] = values.copy()
+                    continue
+                values = values.astype(object)
+                if name in self.null_masks:
+                    values[np.asarray(self.null_masks[name])] = None
+                data[name] = values
+        return gpd.GeoDataFrame(data, geometry='geometry', crs=self.crs)
+
+
+def resolve_census(census: Union[gpd.GeoDataFrame, TractIndex],
+                   copy: bool = True) -> Tuple[gpd.GeoDataFrame, Optional[TractIndex]]:
+    """
+    Normalize an auditor's census argument.
+
+    Auditors accept either a census GeoDataFrame or a TractIndex. Returns the
+    GeoDataFrame the auditor works on plus the index (None for plain frames).
+    """
+    if isinstance(census, TractIndex):
+        return census.to_gdf(), census
+    return (census.copy() if copy else census), None
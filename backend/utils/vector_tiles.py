@@ -0,0 +1,361 @@
+"""
+Static Mapbox Vector Tile pyramid for tract polygons and crash points.
+
+Layers are projected to Web Mercator once per zoom, then cut into z/x/y
+tiles: each tile is clipped (with a small buffer so strokes do not seam at
+tile edges), simplified and snapped to the MVT integer grid before being
+encoded with the small protobuf writer below (MVT spec 2.1). The output is
+plain files that any static host can serve.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import struct
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import geopandas as gpd
+import numpy as np
+import shapely
+from shapely import STRtree
+from shapely.geometry.polygon import orient
+
+from utils.geospatial import _column_to_geojson
+
+MVT_VERSION = 2
+MAX_MERCATOR_LAT = 85.0511287798
+
+_GEOM_POINT = 1
+_GEOM_POLYGON = 3
+_CMD_MOVE_TO = 1
+_CMD_LINE_TO = 2
+_CMD_CLOSE_PATH = 7
+
+
+# ---------------------------------------------------------------------------
+# Protobuf writer (only what vector_tile.proto needs)
+# ---------------------------------------------------------------------------
+
+def _varint(value: int) -> bytes:
+    out = bytearray()
+    while value > 0x7F:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+
+def _zigzag(value: int) -> int:
+    return value << 1 if value >= 0 else (-value << 1) - 1
+
+
+def _field_varint(field: int, value: int) -> bytes:
+    return _varint(field << 3) + _varint(value)
+
+
+def _field_bytes(field: int, payload: bytes) -> bytes:
+    return _varint((field << 3) | 2) + _varint(len(payload)) + payload
+
+
+def _field_packed(field: int, values: Sequence[int]) -> bytes:
+    return _field_bytes(field, b''.join(_varint(v) for v in values))
+
+
+def _encode_value(value) -> bytes:
+    """Encode a Value message; bools before ints since bool is an int subclass."""
+    if isinstance(value, str):
+        return _field_bytes(1, value.encode('utf-8'))
+    if isinstance(value, bool):
+        return _field_varint(7, int(value))
+    if isinstance(value, int):
+        return _field_varint(5, value) if value >= 0 else _field_varint(6, _zigzag(value))
+    return _varint((3 << 3) | 1) + struct.pack('<d', value)
+
+
+def _command(cmd: int, count: int) -> int:
+    return (cmd & 0x7) | (count << 3)
+
+
+def _encode_points(coords: np.ndarray) -> List[int]:
+    """Geometry commands for one or more points (tile coordinates)."""
+    out = [_command(_CMD_MOVE_TO, len(coords))]
+    cursor = np.zeros(2, dtype=np.int64)
+    for point in coords:
+        dx, dy = point - cursor
+        out += [_zigzag(int(dx)), _zigzag(int(dy))]
+        cursor = point
+    return out
+
+
+def _encode_rings(rings: List[np.ndarray]) -> List[int]:
+    """Geometry commands for polygon rings (open, tile coordinates, oriented by _polygon_rings)."""
+    out = []
+    cursor = np.zeros(2, dtype=np.int64)
+    for ring in rings:
+        deltas = np.diff(np.vstack([cursor, ring]), axis=0)
+        zz = np.where(deltas >= 0, deltas << 1, ((-deltas) << 1) - 1)
+        out.append(_command(_CMD_MOVE_TO, 1))
+        out += zz[0].tolist()
+        out.append(_command(_CMD_LINE_TO, len(ring) - 1))
+        out += zz[1:].ravel().tolist()
+        out.append(_command(_CMD_CLOSE_PATH, 1))
+        cursor = ring[-1]
+    return out
+
+
+def _polygon_rings(geometry) -> List[np.ndarray]:
+    """
+    Open integer rings of a (multi)polygon, dropping rings that snapped to nothing.
+
+    Exterior rings come out with positive surveyor's area in tile
+    coordinates and interior rings with negative, as the MVT spec requires.
+    """
+    rings = []
+    for polygon in shapely.get_parts(geometry):
+        if shapely.get_type_id(polygon) != 3:
+            continue  # clipping can leave slivers as lines or points
+        polygon = orient(polygon, sign=1.0)
+        for i, ring in enumerate([polygon.exterior, *polygon.interiors]):
+            coords = shapely.get_coordinates(ring)[:-1].astype(np.int64)
+            if len(coords) < 3:
+                if i == 0:
+                    break
+                continue
+            rings.append(coords)
+    return rings
+
+
+def encode_tile(layers: Dict[str, dict], extent: int = 4096) -> bytes:
+    """
+    Encode one vector tile.
+
+    Args:
+        layers: {name: {'geometries': array of shapely geometries in tile
+                 coordinates, 'properties': list of dicts}}
+        extent: Tile coordinate extent
+
+    Returns:
+        Protobuf-encoded tile bytes
+    """
+    tile = bytearray()
+    for name, layer in layers.items():
+        keys: Dict[str, int] = {}
+        values: Dict[tuple, int] = {}
+        features = bytearray()
+
+        for geometry, properties in zip(layer['geometries'], layer['properties']):
+            if shapely.get_type_id(geometry) in (0, 4):
+                commands = _encode_points(shapely.get_coordinates(geometry).astype(np.int64))
+                geom_type = _GEOM_POINT
+            else:
+                rings = _polygon_rings(geometry)
+                if not rings:
+                    continue
+                commands = _encode_rings(rings)
+                geom_type = _GEOM_POLYGON
+
+            tags = []
+            for key, value in properties.items():
+                if value is None:
+                    continue
+                tags.append(keys.setdefault(key, len(keys)))
+                tags.append(values.setdefault((type(value), value), len(values)))
+
+            feature = _field_packed(2, tags) + _field_varint(3, geom_type) + _field_packed(4, commands)
+            features += _field_bytes(2, feature)
+
+        if not features:
+            continue
+        body = bytearray(_field_varint(15, MVT_VERSION))
+        body += _field_bytes(1, name.encode('utf-8'))
+        body += features
+        for key in keys:
+            body += _field_bytes(3, key.encode('utf-8'))
+        for _, value in values:
+            body += _field_bytes(4, _encode_value(value))
+        body += _field_varint(5, extent)
+        tile += _field_bytes(3, bytes(body))
+    return bytes(tile)
+
+
+# ---------------------------------------------------------------------------
+# Tiling
+# ---------------------------------------------------------------------------
+
+class TileLayer:
+    """
+    One layer of the tile pyramid.
+
+    Args:
+        name: Layer name inside each tile
+        gdf: Polygons or points (any CRS; reprojected to lon/lat)
+        properties: Columns copied onto each feature
+        min_zoom / max_zoom: Zoom range the layer appears in
+        simplify: Douglas-Peucker tolerance in tile units (0 disables)
+    """
+
+    def __init__(self, name: str, gdf: gpd.GeoDataFrame, properties: Sequence[str] = (),
+                 min_zoom: int = 0, max_zoom: Optional[int] = None, simplify: float = 4.0):
+        if gdf.crs is not None and gdf.crs != 'EPSG:4326':
+            gdf = gdf.to_crs('EPSG:4326')
+        self.name = name
+        self.properties = list(properties)
+        self.min_zoom = min_zoom
+        self.max_zoom = max_zoom
+        self.simplify = simplify
+
+        geometries = np.asarray(gdf.geometry.values, dtype=object)
+        keep = ~(shapely.is_missing(geometries) | shapely.is_empty(geometries))
+        self.geometries = shapely.transform(geometries[keep], _lonlat_to_unit)
+        columns = [_column_to_geojson(gdf[key][keep]) for key in self.properties]
+        self.records = [dict(zip(self.properties, row)) for row in zip(*columns)] if columns \
+            else [{} for _ in range(int(keep.sum()))]
+        self.is_points = bool(len(self.geometries)) and bool(
+            np.isin(shapely.get_type_id(self.geometries), (0, 4)).all()
+        )
+        self.tree = None if self.is_points else STRtree(self.geometries)
+
+    def covers_zoom(self, zoom: int) -> bool:
+        return zoom >= self.min_zoom and (self.max_zoom is None or zoom <= self.max_zoom)
+
+
+def _lonlat_to_unit(coords: np.ndarray) -> np.ndarray:
+    """Lon/lat to Web Mercator scaled to the unit square (y grows southward)."""
+    lon = coords[:, 0]
+    lat = np.radians(np.clip(coords[:, 1], -MAX_MERCATOR_LAT, MAX_MERCATOR_LAT))
+    x = (lon + 180.0) / 360.0
+    y = (1.0 - np.log(np.tan(lat) + 1.0 / np.cos(lat)) / np.pi) / 2.0
+    return np.column_stack([x, y])
+
+
+def _unit_to_lonlat(x: float, y: float):
+    lon = x * 360.0 - 180.0
+    lat = np.degrees(np.arctan(np.sinh(np.pi * (1.0 - 2.0 * y))))
+    return float(lon), float(lat)
+
+
+def _polygon_tiles(layer: TileLayer, zoom: int, extent: int, buffer: int) -> Dict[tuple, dict]:
+    """Clip, simplify and quantize a polygon layer into every tile it touches."""
+    n = 2 ** zoom
+    world = shapely.transform(layer.geometries, lambda c: c * (n * extent))
+    if layer.simplify:
+        world = shapely.simplify(world, layer.simplify, preserve_topology=True)
+
+    minx, miny, maxx, maxy = shapely.total_bounds(layer.geometries)
+    tiles = {}
+    for tx in range(int(minx * n), min(int(maxx * n), n - 1) + 1):
+        for ty in range(int(miny * n), min(int(maxy * n), n - 1) + 1):
+            pad = buffer / extent
+            query = shapely.box((tx - pad) / n, (ty - pad) / n, (tx + 1 + pad) / n, (ty + 1 + pad) / n)
+            candidates = layer.tree.query(query, predicate='intersects')
+            if len(candidates) == 0:
+                continue
+            candidates.sort()
+
+            ox, oy = tx * extent, ty * extent
+            clipped = shapely.clip_by_rect(world[candidates], ox - buffer, oy - buffer,
+                                           ox + extent + buffer, oy + extent + buffer)
+            local = shapely.transform(clipped, lambda c: c - (ox, oy))
+            snapped = shapely.set_precision(local, 1.0)
+            keep = ~shapely.is_empty(snapped)
+            if not keep.any():
+                continue
+            tiles[(tx, ty)] = {
+                'geometries': snapped[keep],
+                'properties': [layer.records[i] for i in candidates[keep]],
+            }
+    return tiles
+
+
+def _point_tiles(layer: TileLayer, zoom: int, extent: int) -> Dict[tuple, dict]:
+    """Bucket a point layer into tiles by integer tile coordinate."""
+    n = 2 ** zoom
+    coords = np.floor(shapely.get_coordinates(layer.geometries) * (n * extent)).astype(np.int64)
+    owner = shapely.get_coordinates(layer.geometries, return_index=True)[1]
+    tile_xy = coords // extent
+    order = np.lexsort((tile_xy[:, 1], tile_xy[:, 0]))
+    tile_xy, coords, owner = tile_xy[order], coords[order], owner[order]
+    breaks = np.flatnonzero(np.any(np.diff(tile_xy, axis=0) != 0, axis=1)) + 1
+
+    tiles = {}
+    for group in np.split(np.arange(len(order)), breaks):
+        if len(group) == 0:
+            continue
+        tx, ty = (int(v) for v in tile_xy[group[0]])
+        local = coords[group] - (tx * extent, ty * extent)
+        tiles[(tx, ty)] = {
+            'geometries': shapely.points(local),
+            'properties': [layer.records[i] for i in owner[group]],
+        }
+    return tiles
+
+
+def build_vector_tiles(layers: List[TileLayer], output_dir: Path, min_zoom: int, max_zoom: int,
+                       extent: int = 4096, buffer: int = 64) -> dict:
+    """
+    Write a static z/x/y.pbf tile pyramid plus a TileJSON-style metadata.json.
+
+    The pyramid is built in a temporary directory and swapped in at the end,
+    so tiles from a previous run never mix with new ones.
+
+    Returns:
+        The metadata dict (also written to output_dir/metadata.json)
+    """
+    output_dir = Path(output_dir)
+    output_dir.parent.mkdir(parents=True, exist_ok=True)
+    tmp_dir = Path(tempfile.mkdtemp(dir=output_dir.parent, prefix=f'.{output_dir.name}-'))
+
+    tile_count = 0
+    total_bytes = 0
+    for zoom in range(min_zoom, max_zoom + 1):
+        contents: Dict[tuple, Dict[str, dict]] = {}
+        for layer in layers:
+            if not layer.covers_zoom(zoom) or len(layer.geometries) == 0:
+                continue
+            cut = _point_tiles(layer, zoom, extent) if layer.is_points \
+                else _polygon_tiles(layer, zoom, extent, buffer)
+            for xy, data in cut.items():
+                contents.setdefault(xy, {})[layer.name] = data
+
+        for (tx, ty), tile_layers in contents.items():
+            data = encode_tile(tile_layers, extent)
+            if not data:
+                continue
+            path = tmp_dir / str(zoom) / str(tx) / f'{ty}.pbf'
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(data)
+            tile_count += 1
+            total_bytes += len(data)
+
+    all_bounds = np.array([shapely.total_bounds(layer.geometries) for layer in layers if len(layer.geometries)])
+    west, north = _unit_to_lonlat(all_bounds[:, 0].min(), all_bounds[:, 1].min())
+    east, south = _unit_to_lonlat(all_bounds[:, 2].max(), all_bounds[:, 3].max())
+    metadata = {
+        'tilejson': '3.0.0',
+        'tiles': ['{z}/{x}/{y}.pbf'],
+        'minzoom': min_zoom,
+        'maxzoom': max_zoom,
+        'bounds': [west, south, east, north],
+        'vector_layers': [
+            {
+                'id': layer.name,
+                'fields': {key: 'value' for key in layer.properties},
+                'minzoom': max(layer.min_zoom, min_zoom),
+                'maxzoom': max_zoom if layer.max_zoom is None else min(layer.max_zoom, max_zoom),
+            }
+            for layer in layers
+        ],
+        'tile_count': tile_count,
+        'total_bytes': total_bytes,
+    }
+    with open(tmp_dir / 'metadata.json', 'w') as f:
+        json.dump(metadata, f, indent=2)
+
+    if output_dir.exists():
+        shutil.rmtree(output_dir)
+    os.replace(tmp_dir, output_dir)
+    return metadata
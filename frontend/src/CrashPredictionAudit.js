@@ -116,6 +116,7 @@ export class CrashPredictionAudit {
         });
         this.map = new DurhamMap('map-crashes').initialize();
         this.updateCrashLayer();
+        this.map.addCrashTiles();
 
         this._onResize = () => {
             if (this.map && document.getElementById('map-crashes')?.offsetParent !== null) {
@@ -2,6 +2,8 @@
  * Reusable Durham map component using Leaflet.js
  */
 
+import { levelForZoom } from '../../services/topology.js';
+
 export class DurhamMap {
     /** @type {import('leaflet').Map | null} */
     map;
@@ -11,6 +13,10 @@ export class DurhamMap {
     legendControl;
     /** @type {any[] | undefined} */
     markers;
+    /** @type {(() => void) | undefined} */
+    levelHandler;
+    /** @type {Promise<import('leaflet').GridLayer | null> | undefined} */
+    crashTiles;
 
     /**
      * @param {string} containerId
@@ -112,10 +118,46 @@ export class DurhamMap {
         }).addTo(this.map);
 
         this.choroplethLayer = layer;
+        this.followGeometryLevels(geojson.pyramid, layer);
 
         return this;
     }
 
+    /**
+     * Swap in finer or coarser tract geometry as the zoom crosses pyramid
+     * levels. Levels share feature order and ids, so polygons are updated in
+     * place and keep their styles, popups and highlights.
+     * @param {TractLayerPyramid | undefined} pyramid
+     * @param {import('leaflet').GeoJSON} layer
+     */
+    followGeometryLevels(pyramid, layer) {
+        if (this.levelHandler) this.map.off('zoomend', this.levelHandler);
+        this.levelHandler = undefined;
+        if (!pyramid) return;
+
+        let current = pyramid.level;
+        const update = async () => {
+            const level = levelForZoom(pyramid.index, this.map.getZoom());
+            if (level === current) return;
+            current = level;
+
+            const collection = await pyramid.load(level);
+            if (current !== level || this.choroplethLayer !== layer) return;
+
+            const geometries = new Map(collection.features.map(f => [f.id, f.geometry]));
+            layer.eachLayer((/** @type {any} */ polygon) => {
+                const geometry = geometries.get(polygon.feature.id);
+                if (!geometry) return;
+                const depth = geometry.type === 'Polygon' ? 1 : 2;
+                polygon.setLatLngs(L.GeoJSON.coordsToLatLngs(geometry.coordinates, depth));
+            });
+        };
+
+        this.levelHandler = () => { update(); };
+        this.map.on('zoomend', this.levelHandler);
+        update();
+    }
+
     /**
      * @param {{ lat: number; lon: number; [key: string]: unknown }[]} points
      * @param {MarkerOptions} options
@@ -135,6 +177,51 @@ export class DurhamMap {
         return this;
     }
 
+    /**
+     * Overlay individual crash points from the static vector tile pyramid
+     * (frontend/public/tiles). The zoom range comes from the tileset's
+     * metadata.json, so it follows VECTOR_TILE_CONFIG in the backend; tiles
+     * only exist from street zoom, so coarser views fetch nothing. Needs the
+     * Leaflet.VectorGrid plugin; without it (or without tiles) the map keeps
+     * just the choropleth.
+     * @param {CrashTileOptions} [options]
+     * @returns {this}
+     */
+    addCrashTiles(options = {}) {
+        const vectorGrid = /** @type {any} */ (L).vectorGrid;
+        if (!vectorGrid || this.crashTiles) return this;
+
+        const v = import.meta.env.VITE_DATA_HASH || 'dev';
+        const {
+            url = `/tiles/{z}/{x}/{y}.pbf?v=${v}`,
+            metadataUrl = `/tiles/metadata.json?v=${v}`,
+            color = '#1c1c1e'
+        } = options;
+
+        // Above the choropleth (overlayPane, 400), below popups
+        const pane = this.map.createPane('crashPoints');
+        pane.style.zIndex = '450';
+        pane.style.pointerEvents = 'none';
+
+        this.crashTiles = fetch(metadataUrl)
+            .then((response) => (response.ok ? response.json() : Promise.reject(new Error(response.statusText))))
+            .then((/** @type {TileMetadata} */ metadata) => {
+                const layer = metadata.vector_layers.find(l => l.id === 'crashes') || metadata;
+                return vectorGrid.protobuf(url, {
+                    pane: 'crashPoints',
+                    minZoom: options.minZoom ?? layer.minzoom,
+                    maxNativeZoom: options.maxNativeZoom ?? layer.maxzoom,
+                    interactive: false,
+                    vectorTileLayerStyles: {
+                        crashes: { radius: 3, stroke: false, fill: true, fillColor: color, fillOpacity: 0.8 }
+                    }
+                }).addTo(this.map);
+            })
+            .catch(() => null);
+
+        return this;
+    }
+
     /**
      * @param {LegendOptions} [options]
      * @returns {this}
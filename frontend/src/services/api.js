@@ -3,31 +3,102 @@
  * Fetches pre-generated static JSON from /data/
  */
 
+import { decodeReport } from './columnar.js';
+import { joinTractAttributes } from './topology.js';
+
 class APIClient {
+    constructor() {
+        /** @type {Map<string, Promise<any>>} Shared topologies, fetched once per page load */
+        this.topologies = new Map();
+        /** @type {Promise<Record<string, string>> | null} */
+        this.fileHashes = null;
+    }
+
     /**
+     * Per-file content hashes from data-manifest.json, fetched once and always
+     * revalidated. Older data branches have none; their files fall back to the
+     * build-wide VITE_DATA_HASH.
+     * @returns {Promise<Record<string, string>>}
+     */
+    getFileHashes() {
+        if (!this.fileHashes) {
+            this.fileHashes = fetch('/data/data-manifest.json', { cache: 'no-cache' })
+                .then((response) => (response.ok ? response.json() : {}))
+                .then((/** @type {DataManifest} */ manifest) => manifest.hashes || {})
+                .catch(() => ({}));
+        }
+        return this.fileHashes;
+    }
+
+    /**
+     * Fetch a data file. Columnar tables are decoded to arrays of records,
+     * so callers see the same shapes as the older record-format files.
      * @param {string} endpoint
      * @returns {Promise<any>}
      */
     async get(endpoint) {
-        // Append data branch git SHA so browsers fetch fresh JSON after each data refresh.
-        const v = import.meta.env.VITE_DATA_HASH || 'dev'
+        // Versioned by content hash, so a data refresh only re-downloads the files that changed
+        const hashes = await this.getFileHashes();
+        const v = hashes[`${endpoint}.json`] || import.meta.env.VITE_DATA_HASH || 'dev';
         const response = await fetch(`/data/${endpoint}.json?v=${v}`);
 
         if (!response.ok) {
             throw new Error(`Failed to load ${endpoint}: ${response.statusText}`);
         }
 
-        return response.json();
+        return decodeReport(await response.json());
+    }
+
+    /**
+     * Fetch a tract-level map layer. Layers are published as attribute tables
+     * joined onto the shared tract topology; older data branches still ship
+     * full FeatureCollections, which are returned as-is.
+     *
+     * When the topology is a zoom pyramid the coarsest level is joined first and
+     * the collection carries a `pyramid` member that DurhamMap uses to load finer
+     * levels as the map zooms in.
+     * @param {string} endpoint
+     * @returns {Promise<any>}
+     */
+    async getTractLayer(endpoint) {
+        return this.joinTractLayer(await this.get(endpoint));
+    }
+
+    /**
+     * Join a fetched TractAttributes table onto its topology (see getTractLayer).
+     * @param {any} data
+     * @returns {Promise<any>}
+     */
+    async joinTractLayer(data) {
+        if (data.type !== 'TractAttributes') return data;
+
+        const topology = await this.getTopology(data.topology);
+        if (topology.type === 'Topology') return joinTractAttributes(topology, data);
+
+        const index = /** @type {TopologyPyramid} */ (topology);
+        const load = async (level) =>
+            joinTractAttributes(await this.getTopology(index.levels[level].file), data);
+        const collection = await load(0);
+        return { ...collection, pyramid: { index, level: 0, load } };
+    }
+
+    /**
+     * @param {string} name
+     * @returns {Promise<Topology | TopologyPyramid>}
+     */
+    getTopology(name) {
+        if (!this.topologies.has(name)) this.topologies.set(name, this.get(name));
+        return this.topologies.get(name);
     }
 
     // Overview equity context (TDI, zero-car households, bus stops)
-    getEquityContext() { return this.get('equity-context'); }
+    getEquityContext() { return this.getTractLayer('equity-context'); }
 
     // Test 1 endpoints
     /** @returns {Promise<VolumeReport>} */
     getTest1Report() { return this.get('volume-report'); }
     /** @returns {Promise<ChoroplethData>} */
-    getChoroplethData() { return this.get('choropleth-data'); }
+    getChoroplethData() { return this.getTractLayer('choropleth-data'); }
     /** @returns {Promise<CounterLocation[]>} */
     getCounterLocations() { return this.get('counter-locations'); }
 
@@ -39,17 +110,24 @@ class APIClient {
     /** @returns {Promise<CrashTimeSeries>} */
     getCrashTimeSeries() { return this.get('crash-time-series'); }
     /** @returns {Promise<CrashGeoData>} */
-    getCrashGeoData() { return this.get('crash-geo-data'); }
+    getCrashGeoData() { return this.getTractLayer('crash-geo-data'); }
 
     // Test 3 endpoints
     /** @returns {Promise<InfrastructureReport>} */
     getInfrastructureReport() { return this.get('infrastructure-report'); }
     /** @returns {Promise<DangerScores>} */
-    getDangerScores() { return this.get('danger-scores'); }
+    getDangerScores() { return this.getTractLayer('danger-scores'); }
     /** @returns {Promise<BudgetAllocation>} */
     getBudgetAllocation() { return this.get('budget-allocation'); }
     /** @returns {Promise<Recommendations>} */
-    getRecommendations() { return this.get('recommendations'); }
+    async getRecommendations() {
+        const data = await this.get('recommendations');
+        const [ai, need] = await Promise.all([
+            this.joinTractLayer(data.ai_recommendations),
+            this.joinTractLayer(data.need_based_recommendations),
+        ]);
+        return { ai_recommendations: ai, need_based_recommendations: need };
+    }
 
     // Test 4 endpoints
     /** @returns {Promise<DemandReport>} */
@@ -59,7 +137,7 @@ class APIClient {
     /** @returns {Promise<DetectionScorecard>} */
     getDetectionScorecard() { return this.get('detection-scorecard'); }
     /** @returns {Promise<DemandGeoData>} */
-    getDemandGeoData() { return this.get('demand-geo-data'); }
+    getDemandGeoData() { return this.getTractLayer('demand-geo-data'); }
 }
 
 export default new APIClient();
@@ -0,0 +1,55 @@
+/**
+ * Decoder for columnar report tables (backend/utils/columnar.py)
+ * A Columns table holds one array per field; columns listed in `encoded`
+ * hold positions in the report's shared `tract_ids` dictionary.
+ */
+
+/**
+ * @param {ColumnsTable} table
+ * @param {string[]} [tractIds]
+ * @returns {Record<string, unknown>[]}
+ */
+export function decodeColumns(table, tractIds = []) {
+    const columns = Object.entries(table.columns).map(([name, values]) =>
+        (table.encoded || []).includes(name)
+            ? [name, values.map(i => (i === null ? null : tractIds[i]))]
+            : [name, values]);
+    const records = new Array(table.length);
+    for (let i = 0; i < table.length; i++) {
+        const record = {};
+        for (const [name, values] of columns) record[name] = values[i];
+        records[i] = record;
+    }
+    return records;
+}
+
+/**
+ * @param {any} value
+ * @returns {boolean}
+ */
+function isPlainObject(value) {
+    return value !== null && typeof value === 'object' && !Array.isArray(value);
+}
+
+/**
+ * Replace every Columns table in a fetched file with its records, in place.
+ * Tables are looked for in object members only (never inside arrays), so
+ * topologies and record-format files pass through untouched.
+ * @template T
+ * @param {T} data
+ * @returns {T}
+ */
+export function decodeReport(data) {
+    if (!isPlainObject(data)) return data;
+    const tractIds = data.tract_ids || [];
+    const walk = (obj) => {
+        for (const [key, value] of Object.entries(obj)) {
+            if (!isPlainObject(value)) continue;
+            if (value.type === 'Columns') obj[key] = decodeColumns(value, tractIds);
+            else walk(value);
+        }
+    };
+    walk(data);
+    delete data.tract_ids;
+    return data;
+}
@@ -0,0 +1,78 @@
+/**
+ * Decoder for the shared tract topology
+ * Joins per-test attribute tables onto TopoJSON arcs to rebuild GeoJSON
+ */
+
+/**
+ * @param {Topology} topology
+ * @returns {number[][][]} Absolute [lon, lat] coordinates per arc
+ */
+function decodeArcs(topology) {
+    const [kx, ky] = topology.transform.scale;
+    const [x0, y0] = topology.transform.translate;
+    return topology.arcs.map(arc => {
+        let x = 0, y = 0;
+        return arc.map(([dx, dy]) => {
+            x += dx;
+            y += dy;
+            return [x * kx + x0, y * ky + y0];
+        });
+    });
+}
+
+/**
+ * @param {number[][][]} arcs
+ * @param {number[]} refs Arc indexes; ~i means arc i reversed
+ * @returns {number[][]}
+ */
+function stitchRing(arcs, refs) {
+    const ring = [];
+    for (const ref of refs) {
+        const arc = ref >= 0 ? arcs[ref] : arcs[~ref].slice().reverse();
+        ring.push(...(ring.length ? arc.slice(1) : arc));
+    }
+    return ring;
+}
+
+/**
+ * Rebuild a FeatureCollection from a topology and a TractAttributes table.
+ * Records without a matching geometry are skipped, like an inner join.
+ * @param {Topology} topology
+ * @param {TractAttributes} table
+ * @returns {GeoJSONFeatureCollection}
+ */
+export function joinTractAttributes(topology, table) {
+    const arcs = decodeArcs(topology);
+    const geometries = new Map();
+    for (const geom of topology.objects[table.object].geometries) {
+        if (geom.type === 'Polygon') {
+            geometries.set(geom.id, { type: 'Polygon', coordinates: geom.arcs.map(r => stitchRing(arcs, r)) });
+        } else if (geom.type === 'MultiPolygon') {
+            geometries.set(geom.id, {
+                type: 'MultiPolygon',
+                coordinates: geom.arcs.map(p => p.map(r => stitchRing(arcs, r))),
+            });
+        }
+    }
+
+    const features = table.records
+        .filter(record => geometries.has(String(record[table.key])))
+        .map((record, i) => ({
+            id: String(i),
+            type: /** @type {'Feature'} */ ('Feature'),
+            properties: record,
+            geometry: geometries.get(String(record[table.key])),
+        }));
+    return { type: 'FeatureCollection', features };
+}
+
+/**
+ * Pick the pyramid level whose zoom range covers `zoom`.
+ * @param {TopologyPyramid} index
+ * @param {number} zoom
+ * @returns {number}
+ */
+export function levelForZoom(index, zoom) {
+    const i = index.levels.findIndex(l => l.max_zoom === null || zoom <= l.max_zoom);
+    return i === -1 ? index.levels.length - 1 : i;
+}
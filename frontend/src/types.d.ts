@@ -27,6 +27,14 @@ interface EquityGap {
     gap_pct: number;
     statistically_significant: boolean;
     p_value: number;
+    test?: 'ttest' | 'permutation';
+    n_permutations?: number;
+    /** Bootstrap confidence intervals, present when the audit ran a bootstrap */
+    gap_ci?: [number, number];
+    gap_pct_ci?: [number, number];
+    ci_method?: 'bca' | 'percentile';
+    confidence?: number;
+    n_bootstrap?: number;
 }
 
 interface GeoJSONFeature<P = Record<string, unknown>> {
@@ -42,6 +50,64 @@ interface GeoJSONFeature<P = Record<string, unknown>> {
 interface GeoJSONFeatureCollection<P = Record<string, unknown>> {
     type: 'FeatureCollection';
     features: GeoJSONFeature<P>[];
+    pyramid?: TractLayerPyramid;
+}
+
+interface TopologyGeometry {
+    type: 'Polygon' | 'MultiPolygon' | null;
+    id: string;
+    arcs?: number[][] | number[][][];
+}
+
+interface Topology {
+    type: 'Topology';
+    bbox: number[];
+    transform: { scale: [number, number]; translate: [number, number] };
+    objects: Record<string, { type: 'GeometryCollection'; geometries: TopologyGeometry[] }>;
+    arcs: number[][][];
+}
+
+interface TopologyPyramid {
+    type: 'TopologyPyramid';
+    object: string;
+    levels: {
+        file: string;
+        min_zoom: number;
+        max_zoom: number | null;
+        tolerance: number | null;
+        vertices: number;
+    }[];
+}
+
+interface TractLayerPyramid {
+    index: TopologyPyramid;
+    level: number;
+    load: (level: number) => Promise<GeoJSONFeatureCollection>;
+}
+
+/** One array per field, as published; api.get() decodes tables to records */
+interface ColumnsTable {
+    type: 'Columns';
+    length: number;
+    columns: Record<string, unknown[]>;
+    /** Columns holding positions in the file's top-level `tract_ids` */
+    encoded?: string[];
+}
+
+interface TractAttributes {
+    type: 'TractAttributes';
+    topology: string;
+    object: string;
+    key: string;
+    /** A ColumnsTable in the file; records once fetched through api.get() */
+    records: Record<string, unknown>[];
+}
+
+interface DataManifest {
+    sources: Record<string, Record<string, unknown>>;
+    plausibility_ranges?: Record<string, unknown>;
+    /** Content hash of each file in /data, keyed by file name */
+    hashes?: Record<string, string>;
 }
 
 // ---------------------------------------------------------------------------
@@ -79,6 +145,16 @@ interface RaceCategory {
     mean_error_pct: number;
 }
 
+interface IntersectionAccuracy {
+    quintile: number;
+    category: string;
+    count: number;
+    mae: number;
+    mape: number;
+    bias: number;
+    mean_error_pct: number;
+}
+
 interface ScatterDataPoint {
     true_volume: number;
     predicted_volume: number;
@@ -104,6 +180,7 @@ interface VolumeReport {
         by_category: RaceCategory[];
         equity_gap: EquityGap;
     };
+    by_income_and_race?: IntersectionAccuracy[];
     scatter_data: ScatterDataPoint[];
     interpretation: string[];
 }
@@ -241,11 +318,20 @@ interface DangerScoreProperties {
 
 type DangerScores = GeoJSONFeatureCollection<DangerScoreProperties>;
 
+interface InequalityIndexes {
+    gini: number;
+    theil: number;
+    atkinson: number;
+    /** Negative when allocation favours low-income tracts */
+    concentration: number;
+}
+
 interface AllocationByQuintile {
     by_quintile: Record<string, number>;
     per_capita: Record<string, number>;
     disparate_impact_ratio: number;
     gini_coefficient: number;
+    population_weighted?: InequalityIndexes;
 }
 
 interface BudgetAllocation {
@@ -254,6 +340,7 @@ interface BudgetAllocation {
     comparison: {
         equity_gap: number;
         gini_improvement: number;
+        concentration_gap?: number;
     };
 }
 
@@ -264,7 +351,9 @@ interface RecommendationProperties {
     safety_impact: number;
     ai_priority: number;
     danger_score: number;
-    median_income_y: number;
+    median_income?: number;
+    /** Older data branches, where recommendations carried the census columns */
+    median_income_y?: number;
     population: number;
     [key: string]: unknown;
 }
@@ -395,6 +484,28 @@ interface MarkerOptions {
     popupContent?: (point: { lat: number; lon: number; [key: string]: unknown }) => string;
 }
 
+interface CrashTileOptions {
+    url?: string;
+    metadataUrl?: string;
+    /** Default: the crashes layer's minzoom in metadata.json */
+    minZoom?: number;
+    /** Default: the crashes layer's maxzoom in metadata.json */
+    maxNativeZoom?: number;
+    color?: string;
+}
+
+/** frontend/public/tiles/metadata.json, written by build_vector_tiles */
+interface TileMetadata {
+    tilejson: string;
+    tiles: string[];
+    minzoom: number;
+    maxzoom: number;
+    bounds: [number, number, number, number];
+    vector_layers: { id: string; fields: Record<string, string>; minzoom: number; maxzoom: number }[];
+    tile_count: number;
+    total_bytes: number;
+}
+
 interface DurhamMapOptions {
     center?: [number, number];
     zoom?: number;
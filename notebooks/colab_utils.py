@@ -58,9 +58,17 @@ def _do_publish(
     """Git add/commit/push given a resolved token. Returns True if a commit was pushed."""
     import json as _json
 
-    missing = [p for p in rel_paths if not (repo_path / p).exists()]
-    if missing:
-        raise FileNotFoundError("Cannot publish — files not found: " + ", ".join(missing))
+    # A missing path is published as a deletion if git tracks it, and
+    # dropped if it was never committed
+    absent = [p for p in rel_paths if not (repo_path / p).exists()]
+    tracked = subprocess.run(
+        ["git", "ls-files", "--", *absent],
+        cwd=repo_path, capture_output=True, text=True, check=True,
+    ).stdout.splitlines() if absent else []
+    rel_paths = [p for p in rel_paths if p not in absent or Path(p).as_posix() in tracked]
+    if not rel_paths:
+        print("No artifact changes to commit.")
+        return False
 
     # Heal notebooks written with the get_ipynb wrapper structure.
     for rel in rel_paths:
@@ -246,7 +254,12 @@ def publish_artifacts(
     Otherwise shows a 'Sign in & Publish' button and returns — the publish
     runs automatically once the user authenticates (non-blocking).
 
-    Returns True if pushed synchronously, None if auth is pending.
+    Pass the notebook snapshot plus ArtifactWriter.changed_paths() so that
+    files a run left untouched are not staged. Paths the run deleted are
+    committed as deletions.
+
+    Returns True if pushed synchronously, False if there was nothing to
+    commit, None if auth is pending.
     """
     try:
         import google.colab  # noqa: F401
@@ -255,6 +268,9 @@ def publish_artifacts(
 
     repo_path = Path(repo_dir)
     rel_paths = [str(Path(p)) for p in paths]
+    if not rel_paths:
+        print("No artifact changes to publish.")
+        return False
 
     # Fast path: secret available — publish synchronously.
     try: